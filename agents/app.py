@@ -1,10 +1,11 @@
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 import json
 from pathlib import Path
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 
 # Load environment variables from .env at the root of the project
 BASE_DIR = Path(__file__).resolve().parent
@@ -23,30 +24,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger("agents-flask")
 
-@app.route('/orchestrate', methods=['POST'])
-def orchestrate():
-    trace_id = str(uuid.uuid4())
-    data = request.json
-    
-    if not data:
-        logger.warning(f"[{trace_id}] No data provided in request")
-        return jsonify({"error": "No data provided"}), 400
-    
-    transaction = data.get("transaction")
-    customer = data.get("customer")
-    tx_id = transaction.get("id") if transaction else "N/A"
-    
-    logger.info(f"[{trace_id}] === START Orchestration for TX: {tx_id} ===")
-    
-    if not transaction or not customer:
-        logger.error(f"[{trace_id}] Missing transaction or customer data")
-        return jsonify({"error": "Missing transaction or customer data"}), 400
-    
-    # Initialize State
-    initial_state = {
+# Upper bounds for /orchestrate/batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+
+def _initial_state(data):
+    transaction = data["transaction"]
+    return {
         "transaction": transaction,
-        "customer": customer,
-        "transaction_id": tx_id,
+        "customer": data["customer"],
+        "velocity": data.get("velocity") or {},
+        "transaction_id": transaction.get("id", "N/A"),
         "signals": [],
         "internal_evidence": [],
         "external_evidence": [],
@@ -57,33 +46,57 @@ def orchestrate():
         "explanation_customer": "",
         "explanation_audit": ""
     }
+
+
+def _run_config(trace_id, tx_id, customer):
+    # Tagging for LangSmith
+    return {
+        "configurable": {"thread_id": trace_id},
+        "metadata": {
+            "transaction_id": tx_id,
+            "customer_id": customer.get("id", "N/A")
+        },
+        "tags": ["fraud-detection-v1", f"tx-{tx_id}"]
+    }
+
+
+def _response(trace_id, result):
+    return {
+        "trace_id": trace_id,
+        "decision": result["decision"],
+        "confidence": result["confidence"],
+        "signals": result["signals"],
+        "citations_internal": result["internal_evidence"],
+        "citations_external": result["external_evidence"],
+        "explanation_customer": result["explanation_customer"],
+        "explanation_audit": result["explanation_audit"]
+    }
+
+
+def _run_orchestration(trace_id, data):
+    tx_id = data["transaction"].get("id", "N/A")
+    logger.info(f"[{trace_id}] === START Orchestration for TX: {tx_id} ===")
+    result = graph.invoke(_initial_state(data), _run_config(trace_id, tx_id, data["customer"]))
+    logger.info(f"[{trace_id}] === END Orchestration. Decision: {result['decision']} (Conf: {result['confidence']}) ===")
+    return _response(trace_id, result)
+
+
+@app.route('/orchestrate', methods=['POST'])
+def orchestrate():
+    trace_id = str(uuid.uuid4())
+    data = request.json
+    
+    if not data:
+        logger.warning(f"[{trace_id}] No data provided in request")
+        return jsonify({"error": "No data provided"}), 400
+    
+    if not data.get("transaction") or not data.get("customer"):
+        logger.error(f"[{trace_id}] Missing transaction or customer data")
+        return jsonify({"error": "Missing transaction or customer data"}), 400
     
     try:
         # Run LangGraph Orchestration
-        # Tagging for LangSmith
-        config = {
-            "configurable": {"thread_id": trace_id},
-            "metadata": {
-                "transaction_id": tx_id,
-                "customer_id": customer.get("id", "N/A")
-            },
-            "tags": ["fraud-detection-v1", f"tx-{tx_id}"]
-        }
-        result = graph.invoke(initial_state, config)
-        
-        logger.info(f"[{trace_id}] === END Orchestration. Decision: {result['decision']} (Conf: {result['confidence']}) ===")
-        
-        # Prepare response
-        response = {
-            "trace_id": trace_id,
-            "decision": result["decision"],
-            "confidence": result["confidence"],
-            "signals": result["signals"],
-            "citations_internal": result["internal_evidence"],
-            "citations_external": result["external_evidence"],
-            "explanation_customer": result["explanation_customer"],
-            "explanation_audit": result["explanation_audit"]
-        }
+        response = _run_orchestration(trace_id, data)
         
         # Log the full JSON output as requested for CloudWatch visibility
         logger.info(f"[{trace_id}] === RESPONSE JSON ===\n{json.dumps(response, indent=2, ensure_ascii=False)}")
@@ -94,5 +107,51 @@ def orchestrate():
         logger.exception(f"[{trace_id}] Error during orchestration: {str(e)}")
         return jsonify({"error": str(e), "trace_id": trace_id}), 500
 
+
+@app.route('/orchestrate/batch', methods=['POST'])
+def orchestrate_batch():
+    """
+    Runs several transactions through the graph with bounded concurrency and
+    streams one NDJSON line per item as soon as it finishes (completion order,
+    not request order). Each line carries the item's `index` in the request.
+    """
+    batch_id = str(uuid.uuid4())
+    data = request.json
+    items = data.get("items") if isinstance(data, dict) else data
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty list of items"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} items per batch"}), 413
+
+    max_workers = min(BATCH_MAX_CONCURRENCY, len(items))
+    logger.info(f"[{batch_id}] === START Batch orchestration: {len(items)} items, {max_workers} workers ===")
+
+    def run_item(index, item):
+        trace_id = f"{batch_id}-{index}"
+        try:
+            return {"index": index, **_run_orchestration(trace_id, item)}
+        except Exception as e:
+            logger.exception(f"[{trace_id}] Error during orchestration: {str(e)}")
+            return {"index": index, "error": str(e), "trace_id": trace_id}
+
+    def generate():
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = []
+            for index, item in enumerate(items):
+                if not isinstance(item, dict) or not item.get("transaction") or not item.get("customer"):
+                    yield json.dumps({"index": index, "error": "Missing transaction or customer data"}) + "\n"
+                    continue
+                futures.append(executor.submit(run_item, index, item))
+            for future in as_completed(futures):
+                yield json.dumps(future.result(), ensure_ascii=False) + "\n"
+            logger.info(f"[{batch_id}] === END Batch orchestration ===")
+        finally:
+            # Client went away: do not start the items that are still queued
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
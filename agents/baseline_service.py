@@ -0,0 +1,82 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class CustomerBaseline:
+    """Pre-parsed customer profile (hour range and frozensets) used by the context agents."""
+    __slots__ = ("source", "usual_amount_avg", "hour_range", "countries", "devices")
+
+    def __init__(self, source: Tuple, usual_amount_avg: float, hour_range: Optional[Tuple[int, int]],
+                 countries: frozenset, devices: frozenset):
+        self.source = source
+        self.usual_amount_avg = usual_amount_avg
+        self.hour_range = hour_range
+        self.countries = countries
+        self.devices = devices
+
+    @staticmethod
+    def source_of(customer: Dict[str, Any]) -> Tuple:
+        return (
+            customer.get("usual_amount_avg", 0),
+            customer.get("usual_hours", ""),
+            customer.get("usual_countries", ""),
+            customer.get("usual_devices", ""),
+        )
+
+    @classmethod
+    def from_customer(cls, customer: Dict[str, Any]) -> "CustomerBaseline":
+        source = cls.source_of(customer)
+        usual_amount_avg, usual_hours, usual_countries, usual_devices = source
+
+        hour_range = None
+        if usual_hours:
+            try:
+                start_h, end_h = map(int, usual_hours.split('-'))
+                hour_range = (start_h, end_h)
+            except ValueError:
+                pass
+
+        return cls(
+            source=source,
+            usual_amount_avg=float(usual_amount_avg),
+            hour_range=hour_range,
+            countries=frozenset(c.strip() for c in usual_countries.split(',')) if usual_countries else frozenset(),
+            devices=frozenset(d.strip() for d in usual_devices.split(',')) if usual_devices else frozenset(),
+        )
+
+class BaselineCache:
+    """
+    Bounded LRU of parsed baselines keyed by customer id.
+
+    The backend sends the raw profile strings with every request, so a cached
+    entry is rebuilt as soon as they differ (i.e. the profile was saved).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, CustomerBaseline]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, customer: Dict[str, Any]) -> CustomerBaseline:
+        key = customer.get("id")
+        if key is None:
+            return CustomerBaseline.from_customer(customer)
+
+        source = CustomerBaseline.source_of(customer)
+        with self._lock:
+            baseline = self._entries.get(key)
+            if baseline is not None and baseline.source == source:
+                self._entries.move_to_end(key)
+                return baseline
+
+        baseline = CustomerBaseline.from_customer(customer)
+        with self._lock:
+            self._entries[key] = baseline
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return baseline
+
+# Singleton instance
+baseline_cache = BaselineCache(maxsize=int(os.getenv("BASELINE_CACHE_SIZE", "10000")))
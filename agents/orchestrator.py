@@ -6,12 +6,14 @@ from langchain_aws import ChatBedrock
 from pydantic import BaseModel, Field
 from aws_rag_service import rag_service
 from web_search_service import web_search_service
+from baseline_service import baseline_cache
 
 # --- State Definition ---
 
 class AgentState(TypedDict):
     transaction: Dict[str, Any]
     customer: Dict[str, Any]
+    velocity: Dict[str, Any]
     transaction_id: str
     signals: List[str]
     internal_evidence: List[Dict[str, Any]]
@@ -39,15 +41,16 @@ def transaction_context_agent(state: AgentState):
     
     print(f"\n[Agent] Transaction Context: Analyzing TX {tx.get('id')}...")
     
+    baseline = baseline_cache.get(cust)
+
     # Simple logic
-    if float(tx.get("amount", 0)) > float(cust.get("usual_amount_avg", 0)) * 3:
+    if float(tx.get("amount", 0)) > baseline.usual_amount_avg * 3:
         signals.append("Monto muy superior al promedio")
     
     # Hour analysis
-    usual_hours = cust.get("usual_hours", "")
-    if usual_hours:
+    if baseline.hour_range:
         try:
-            start_h, end_h = map(int, usual_hours.split('-'))
+            start_h, end_h = baseline.hour_range
             from datetime import datetime
             ts = tx.get("timestamp")
             dt = datetime.fromisoformat(ts) if isinstance(ts, str) else ts
@@ -57,8 +60,7 @@ def transaction_context_agent(state: AgentState):
             pass
             
     # Country analysis
-    usual_countries = [c.strip() for c in cust.get("usual_countries", "").split(',')] if cust.get("usual_countries") else []
-    if tx.get("country") and usual_countries and tx.get("country") not in usual_countries:
+    if tx.get("country") and baseline.countries and tx.get("country") not in baseline.countries:
         signals.append("País inusual")
     
     print(f" -> Detected signals: {signals}")
@@ -72,9 +74,15 @@ def behavioral_pattern_agent(state: AgentState):
     
     print("[Agent] Behavioral Pattern: Checking history...")
     
-    usual_devices = [d.strip() for d in cust.get("usual_devices", "").split(',')] if cust.get("usual_devices") else []
-    if tx.get("device_id") and usual_devices and tx.get("device_id") not in usual_devices:
+    baseline = baseline_cache.get(cust)
+    if tx.get("device_id") and baseline.devices and tx.get("device_id") not in baseline.devices:
         current_signals.append("Dispositivo desconocido")
+
+    # Velocity signals are computed by the backend's sliding-window store
+    velocity = state.get("velocity") or {}
+    for signal in velocity.get("signals", []):
+        if signal not in current_signals:
+            current_signals.append(signal)
         
     print(f" -> Updated signals: {current_signals}")
     return {"signals": current_signals}
@@ -106,6 +106,14 @@ DATABASES = {
     }
 }
 
+# Opt-in SQLite profile for several gunicorn workers: WAL, synchronous=NORMAL,
+# mmap, bigger page cache and busy timeout on every connection (core.sqlite).
+# Pair it with the sqlite_maintenance command for periodic checkpoints.
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', '0') == '1'
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # negative = KiB, i.e. 64 MiB per connection
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -150,5 +158,77 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Multi-agent orchestrator URL
 ORCHESTRATOR_URL = os.getenv('AGENTS_SERVICE_URL', 'http://localhost:5001') + '/orchestrate'
+ORCHESTRATOR_BATCH_URL = ORCHESTRATOR_URL + '/batch'
+ORCHESTRATOR_BATCH_SIZE = int(os.getenv('ORCHESTRATOR_BATCH_SIZE', '20'))  # must not exceed the agents' BATCH_MAX_ITEMS
+ORCHESTRATOR_POOL_SIZE = int(os.getenv('ORCHESTRATOR_POOL_SIZE', '10'))  # keep-alive connections per process
+ORCHESTRATOR_CONNECT_TIMEOUT = float(os.getenv('ORCHESTRATOR_CONNECT_TIMEOUT', '3.05'))
+ORCHESTRATOR_READ_TIMEOUT = float(os.getenv('ORCHESTRATOR_READ_TIMEOUT', '300'))
+ORCHESTRATOR_RETRIES = int(os.getenv('ORCHESTRATOR_RETRIES', '2'))  # connection errors and 502/503/504 only
+ORCHESTRATOR_RETRY_BACKOFF = float(os.getenv('ORCHESTRATOR_RETRY_BACKOFF', '0.5'))  # seconds, plus jitter
+ORCHESTRATOR_BREAKER_WINDOW = int(os.getenv('ORCHESTRATOR_BREAKER_WINDOW', '20'))  # recent calls tracked
+ORCHESTRATOR_BREAKER_MIN_CALLS = int(os.getenv('ORCHESTRATOR_BREAKER_MIN_CALLS', '5'))
+ORCHESTRATOR_BREAKER_FAILURE_RATE = float(os.getenv('ORCHESTRATOR_BREAKER_FAILURE_RATE', '0.5'))
+ORCHESTRATOR_SLOW_CALL_SECONDS = float(os.getenv('ORCHESTRATOR_SLOW_CALL_SECONDS', '120'))
+ORCHESTRATOR_BREAKER_SLOW_RATE = float(os.getenv('ORCHESTRATOR_BREAKER_SLOW_RATE', '0.8'))
+ORCHESTRATOR_BREAKER_OPEN_SECONDS = float(os.getenv('ORCHESTRATOR_BREAKER_OPEN_SECONDS', '30'))
+ORCHESTRATOR_BREAKER_HALF_OPEN_PROBES = int(os.getenv('ORCHESTRATOR_BREAKER_HALF_OPEN_PROBES', '1'))
+
 # CORS configuration
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Parsed customer baselines kept in memory per process (LRU size)
+BASELINE_CACHE_SIZE = int(os.getenv('BASELINE_CACHE_SIZE', '10000'))
+
+# Velocity signals: per-customer sliding windows made of time buckets
+VELOCITY_BUCKET_SECONDS = int(os.getenv('VELOCITY_BUCKET_SECONDS', '60'))
+VELOCITY_BUCKETS = int(os.getenv('VELOCITY_BUCKETS', '60'))  # ring size, bounds the longest window
+VELOCITY_MAX_CUSTOMERS = int(os.getenv('VELOCITY_MAX_CUSTOMERS', '50000'))
+VELOCITY_COUNT_WINDOW_MINUTES = int(os.getenv('VELOCITY_COUNT_WINDOW_MINUTES', '10'))
+VELOCITY_COUNT_THRESHOLD = int(os.getenv('VELOCITY_COUNT_THRESHOLD', '5'))
+VELOCITY_AMOUNT_WINDOW_MINUTES = int(os.getenv('VELOCITY_AMOUNT_WINDOW_MINUTES', '60'))
+VELOCITY_AMOUNT_FACTOR = float(os.getenv('VELOCITY_AMOUNT_FACTOR', '5'))  # x usual_amount_avg
+
+# Fast-path triage before the multi-agent orchestrator
+TRIAGE_ENABLED = os.getenv('TRIAGE_ENABLED', '1') == '1'
+TRIAGE_APPROVE_MAX_AMOUNT_RATIO = float(os.getenv('TRIAGE_APPROVE_MAX_AMOUNT_RATIO', '1.0'))  # x usual_amount_avg
+TRIAGE_APPROVE_CONFIDENCE = float(os.getenv('TRIAGE_APPROVE_CONFIDENCE', '0.95'))
+TRIAGE_BLOCK_MIN_SIGNALS = int(os.getenv('TRIAGE_BLOCK_MIN_SIGNALS', '0'))  # 0 disables fast-path BLOCK
+TRIAGE_BLOCK_CONFIDENCE = float(os.getenv('TRIAGE_BLOCK_CONFIDENCE', '0.85'))
+TRIAGE_ORCHESTRATOR_LATENCY_ESTIMATE = float(os.getenv('TRIAGE_ORCHESTRATOR_LATENCY_ESTIMATE', '30'))  # seconds
+
+# Repeated analyses: result cache (default cache backend) and Idempotency-Key retention
+DECISION_CACHE_SECONDS = int(os.getenv('DECISION_CACHE_SECONDS', '300'))
+DECISION_POLICY_STAMP_SECONDS = int(os.getenv('DECISION_POLICY_STAMP_SECONDS', '60'))  # max staleness of the cached policy versions
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', '24'))
+
+# Audit events: "buffered" batches them with bulk_create (core.audit), "sync" inserts each one at once
+AUDIT_WRITER_MODE = os.getenv('AUDIT_WRITER_MODE', 'buffered')
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '200'))  # flush when this many events are buffered
+AUDIT_FLUSH_SECONDS = float(os.getenv('AUDIT_FLUSH_SECONDS', '2'))  # or when the oldest is this old
+
+# Cold tier: decisions older than the retention window move to ARCHIVE_DIR (archive_decisions command)
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+ARCHIVE_RETENTION_DAYS = int(os.getenv('ARCHIVE_RETENTION_DAYS', '365'))
+
+# Rendered audit reports cached on disk, keyed by decision, content hash and format (core.report_cache)
+REPORT_CACHE_ENABLED = os.getenv('REPORT_CACHE_ENABLED', '1') == '1'
+REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', str(BASE_DIR / 'report_cache'))
+
+# Bulk report exports (ZIP of PDFs) rendered by the 'exports' queue workers (core.exports);
+# EXPORT_DIR also holds the single reports of the 'reports' queue (/api/reports/jobs/)
+EXPORT_DIR = os.getenv('EXPORT_DIR', str(BASE_DIR / 'exports'))
+EXPORT_PROCESSES = int(os.getenv('EXPORT_PROCESSES', '0'))  # render processes per job, 0 = one per CPU
+EXPORT_MAX_REPORTS = int(os.getenv('EXPORT_MAX_REPORTS', '20000'))
+EXPORT_PROGRESS_SECONDS = float(os.getenv('EXPORT_PROGRESS_SECONDS', '1'))  # progress writes / lease renewals
+
+# HITL work queue: priority score = amount weight * log10(1 + amount) + confidence weight * (1 - confidence);
+# waiting HITL_PRIORITY_AGE_SECONDS adds one point. Claimed cases are leased to one reviewer.
+HITL_PRIORITY_AMOUNT_WEIGHT = float(os.getenv('HITL_PRIORITY_AMOUNT_WEIGHT', '1'))
+HITL_PRIORITY_CONFIDENCE_WEIGHT = float(os.getenv('HITL_PRIORITY_CONFIDENCE_WEIGHT', '2'))
+HITL_PRIORITY_AGE_SECONDS = float(os.getenv('HITL_PRIORITY_AGE_SECONDS', '3600'))
+HITL_LEASE_SECONDS = int(os.getenv('HITL_LEASE_SECONDS', '900'))
+
+# DB-backed job queues (see core.jobs and the run_workers command)
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '600'))  # must exceed the orchestrator timeout
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv('JOB_RETRY_BACKOFF_SECONDS', '10'))
@@ -2,22 +2,35 @@ from django.contrib import admin
 from django.urls import path
 from core.views import (
     health, analyze_transaction, get_transaction_detail, 
-    list_hitl_cases, resolve_hitl_case, seed_batch, 
+    list_hitl_cases, claim_hitl_case, renew_hitl_case, release_hitl_case, resolve_hitl_case, seed_batch, 
     create_manual_transaction, get_audit_reports, download_report,
-    get_dashboard_stats, list_transactions
+    get_dashboard_stats, list_transactions, get_metrics,
+    get_analysis_job, create_report_export, get_report_export, download_report_export,
+    create_report_job, get_report_job, download_report_job
 )
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health/", health),
+    path("api/metrics/", get_metrics),
     path("api/dashboard/stats/", get_dashboard_stats),
     path("api/transactions/", list_transactions),
     path("api/transactions/analyze/", analyze_transaction),
     path("api/transactions/seed/", seed_batch),
     path("api/transactions/create/", create_manual_transaction),
     path("api/transactions/<str:transaction_id>/", get_transaction_detail),
+    path("api/jobs/<int:job_id>/", get_analysis_job),
     path("api/hitl/cases/", list_hitl_cases),
+    path("api/hitl/cases/claim/", claim_hitl_case),
+    path("api/hitl/cases/<int:case_id>/renew/", renew_hitl_case),
+    path("api/hitl/cases/<int:case_id>/release/", release_hitl_case),
     path("api/hitl/cases/<int:case_id>/resolve/", resolve_hitl_case),
     path("api/reports/", get_audit_reports),
+    path("api/reports/exports/", create_report_export),
+    path("api/reports/exports/<int:job_id>/", get_report_export),
+    path("api/reports/exports/<int:job_id>/download/", download_report_export),
+    path("api/reports/jobs/", create_report_job),
+    path("api/reports/jobs/<int:job_id>/", get_report_job),
+    path("api/reports/jobs/<int:job_id>/download/", download_report_job),
     path("api/reports/<str:transaction_id>/pdf/", download_report),
 ]
@@ -1,10 +1,27 @@
 from django.contrib import admin
-from core.models import CustomerProfile, Transaction, PolicyDocument, DecisionRecord, AuditEvent, HumanReviewCase
+from django.db import transaction
+from core import counters
+from core.models import (
+    CustomerProfile, CustomerCountry, CustomerDevice, Transaction, PolicyDocument,
+    DecisionRecord, ArchivedDecision, AuditEvent, HumanReviewCase, AnalysisJob, IdempotencyKey
+)
+
+class CustomerCountryInline(admin.TabularInline):
+    model = CustomerCountry
+    extra = 0
+
+class CustomerDeviceInline(admin.TabularInline):
+    model = CustomerDevice
+    extra = 0
 
 @admin.register(CustomerProfile)
 class CustomerProfileAdmin(admin.ModelAdmin):
     list_display = ('customer_id', 'usual_amount_avg', 'usual_countries')
     search_fields = ('customer_id',)
+    inlines = [CustomerCountryInline, CustomerDeviceInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_usual_links()
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -30,11 +47,34 @@ class AuditEventAdmin(admin.ModelAdmin):
 
 @admin.register(HumanReviewCase)
 class HumanReviewCaseAdmin(admin.ModelAdmin):
-    list_display = ('id', 'transaction', 'status', 'assigned_to', 'created_at')
+    list_display = ('id', 'transaction', 'status', 'assigned_to', 'lease_expires_at', 'created_at')
     list_filter = ('status',)
     search_fields = ('transaction__transaction_id',)
     actions = ['mark_as_resolved']
 
     def mark_as_resolved(self, request, queryset):
-        queryset.update(status='RESOLVED')
+        # queryset.update() skips the save signals, so adjust the counters here
+        # and take the count from the UPDATE itself: a separate count could go stale
+        with transaction.atomic():
+            opened = queryset.filter(status='OPEN').update(status='RESOLVED')
+            queryset.exclude(status='RESOLVED').update(status='RESOLVED')
+            counters.apply_delta(open_cases=-opened)
     mark_as_resolved.short_description = "Marcar seleccionados como Resueltos"
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'transaction', 'status', 'attempts', 'locked_by', 'available_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('transaction__transaction_id',)
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'endpoint', 'status_code', 'created_at')
+    list_filter = ('endpoint', 'status_code')
+    search_fields = ('key',)
+
+@admin.register(ArchivedDecision)
+class ArchivedDecisionAdmin(admin.ModelAdmin):
+    list_display = ('transaction', 'decision', 'created_at', 'path', 'archived_at')
+    list_filter = ('decision',)
+    search_fields = ('transaction__transaction_id',)
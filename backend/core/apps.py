@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Register model signal receivers
+        from core import signals  # noqa: F401
+
+        # Buffered audit events never outlive the request that recorded them
+        from django.core.signals import request_finished
+        from core.audit import flush_on_request_finished
+        request_finished.connect(flush_on_request_finished, dispatch_uid='core.audit.flush_on_request_finished')
+
+        from django.conf import settings
+        if settings.SQLITE_TUNING:
+            from django.db.backends.signals import connection_created
+            from core.sqlite import configure_connection
+            connection_created.connect(configure_connection, dispatch_uid='core.sqlite.configure_connection')
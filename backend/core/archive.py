@@ -0,0 +1,159 @@
+import gzip
+import json
+import os
+from pathlib import Path
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from core.counters import suspend_counter_updates
+from core.models import ArchivedDecision, AuditEvent, DecisionRecord
+
+# Cases still waiting for a human keep their decision in the primary DB
+ACTIVE_CASE_STATUSES = ('OPEN', 'IN_PROGRESS')
+DECISION_FIELDS = (
+    'id', 'decision', 'confidence', 'signals', 'citations_internal', 'citations_external',
+    'explanation_customer', 'explanation_audit', 'created_at',
+)
+AUDIT_FIELDS = ('id', 'event_type', 'description', 'metadata', 'timestamp')
+
+
+def archive_root():
+    return Path(settings.ARCHIVE_DIR)
+
+
+def partition_path(day):
+    """Relative path of the day partition holding the decisions created on `day`."""
+    return f"decisions/date={day.isoformat()}/decisions.jsonl.gz"
+
+
+def archivable(cutoff):
+    """Decisions created before `cutoff` whose transaction has no case awaiting review, oldest first."""
+    return (
+        DecisionRecord.objects.filter(created_at__lt=cutoff)
+        .exclude(transaction__review_cases__status__in=ACTIVE_CASE_STATUSES)
+        .select_related('transaction')
+        .order_by('created_at', 'id')
+    )
+
+
+def _document(record, events, earlier_trail=()):
+    return {
+        'transaction_id': record.transaction.transaction_id,
+        'decision': {field: getattr(record, field) for field in DECISION_FIELDS},
+        'audit_trail': [*earlier_trail, *({field: getattr(event, field) for field in AUDIT_FIELDS} for event in events)],
+    }
+
+
+def _append_member(relative_path, documents):
+    """
+    Appends the documents as one new gzip member of the partition file and
+    returns the byte offset where the member starts. Concatenated members
+    are still a valid gzip file, and a reader can seek straight to one.
+    """
+    path = archive_root() / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'ab') as raw:
+        offset = raw.tell()
+        with gzip.GzipFile(fileobj=raw, mode='wb') as member:
+            for document in documents:
+                member.write(json.dumps(document, cls=DjangoJSONEncoder).encode('utf-8') + b'\n')
+        raw.flush()
+        # The rows are deleted right after; the file must be on disk first.
+        os.fsync(raw.fileno())
+    return offset
+
+
+def archive_batch(records):
+    """
+    Moves `records` (DecisionRecords with their transaction loaded) and their
+    audit events to the cold tier and returns how many audit events went
+    with them.
+
+    Files are written before the primary DB changes; if the process dies in
+    between, the next run archives the same rows again into a new member and
+    the orphan member is never referenced. Archived decisions still count in
+    the dashboard (see counters.compute), so the deletes leave the counters
+    untouched. A transaction decided again after it was archived replaces
+    its index entry, and its new document carries the earlier audit trail
+    too. Run a single archiver at a time.
+    """
+    if not records:
+        return 0
+    transaction_ids = [r.transaction_id for r in records]
+    events_by_tx = {}
+    events = AuditEvent.objects.filter(transaction_id__in=transaction_ids).order_by('timestamp', 'id')
+    for event in events:
+        events_by_tx.setdefault(event.transaction_id, []).append(event)
+    previous = {entry.transaction_id: entry for entry in ArchivedDecision.objects.filter(transaction_id__in=transaction_ids)}
+    earlier_trails = {
+        r.transaction_id: _read_document(previous[r.transaction_id], r.transaction.transaction_id)['audit_trail']
+        for r in records if r.transaction_id in previous
+    }
+
+    partitions = {}
+    for record in records:
+        partitions.setdefault(partition_path(record.created_at.date()), []).append(record)
+
+    index = []
+    for relative_path, day_records in partitions.items():
+        offset = _append_member(relative_path, [
+            _document(r, events_by_tx.get(r.transaction_id, []), earlier_trails.get(r.transaction_id, ()))
+            for r in day_records
+        ])
+        index.extend(
+            ArchivedDecision(
+                id=getattr(previous.get(r.transaction_id), 'id', None),
+                transaction_id=r.transaction_id, decision=r.decision, confidence=r.confidence,
+                created_at=r.created_at, path=relative_path, offset=offset,
+                audit_events=len(earlier_trails.get(r.transaction_id, ())) + len(events_by_tx.get(r.transaction_id, [])),
+                archived_at=timezone.now(),
+            )
+            for r in day_records
+        )
+
+    event_ids = [event.id for tx_events in events_by_tx.values() for event in tx_events]
+    with db_transaction.atomic(), suspend_counter_updates():
+        ArchivedDecision.objects.bulk_create([entry for entry in index if entry.id is None])
+        ArchivedDecision.objects.bulk_update(
+            [entry for entry in index if entry.id is not None],
+            ['decision', 'confidence', 'created_at', 'path', 'offset', 'audit_events', 'archived_at'],
+        )
+        AuditEvent.objects.filter(id__in=event_ids).delete()
+        DecisionRecord.objects.filter(id__in=[r.id for r in records]).delete()
+    return len(event_ids)
+
+
+def _read_document(entry, transaction_id):
+    with open(archive_root() / entry.path, 'rb') as raw:
+        raw.seek(entry.offset)
+        # Reads from the record's member onwards; the match is inside the first one.
+        with gzip.GzipFile(fileobj=raw, mode='rb') as member:
+            for line in member:
+                document = json.loads(line)
+                if document['transaction_id'] == transaction_id:
+                    return document
+    raise LookupError(f"Archived decision of {transaction_id} not found in {entry.path}@{entry.offset}")
+
+
+def rehydrate(transaction):
+    """
+    The archived DecisionRecord of `transaction` rebuilt from the cold tier,
+    or None when it was never archived. The instance is read-only: it carries
+    `archived = True` and its audit trail as `archived_audit_trail` (unsaved
+    AuditEvents), and must not be saved back.
+    """
+    entry = ArchivedDecision.objects.filter(transaction=transaction).first()
+    if entry is None:
+        return None
+    document = _read_document(entry, transaction.transaction_id)
+    fields = dict(document['decision'])
+    fields['created_at'] = parse_datetime(fields['created_at'])
+    record = DecisionRecord(transaction=transaction, **fields)
+    record.archived = True
+    record.archived_audit_trail = [
+        AuditEvent(transaction=transaction, **dict(event, timestamp=parse_datetime(event['timestamp'])))
+        for event in document['audit_trail']
+    ]
+    return record
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import connections, transaction
+from core.metrics import metrics
+from core.models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """
+    Process-wide buffer of AuditEvent rows written with bulk_create.
+
+    In "buffered" mode (AUDIT_WRITER_MODE) an event joins the buffer once its
+    surrounding transaction commits, so a rolled-back decision never leaves an
+    orphan audit row. The buffer is flushed when it holds AUDIT_BATCH_SIZE
+    events, when its oldest event is AUDIT_FLUSH_SECONDS old (background
+    thread), at the end of every request and at interpreter exit. In "sync"
+    mode (tests, debugging) each event is inserted immediately, inside the
+    caller's transaction, as before.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._oldest = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._pid = None
+
+    @property
+    def buffered(self):
+        return settings.AUDIT_WRITER_MODE == "buffered"
+
+    def write(self, **fields):
+        """Records an AuditEvent; takes the same fields as AuditEvent.objects.create()."""
+        event = AuditEvent(**fields)
+        if not self.buffered:
+            event.save()
+            return
+        transaction.on_commit(lambda: self._enqueue(event))
+
+    def _enqueue(self, event):
+        with self._lock:
+            self._ensure_flusher()
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(event)
+            full = len(self._buffer) >= settings.AUDIT_BATCH_SIZE
+        if full:
+            self.flush()
+
+    def _ensure_flusher(self):
+        # A forked child (gunicorn worker, run_workers process) starts its own thread.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = settings.AUDIT_FLUSH_SECONDS
+        try:
+            while not self._stop.wait(min(interval, 1.0)):
+                oldest = self._oldest
+                if oldest is not None and time.monotonic() - oldest >= interval:
+                    self.flush()
+        finally:
+            # The thread owns its own DB connection
+            connections.close_all()
+
+    def flush(self):
+        """Writes every buffered event; returns how many were written."""
+        with self._lock:
+            events, self._buffer, self._oldest = self._buffer, [], None
+        if not events:
+            return 0
+        started = time.perf_counter()
+        try:
+            AuditEvent.objects.bulk_create(events)
+            written = len(events)
+        except Exception:
+            logger.exception(f"Bulk insert of {len(events)} audit events failed; retrying one by one")
+            written = self._write_one_by_one(events)
+        metrics.incr("audit.flushes")
+        metrics.incr("audit.events_written", written)
+        metrics.observe("audit.flush", time.perf_counter() - started)
+        return written
+
+    @staticmethod
+    def _write_one_by_one(events):
+        written = 0
+        for event in events:
+            try:
+                event.pk = None
+                event.save(force_insert=True)
+                written += 1
+            except Exception:
+                metrics.incr("audit.events_dropped")
+                logger.exception(f"Dropping audit event {event.event_type} of transaction {event.transaction_id}")
+        return written
+
+    def pending(self):
+        return len(self._buffer)
+
+    def close(self):
+        """Stops the flusher thread and writes whatever is still buffered."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self._thread = None
+        self.flush()
+
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.close)
+metrics.register_gauge("audit.pending_events", audit_writer.pending)
+
+
+def flush_on_request_finished(sender, **kwargs):
+    """request_finished receiver: nothing a request recorded outlives it in memory."""
+    audit_writer.flush()
@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+
+class CustomerBaseline:
+    """
+    Pre-parsed view of a CustomerProfile used by the signal rules.
+
+    usual_hours, usual_countries and usual_devices are parsed once into an
+    integer hour range and frozensets; None means the profile has no usable
+    value and the corresponding rule is skipped.
+    """
+    __slots__ = ('customer_id', 'updated_at', 'amount_limit', 'hour_range', 'countries', 'devices')
+
+    # A transaction above this multiple of the usual average is out of range.
+    AMOUNT_FACTOR = 2
+
+    def __init__(self, customer_id, updated_at, amount_limit, hour_range, countries, devices):
+        self.customer_id = customer_id
+        self.updated_at = updated_at
+        self.amount_limit = amount_limit
+        self.hour_range = hour_range
+        self.countries = countries
+        self.devices = devices
+
+    @classmethod
+    def from_profile(cls, profile):
+        hour_range = None
+        if profile.usual_hours:
+            try:
+                start_h, end_h = map(int, profile.usual_hours.split('-'))
+                hour_range = (start_h, end_h)
+            except ValueError:
+                pass
+
+        countries = frozenset(c.strip() for c in profile.usual_countries.split(',')) if profile.usual_countries else None
+        devices = frozenset(d.strip() for d in profile.usual_devices.split(',')) if profile.usual_devices else None
+
+        return cls(
+            customer_id=profile.customer_id,
+            updated_at=profile.updated_at,
+            amount_limit=float(profile.usual_amount_avg) * cls.AMOUNT_FACTOR,
+            hour_range=hour_range,
+            countries=countries,
+            devices=devices,
+        )
+
+    def signals(self, amount, hour, country, device_id):
+        signals = []
+        if float(amount) > self.amount_limit:
+            signals.append("Monto fuera de rango")
+        if self.hour_range is not None and not (self.hour_range[0] <= hour <= self.hour_range[1]):
+            signals.append("Horario no habitual")
+        if self.countries is not None and country not in self.countries:
+            signals.append("País inusual")
+        if self.devices is not None and device_id not in self.devices:
+            signals.append("Dispositivo desconocido")
+        return signals
+
+
+class BaselineCache:
+    """
+    Bounded, thread-safe LRU of CustomerBaseline objects keyed by customer_id.
+
+    Entries are dropped by the CustomerProfile post_save/post_delete receivers
+    in this process. Other processes detect a saved profile through its
+    updated_at, which is compared against the cached baseline on every lookup.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, profile):
+        # Unsaved profiles have no stable identity to cache under.
+        if profile.pk is None:
+            return CustomerBaseline.from_profile(profile)
+
+        key = profile.customer_id
+        with self._lock:
+            baseline = self._entries.get(key)
+            if baseline is not None and baseline.updated_at == profile.updated_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return baseline
+
+        baseline = CustomerBaseline.from_profile(profile)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = baseline
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return baseline
+
+    def invalidate(self, customer_id):
+        with self._lock:
+            self._entries.pop(customer_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+baseline_cache = BaselineCache(maxsize=settings.BASELINE_CACHE_SIZE)
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker over the last `window` calls.
+
+    The circuit opens when, with at least `min_calls` recorded, the share of
+    failed calls reaches `failure_rate` or the share of calls slower than
+    `slow_call_seconds` reaches `slow_rate`. After `open_seconds` it lets
+    `half_open_probes` calls through: if they all succeed quickly the circuit
+    closes, otherwise it opens again. State is process-local, like the
+    metrics registry.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, name, window, min_calls, failure_rate, slow_call_seconds, slow_rate,
+                 open_seconds, half_open_probes, on_transition=None):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.on_transition = on_transition
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (failed, slow)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _set_state(self, state):
+        if state == self._state:
+            return
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if state != self.CLOSED:
+            self._probes_in_flight = self._probe_successes = 0
+        if state == self.CLOSED:
+            self._calls.clear()
+        if self.on_transition:
+            self.on_transition(self, state)
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._set_state(self.HALF_OPEN)
+
+    def allow_request(self):
+        """True if the call may go ahead. In half-open state this reserves a probe slot."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            return False
+
+    def record(self, elapsed, failed=False):
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed or slow:
+                    self._set_state(self.OPEN)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._set_state(self.CLOSED)
+                return
+            if self._state == self.OPEN:
+                # A call started before the circuit opened; its outcome is stale.
+                return
+            self._calls.append((failed, slow))
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._calls if f)
+            slow_calls = sum(1 for _, s in self._calls if s)
+            if failures / len(self._calls) >= self.failure_rate or slow_calls / len(self._calls) >= self.slow_rate:
+                self._set_state(self.OPEN)
+
+    def release(self):
+        """Gives back a half-open probe slot whose outcome says nothing about the dependency."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def reset(self):
+        with self._lock:
+            self._set_state(self.CLOSED)
+            self._calls.clear()
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connections
+from django.db.models import Count, F, Q, Sum
+from core.models import ArchivedDecision, DashboardCounters, DecisionRecord, HumanReviewCase
+
+# DecisionRecord.decision -> DashboardCounters field
+DECISION_FIELDS = {
+    'APPROVE': 'approved',
+    'CHALLENGE': 'challenged',
+    'BLOCK': 'blocked',
+    'ESCALATE_TO_HUMAN': 'escalated',
+}
+COUNTER_FIELDS = ('total_decisions', *DECISION_FIELDS.values(), 'confidence_sum', 'open_cases')
+
+_suspended = ContextVar('dashboard_counters_suspended', default=False)
+
+
+@contextmanager
+def suspend_counter_updates():
+    """
+    Skips the per-row counter updates inside the block, for bulk maintenance
+    that adjusts (or rebuilds) the counters itself afterwards.
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def counters_suspended():
+    return _suspended.get()
+
+
+def decision_delta(previous, current):
+    """Counter deltas for a DecisionRecord going from `previous` to `current` (decision, confidence) pairs; None means absent."""
+    delta = {}
+    for sign, state in ((-1, previous), (1, current)):
+        if state is None:
+            continue
+        decision, confidence = state
+        delta['total_decisions'] = delta.get('total_decisions', 0) + sign
+        field = DECISION_FIELDS.get(decision)
+        if field:
+            delta[field] = delta.get(field, 0) + sign
+        delta['confidence_sum'] = delta.get('confidence_sum', 0.0) + sign * (confidence or 0.0)
+    return delta
+
+
+def case_delta(previous_status, current_status):
+    return {'open_cases': int(current_status == 'OPEN') - int(previous_status == 'OPEN')}
+
+
+def apply_delta(using='default', **delta):
+    """Adds the deltas to the counters row with a single UPDATE; call it inside the writer's transaction."""
+    changes = {field: F(field) + value for field, value in delta.items() if value}
+    if not changes:
+        return
+    if not DashboardCounters.objects.using(using).filter(pk=DashboardCounters.SINGLETON_ID).update(**changes):
+        # No row yet: build it from the tables, which already include this write.
+        rebuild(using)
+
+
+def compute(using='default'):
+    """
+    Counter values computed from scratch. Archived decisions (core.archive)
+    still count, unless the transaction was decided again since: the live
+    DecisionRecord replaces its archived one.
+    """
+    decisions = {}
+    archived = ArchivedDecision.objects.filter(transaction__decision__isnull=True)
+    for queryset in (DecisionRecord.objects.all(), archived):
+        totals = queryset.using(using).aggregate(
+            total_decisions=Count('id'),
+            confidence_sum=Sum('confidence'),
+            **{field: Count('id', filter=Q(decision=decision)) for decision, field in DECISION_FIELDS.items()},
+        )
+        for field, value in totals.items():
+            decisions[field] = decisions.get(field, 0) + (value or 0)
+    decisions['confidence_sum'] = float(decisions['confidence_sum'])
+    decisions['open_cases'] = HumanReviewCase.objects.using(using).filter(status='OPEN').count()
+    return decisions
+
+
+def rebuild(using='default'):
+    values = compute(using)
+    DashboardCounters.objects.using(using).update_or_create(pk=DashboardCounters.SINGLETON_ID, defaults=values)
+    return values
+
+
+def load(using='default'):
+    """The counters row, built on first use."""
+    counters = DashboardCounters.objects.using(using).filter(pk=DashboardCounters.SINGLETON_ID).first()
+    if counters is None:
+        rebuild(using)
+        counters = DashboardCounters.objects.using(using).get(pk=DashboardCounters.SINGLETON_ID)
+    return counters
+
+
+def lock(using='default'):
+    """
+    Locks the counters row until the current transaction ends. Every writer
+    updates that row in its own transaction (apply_delta), so they wait here
+    instead of changing the tables between a read of them and a rebuild.
+    """
+    load(using)
+    counters = DashboardCounters.objects.using(using).filter(pk=DashboardCounters.SINGLETON_ID)
+    if connections[using].features.has_select_for_update:
+        counters.select_for_update().get()
+    else:
+        # SQLite has no row locks: a no-op write takes the database write lock, like BEGIN IMMEDIATE
+        counters.update(open_cases=F('open_cases'))
+
+
+def drift(using='default', tolerance=1e-6):
+    """{field: (stored, actual)} for every counter that disagrees with the tables."""
+    stored = load(using)
+    actual = compute(using)
+    result = {}
+    for field in COUNTER_FIELDS:
+        stored_value, actual_value = getattr(stored, field), actual[field]
+        if abs(stored_value - actual_value) > tolerance * max(1.0, abs(actual_value)):
+            result[field] = (stored_value, actual_value)
+    return result
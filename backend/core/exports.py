@@ -0,0 +1,170 @@
+import logging
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from core.models import DecisionRecord, ReportExportJob
+from core.pagination import filter_decisions
+from core.report_cache import report_cache
+from core.report_service import ExcelReportService, PDFReportService, ReportFactory
+
+logger = logging.getLogger(__name__)
+
+# Filter keys an export accepts, same meaning as on /api/reports/
+EXPORT_FILTERS = ('decision', 'customer_id', 'date_from', 'date_to')
+# ReportExportJob.format -> (file extension, content type): PDFs are zipped, Excel is one workbook
+EXPORT_FORMATS = {
+    'pdf': ('zip', 'application/zip'),
+    'excel': ReportFactory.FORMATS['excel'],
+}
+# One "/Type /Page" object per page ("/Type /Pages" is the page tree)
+PAGE_MARKER = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+_pdf_service = PDFReportService()
+
+
+class ExportLeaseLost(Exception):
+    """Another worker took over the job (our lease expired); stop rendering."""
+
+
+def export_queryset(filters):
+    return filter_decisions(DecisionRecord.objects.all(), filters).order_by('created_at', 'id')
+
+
+def workbook_queryset(filters):
+    """Decisions of an Excel export, newest first, with what each workbook row needs."""
+    return filter_decisions(DecisionRecord.objects.select_related('transaction__customer'), filters).order_by(
+        '-created_at', '-id'
+    )
+
+
+def export_path(job):
+    extension, _ = EXPORT_FORMATS[job.format]
+    return Path(settings.EXPORT_DIR) / f"audit-reports-{job.id}.{extension}"
+
+
+def _init_renderer():
+    # No-op after fork; sets Django up when the pool uses spawn/forkserver.
+    django.setup()
+
+
+def render_pdf(decision_id):
+    """Pool task: (file name, PDF bytes, page count) of one decision, through the report cache."""
+    record = DecisionRecord.objects.select_related('transaction__customer').get(id=decision_id)
+    digest = report_cache.content_hash(record, 'pdf')
+    with report_cache.get_or_render(record, 'pdf', digest, _pdf_service.generate) as stream:
+        data = stream.read()
+    return f"Reporte_Fraude_{record.transaction.transaction_id}.pdf", data, len(PAGE_MARKER.findall(data))
+
+
+class ExportProgress:
+    def __init__(self, job):
+        self.job = job
+        self.rendered = self.failed = self.pages = 0
+        self.started = time.perf_counter()
+        self.last_saved = 0.0
+
+    def save(self, force=False, **fields):
+        """Persists the counters (at most every EXPORT_PROGRESS_SECONDS) and renews the lease."""
+        now = time.perf_counter()
+        if not force and now - self.last_saved < settings.EXPORT_PROGRESS_SECONDS:
+            return
+        self.last_saved = now
+        elapsed = now - self.started
+        stamp = timezone.now()
+        updated = ReportExportJob.objects.filter(id=self.job.id, locked_by=self.job.locked_by, status='RUNNING').update(
+            rendered=self.rendered, failed=self.failed, pages=self.pages,
+            pages_per_second=round(self.pages / elapsed, 2) if elapsed else None,
+            lease_expires_at=stamp + timedelta(seconds=settings.JOB_LEASE_SECONDS), updated_at=stamp, **fields,
+        )
+        if not updated:
+            raise ExportLeaseLost(f"ReportExportJob {self.job.id} is no longer leased by {self.job.locked_by}")
+
+
+def handle_export_job(job):
+    """
+    Renders every report matching job.filters on a process pool and writes
+    them into a ZIP one entry at a time, so only the PDFs in flight (a few
+    per process) are ever in memory. The archive is built under a temporary
+    name and renamed once complete. Excel exports go to write_workbook.
+    """
+    if job.format == 'excel':
+        return write_workbook(job)
+    ids = list(export_queryset(job.filters).values_list('id', flat=True)[:settings.EXPORT_MAX_REPORTS + 1])
+    if len(ids) > settings.EXPORT_MAX_REPORTS:
+        raise ValueError(f"Export matches more than {settings.EXPORT_MAX_REPORTS} reports; narrow the filters")
+    progress = ExportProgress(job)
+    progress.save(force=True, total=len(ids))
+
+    path = export_path(job)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.zip.part')
+    errors = []
+    processes = settings.EXPORT_PROCESSES or os.cpu_count() or 1
+    window = processes * 2
+    remaining = iter(ids)
+    # Forked renderers must not inherit this process's DB connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_renderer) as pool, \
+            zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        in_flight = {pool.submit(render_pdf, decision_id): decision_id for decision_id in islice(remaining, window)}
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                decision_id = in_flight.pop(future)
+                try:
+                    name, data, pages = future.result()
+                except Exception as e:
+                    progress.failed += 1
+                    errors.append(f"DecisionRecord {decision_id}: {e}")
+                    logger.warning(f"Export {job.id}: report of DecisionRecord {decision_id} failed: {e}")
+                    continue
+                archive.writestr(name, data)
+                progress.rendered += 1
+                progress.pages += pages
+            for decision_id in islice(remaining, window - len(in_flight)):
+                in_flight[pool.submit(render_pdf, decision_id)] = decision_id
+            progress.save()
+        if errors:
+            archive.writestr("ERRORS.txt", "\n".join(errors) + "\n")
+
+    os.replace(tmp, path)
+    progress.save(force=True, file_path=str(path), file_size=path.stat().st_size)
+    logger.info(
+        f"Export {job.id}: {progress.rendered} reports, {progress.pages} pages in "
+        f"{time.perf_counter() - progress.started:.1f}s with {processes} processes"
+    )
+
+
+def write_workbook(job):
+    """
+    Streams every decision matching job.filters into one Excel workbook
+    (ExcelReportService keeps memory flat), renewing the lease as rows are
+    written. Built under a temporary name and renamed once complete.
+    """
+    queryset = workbook_queryset(job.filters)
+    progress = ExportProgress(job)
+    progress.save(force=True, total=queryset.count())
+
+    path = export_path(job)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.xlsx.part')
+
+    def records():
+        for record in queryset.iterator(chunk_size=2000):
+            yield record
+            progress.rendered += 1
+            progress.save()
+
+    ExcelReportService().write(records(), tmp)
+    os.replace(tmp, path)
+    progress.save(force=True, file_path=str(path), file_size=path.stat().st_size)
+    logger.info(f"Export {job.id}: {progress.rendered} decisions in {time.perf_counter() - progress.started:.1f}s")
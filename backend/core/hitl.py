@@ -0,0 +1,101 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from core import counters
+from core.models import DecisionRecord, HumanReviewCase
+
+
+class CaseLeaseError(Exception):
+    """The case is leased to another reviewer, or is no longer open."""
+
+
+# Candidates fetched per claim attempt, as in core.jobs.JobQueue
+CLAIM_BATCH = 10
+
+
+def _claimable(now):
+    # A claimed case stays OPEN (the dashboard counts it as pending) until it is resolved
+    return Q(status='OPEN') & (Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now))
+
+
+def _lease(lease_seconds):
+    return timedelta(seconds=lease_seconds or settings.HITL_LEASE_SECONDS)
+
+
+def claim_next_case(reviewer, lease_seconds=None):
+    """
+    Leases the highest-priority unclaimed case to `reviewer` and returns it,
+    or None when the queue is empty.
+
+    Same compare-and-swap claim as JobQueue.claim: the UPDATE only matches
+    while the case is still claimable, so concurrent reviewers never get the
+    same case and no row lock is held between the read and the write.
+    """
+    now = timezone.now()
+    candidates = list(
+        HumanReviewCase.objects.filter(_claimable(now))
+        .order_by('priority_key', 'id')
+        .values_list('id', flat=True)[:CLAIM_BATCH]
+    )
+    for case_id in candidates:
+        taken = HumanReviewCase.objects.filter(_claimable(now), id=case_id).update(
+            assigned_to=reviewer, lease_expires_at=now + _lease(lease_seconds),
+        )
+        if taken:
+            return HumanReviewCase.objects.with_transaction_details().get(id=case_id)
+    return None
+
+
+def renew_lease(case_id, reviewer, lease_seconds=None):
+    """Extends the lease `reviewer` holds on the case; raises CaseLeaseError if it was lost."""
+    now = timezone.now()
+    expires = now + _lease(lease_seconds)
+    updated = HumanReviewCase.objects.filter(
+        id=case_id, status='OPEN', assigned_to=reviewer, lease_expires_at__gte=now,
+    ).update(lease_expires_at=expires)
+    if not updated:
+        raise CaseLeaseError(f"Case {case_id} is not leased by {reviewer}")
+    return expires
+
+
+def release_case(case_id, reviewer):
+    """Returns the case to the queue before its lease expires."""
+    updated = HumanReviewCase.objects.filter(id=case_id, status='OPEN', assigned_to=reviewer).update(
+        assigned_to=None, lease_expires_at=None,
+    )
+    if not updated:
+        raise CaseLeaseError(f"Case {case_id} is not leased by {reviewer}")
+
+
+def resolve_case(case_id, reviewer, decision, notes=''):
+    """
+    Resolves the case with `decision` and applies it to the transaction's
+    DecisionRecord. Raises HumanReviewCase.DoesNotExist for an unknown case
+    and CaseLeaseError when it is no longer open or another reviewer holds
+    an active lease on it.
+
+    The status and lease checks live in the UPDATE's WHERE clause, as in
+    claim_next_case, so two concurrent resolutions cannot both succeed.
+    """
+    now = timezone.now()
+    resolvable = _claimable(now)
+    if reviewer:
+        resolvable = Q(status='OPEN') & (resolvable | Q(assigned_to=reviewer))
+    changes = dict(status='RESOLVED', lease_expires_at=None, human_decision=decision, notes=notes, resolved_at=now)
+    if reviewer:
+        changes['assigned_to'] = reviewer
+    with transaction.atomic():
+        if not HumanReviewCase.objects.filter(resolvable, id=case_id).update(**changes):
+            case = HumanReviewCase.objects.get(id=case_id)
+            if case.status != 'OPEN':
+                raise CaseLeaseError(f"Case {case_id} is already {case.status}")
+            raise CaseLeaseError(f"Case {case_id} is leased by {case.assigned_to}")
+        # update() skips the save signals, so adjust the counters here
+        counters.apply_delta(**counters.case_delta('OPEN', 'RESOLVED'))
+        decision_record = DecisionRecord.objects.get(transaction__review_cases__id=case_id)
+        decision_record.decision = decision
+        decision_record.explanation_audit += f"\n[HITL] Decisión humana: {decision}. Notas: {notes}"
+        decision_record.save()
+    return decision_record
@@ -0,0 +1,72 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.response import Response
+from core.metrics import metrics
+from core.models import IdempotencyKey
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    raw = f"{request.method}|{request.get_full_path()}|{body}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def idempotent(view):
+    """
+    Honors the Idempotency-Key header on a DRF function view.
+
+    The first request with a key runs the view and stores its response; a retry
+    with the same key and body gets that response back (Idempotent-Replayed
+    header), a retry while the first one is still running gets 409, and the
+    same key with a different body gets 422. 5xx responses are not stored, so
+    the client can retry them. Keys expire after IDEMPOTENCY_KEY_TTL_HOURS.
+    Must be applied below @api_view.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": "Idempotency-Key must be at most 255 characters"}, status=400)
+
+        fingerprint = _fingerprint(request)
+        record, created = IdempotencyKey.objects.get_or_create(
+            key=key, endpoint=request.path, defaults={"request_fingerprint": fingerprint}
+        )
+        if not created and record.created_at < timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS):
+            # Expired: take it over only if nobody else did in the meantime
+            created = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+                request_fingerprint=fingerprint, status_code=None, response_body=None, created_at=timezone.now()
+            ) == 1
+            record.refresh_from_db()
+
+        if not created:
+            if record.request_fingerprint != fingerprint:
+                return Response({"error": "Idempotency-Key was already used with a different request"}, status=422)
+            if record.status_code is None:
+                return Response(
+                    {"error": "A request with this Idempotency-Key is still being processed"},
+                    status=409, headers={"Retry-After": "1"},
+                )
+            metrics.incr("idempotency.replayed")
+            return Response(record.response_body, status=record.status_code, headers={"Idempotent-Replayed": "true"})
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            record.status_code = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=["status_code", "response_body"])
+        return response
+
+    return wrapper
@@ -0,0 +1,156 @@
+import logging
+import os
+import random
+import shutil
+import socket
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from core import archive
+from core.exports import handle_export_job
+from core.models import AnalysisJob, ReportExportJob, ReportJob, Transaction
+from core.report_cache import report_cache
+from core.report_service import ReportFactory
+from core.services import DecisionService
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job fails at once."""
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """
+    Lease-based queue over a LeasedJob model.
+
+    claim() uses a compare-and-swap UPDATE (the row is only taken if it is
+    still claimable), so any number of worker processes can poll the same
+    table without double-processing a job on SQLite or PostgreSQL.
+    """
+
+    # Candidates fetched per claim attempt; losing every CAS race just means
+    # another worker got them and we poll again.
+    CLAIM_BATCH = 10
+
+    def __init__(self, model, handler):
+        self.model = model
+        self.handler = handler
+
+    def enqueue(self, **fields):
+        fields.setdefault('max_attempts', settings.JOB_MAX_ATTEMPTS)
+        return self.model.objects.create(**fields)
+
+    @staticmethod
+    def _claimable(now):
+        return (
+            Q(status='PENDING', available_at__lte=now)
+            | Q(status='RUNNING', lease_expires_at__lt=now, attempts__lt=F('max_attempts'))
+        )
+
+    def claim(self, worker_id, lease_seconds=None):
+        now = timezone.now()
+        lease = timedelta(seconds=lease_seconds or settings.JOB_LEASE_SECONDS)
+        candidates = list(
+            self.model.objects.filter(self._claimable(now))
+            .order_by('available_at', 'id')
+            .values_list('id', flat=True)[:self.CLAIM_BATCH]
+        )
+        for job_id in candidates:
+            taken = self.model.objects.filter(self._claimable(now), id=job_id).update(
+                status='RUNNING',
+                locked_by=worker_id,
+                lease_expires_at=now + lease,
+                attempts=F('attempts') + 1,
+                updated_at=now,
+            )
+            if taken:
+                return self.model.objects.get(id=job_id)
+        return None
+
+    def complete(self, job):
+        now = timezone.now()
+        return self.model.objects.filter(id=job.id, locked_by=job.locked_by, status='RUNNING').update(
+            status='DONE', lease_expires_at=None, finished_at=now, updated_at=now, last_error='',
+        )
+
+    def fail(self, job, error):
+        now = timezone.now()
+        if job.attempts >= job.max_attempts or isinstance(error, PermanentJobError):
+            changes = {'status': 'FAILED', 'finished_at': now}
+        else:
+            # Exponential backoff with full jitter
+            delay = random.uniform(0, settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+            changes = {'status': 'PENDING', 'available_at': now + timedelta(seconds=delay)}
+        return self.model.objects.filter(id=job.id, locked_by=job.locked_by, status='RUNNING').update(
+            lease_expires_at=None, locked_by=None, last_error=str(error)[:2000], updated_at=now, **changes,
+        )
+
+    def reap_expired(self):
+        """Fails RUNNING jobs whose lease expired after their last allowed attempt."""
+        now = timezone.now()
+        return self.model.objects.filter(
+            status='RUNNING', lease_expires_at__lt=now, attempts__gte=F('max_attempts')
+        ).update(status='FAILED', finished_at=now, updated_at=now, last_error='Lease expired on last attempt')
+
+    def run_one(self, worker_id):
+        """Claims and processes one job. Returns False when the queue had nothing to do."""
+        job = self.claim(worker_id)
+        if job is None:
+            return False
+        try:
+            self.handler(job)
+        except Exception as e:
+            logger.exception(f"[{worker_id}] {self.model.__name__} {job.id} failed (attempt {job.attempts})")
+            self.fail(job, e)
+        else:
+            if not self.complete(job):
+                logger.warning(f"[{worker_id}] Lost the lease on {self.model.__name__} {job.id} before completing it")
+        return True
+
+
+def handle_analysis_job(job):
+    DecisionService.decide(job.transaction)
+
+
+def handle_report_job(job):
+    """
+    Renders the report through the report cache and copies it to EXPORT_DIR,
+    where it stays downloadable even if the cache entry is later invalidated.
+    """
+    transaction = Transaction.objects.select_related('customer').get(pk=job.transaction_id)
+    record = getattr(transaction, 'decision', None) or archive.rehydrate(transaction)
+    if record is None:
+        raise PermanentJobError(f"No decision found for transaction {transaction.transaction_id}")
+    extension, _ = ReportFactory.file_info(job.format)
+    digest = report_cache.content_hash(record, extension)
+    try:
+        stream = report_cache.get_or_render(record, extension, digest, ReportFactory.get_service(job.format).generate)
+    except NotImplementedError as e:
+        raise PermanentJobError(str(e)) from e
+
+    path = Path(settings.EXPORT_DIR) / f"report-{job.id}.{extension}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.part')
+    with stream, open(tmp, 'wb') as out:
+        shutil.copyfileobj(stream, out)
+    os.replace(tmp, path)
+    ReportJob.objects.filter(id=job.id).update(file_path=str(path), file_size=path.stat().st_size, etag=digest)
+
+
+analysis_queue = JobQueue(AnalysisJob, handle_analysis_job)
+export_queue = JobQueue(ReportExportJob, handle_export_job)
+report_queue = JobQueue(ReportJob, handle_report_job)
+
+# Queues served by the run_workers management command
+QUEUES = {
+    'analysis': analysis_queue,
+    'exports': export_queue,
+    'reports': report_queue,
+}
@@ -1,26 +1,207 @@
-from django.core.management.base import BaseCommand
-from core.models import Transaction, DecisionRecord
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from core.models import ArchivedDecision, Transaction, DecisionRecord
 from core.services import DecisionService
 
+
+def _analyze_one(pk):
+    """Runs the decision flow for one transaction. Executed inside the thread/process pool."""
+    started = time.perf_counter()
+    try:
+        tx = Transaction.objects.select_related('customer').get(pk=pk)
+        record = DecisionService.apply_decision(tx)
+        return {
+            'pk': pk,
+            'transaction_id': tx.transaction_id,
+            'decision': record.decision,
+            'confidence': record.confidence,
+            'signals': record.signals,
+            'latency': time.perf_counter() - started,
+        }
+    except Exception as e:
+        return {'pk': pk, 'error': str(e), 'latency': time.perf_counter() - started}
+
+
+def _analyze_batch(pks, batch_size):
+    """
+    Sends the chunk through the orchestrator's batch endpoint; results arrive
+    in completion order. Each latency is the wait since the previous result,
+    so the per-transaction percentiles are not inflated by position in the batch.
+    """
+    transactions = Transaction.objects.select_related('customer').filter(pk__in=pks).order_by('pk')
+    waiting_since = time.perf_counter()
+    for tx, record in DecisionService.apply_decision_batch(transactions, batch_size=batch_size):
+        yield {
+            'pk': tx.pk,
+            'transaction_id': tx.transaction_id,
+            'decision': record.decision,
+            'confidence': record.confidence,
+            'signals': record.signals,
+            'latency': time.perf_counter() - waiting_since,
+        }
+        waiting_since = time.perf_counter()
+
+
+def _init_process_worker():
+    # Each process opens its own database connection on first use.
+    import django
+    django.setup()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
 class Command(BaseCommand):
     help = 'Analyzes all transactions and generates decisions based on signals'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of concurrent analyses')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Executor used when --workers > 1')
+        parser.add_argument('--orchestrator-batch', type=int, default=0,
+                            help='Send up to N transactions per call to the orchestrator batch endpoint (single worker only)')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Transactions read per chunk; the checkpoint advances after each chunk')
+        parser.add_argument('--reanalyze', action='store_true',
+                            help='Also analyze transactions that already have a decision, live or archived')
+        parser.add_argument('--checkpoint', help='JSON file used to resume an interrupted run')
+        parser.add_argument('--reset-checkpoint', action='store_true', help='Ignore and overwrite an existing checkpoint')
+
     def handle(self, *args, **options):
-        transactions = Transaction.objects.all()
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1')
+        if options['orchestrator_batch'] and options['workers'] > 1:
+            raise CommandError('--orchestrator-batch already runs items concurrently on the agents side; use it with --workers 1')
+
+        transactions = Transaction.objects.order_by('pk')
         if not transactions.exists():
             self.stdout.write(self.style.WARNING('No transactions found in the database. Please run seed_data first.'))
             return
 
-        self.stdout.write(f'Analyzing {transactions.count()} transactions...')
+        if not options['reanalyze']:
+            transactions = transactions.exclude(pk__in=DecisionRecord.objects.values('transaction_id')).exclude(
+                pk__in=ArchivedDecision.objects.values('transaction_id')
+            )
 
-        for tx in transactions:
-            record = DecisionService.apply_decision(tx)
+        # The checkpoint stores the last fully handled pk plus the pks that
+        # failed before it, so a resumed run retries those as well.
+        checkpoint_path = options['checkpoint']
+        last_pk, failed_pks = 0, set()
+        if checkpoint_path and os.path.exists(checkpoint_path) and not options['reset_checkpoint']:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            last_pk, failed_pks = checkpoint.get('last_pk', 0), set(checkpoint.get('failed_pks', []))
             self.stdout.write(
-                self.style.SUCCESS(
-                    f'Analyzed Tx: {tx.transaction_id} | Decision: {record.decision} | Confidence: {record.confidence:.2f}'
-                )
+                f'Resuming after transaction pk {last_pk}, retrying {len(failed_pks)} failed (checkpoint {checkpoint_path})'
             )
-            if record.signals:
-                self.stdout.write(f'  Signals: {", ".join(record.signals)}')
-            
+        transactions = transactions.filter(Q(pk__gt=last_pk) | Q(pk__in=failed_pks))
+
+        total = transactions.count()
+        self.stdout.write(f'Analyzing {total} transactions with {options["workers"]} {options["pool"]} worker(s)...')
+
+        executor = None
+        if options['workers'] > 1:
+            if options['pool'] == 'process':
+                # Forked processes must not inherit the parent's connection.
+                connections.close_all()
+                executor = ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_process_worker)
+            else:
+                executor = ThreadPoolExecutor(max_workers=options['workers'])
+
+        latencies, decisions, failures = [], Counter(), 0
+        started = time.perf_counter()
+        try:
+            for chunk in self._chunks(transactions, options['chunk_size']):
+                if options['orchestrator_batch']:
+                    results = self._batch_results(chunk, options['orchestrator_batch'])
+                else:
+                    results = executor.map(_analyze_one, chunk) if executor else map(_analyze_one, chunk)
+                for result in results:
+                    latencies.append(result['latency'])
+                    if 'error' in result:
+                        failures += 1
+                        failed_pks.add(result['pk'])
+                        self.stderr.write(self.style.ERROR(f'Failed Tx pk={result["pk"]}: {result["error"]}'))
+                        continue
+                    failed_pks.discard(result['pk'])
+                    decisions[result['decision']] += 1
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'Analyzed Tx: {result["transaction_id"]} | Decision: {result["decision"]} | Confidence: {result["confidence"]:.2f}'
+                        )
+                    )
+                    if result['signals']:
+                        self.stdout.write(f'  Signals: {", ".join(result["signals"])}')
+
+                # Every transaction up to the end of this chunk has been handled.
+                if checkpoint_path:
+                    last_pk = max(last_pk, chunk[-1])
+                    self._write_checkpoint(checkpoint_path, last_pk, failed_pks)
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        self._print_summary(latencies, decisions, failures, elapsed)
         self.stdout.write(self.style.SUCCESS('Analysis complete.'))
+
+    @staticmethod
+    def _chunks(queryset, size):
+        """
+        Yields lists of pks, one keyset query per chunk. Unlike a long-lived
+        .iterator() cursor, no read statement stays open while the pool
+        writes decisions, which would block writers on SQLite.
+        """
+        cursor = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=cursor).values_list('pk', flat=True)[:size])
+            if not chunk:
+                return
+            yield chunk
+            cursor = chunk[-1]
+
+    @staticmethod
+    def _batch_results(chunk, batch_size):
+        done = set()
+        try:
+            for result in _analyze_batch(chunk, batch_size):
+                done.add(result['pk'])
+                yield result
+        except Exception as e:
+            # Whatever was not decided yet is recorded as failed and retried on resume
+            for pk in chunk:
+                if pk not in done:
+                    yield {'pk': pk, 'error': str(e), 'latency': 0.0}
+
+    @staticmethod
+    def _write_checkpoint(path, last_pk, failed_pks):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_pk': last_pk, 'failed_pks': sorted(failed_pks)}, f)
+        os.replace(tmp_path, path)
+
+    def _print_summary(self, latencies, decisions, failures, elapsed):
+        processed = len(latencies)
+        ordered = sorted(latencies)
+        throughput = processed / elapsed if elapsed else 0.0
+        self.stdout.write('')
+        self.stdout.write(f'Processed: {processed} ({failures} failed) in {elapsed:.2f}s -> {throughput:.2f} tx/s')
+        self.stdout.write(
+            'Latency: '
+            f'p50={_percentile(ordered, 50):.3f}s '
+            f'p95={_percentile(ordered, 95):.3f}s '
+            f'p99={_percentile(ordered, 99):.3f}s '
+            f'max={ordered[-1] if ordered else 0.0:.3f}s'
+        )
+        if decisions:
+            self.stdout.write('Decisions: ' + ', '.join(f'{k}={v}' for k, v in sorted(decisions.items())))
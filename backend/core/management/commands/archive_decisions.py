@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core import archive
+
+
+class Command(BaseCommand):
+    help = ('Moves decisions (and their audit events) older than the retention window to gzip JSONL files '
+            'under ARCHIVE_DIR, partitioned by day, and deletes them from the database in batches')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.ARCHIVE_RETENTION_DAYS,
+                            help='Keep decisions newer than this many days in the database')
+        parser.add_argument('--batch-size', type=int, default=500, help='Decisions moved per file write and delete')
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after N batches (0 = until done)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        if options['retention_days'] < 1:
+            raise CommandError('--retention-days must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        cutoff = timezone.now() - timedelta(days=options['retention_days'])
+        if options['dry_run']:
+            self.stdout.write(f'{archive.archivable(cutoff).count()} decisions created before {cutoff:%Y-%m-%d %H:%M} would be archived.')
+            return
+
+        started = time.perf_counter()
+        decisions = events = batches = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            # Archived rows are deleted, so the next batch is again the head of the queryset
+            records = list(archive.archivable(cutoff)[:options['batch_size']])
+            if not records:
+                break
+            events += archive.archive_batch(records)
+            decisions += len(records)
+            batches += 1
+            self.stdout.write(f'Batch {batches}: {decisions} decisions archived so far')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {decisions} decisions and {events} audit events in {batches} batches '
+            f'to {archive.archive_root()} ({time.perf_counter() - started:.1f}s)'
+        ))
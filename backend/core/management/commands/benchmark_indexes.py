@@ -0,0 +1,142 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from core.models import CustomerProfile, Transaction, DecisionRecord, AuditEvent, HumanReviewCase
+
+# Last migration without / with the hot query indexes
+BEFORE, AFTER = '0005_dashboard_counters', '0006_hot_query_indexes'
+# Adds HumanReviewCase.priority_key and the HITL claim-order index
+HITL_PRIORITY = '0011_hitl_priority_lease'
+DECISIONS = ['APPROVE', 'CHALLENGE', 'BLOCK', 'ESCALATE_TO_HUMAN']
+START = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class Command(BaseCommand):
+    help = 'Seeds a scratch database and compares query plans and timings of the hot queries without and with the indexes of migration 0006'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=200_000)
+        parser.add_argument('--customers', type=int, default=10_000)
+        parser.add_argument('--open-ratio', type=float, default=0.05, help='Share of HITL cases still OPEN')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query; the mean is reported')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Never touch the configured database: run against a throwaway test database.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            probes = self._seed(random.Random(options['seed']), options)
+            results = {}
+            for label, migration in (('before', BEFORE), ('after', AFTER)):
+                call_command('migrate', 'core', migration, verbosity=0)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                results[label] = {name: self._measure(build(probes), options['repeat']) for name, build in self._queries()}
+            # The claim order only exists from 0011 on (its migration backfills the OPEN cases)
+            call_command('migrate', 'core', HITL_PRIORITY, verbosity=0)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            claim_order = self._measure(
+                HumanReviewCase.objects.filter(status='OPEN').order_by('priority_key', 'id')[:50], options['repeat']
+            )
+            self._report(results, claim_order)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    @staticmethod
+    def _queries():
+        """(name, function(probes) -> queryset) for the access patterns the indexes target."""
+        return [
+            ('reports: first page', lambda p: DecisionRecord.objects.order_by('-created_at', '-id')[:10]),
+            ('reports: deep keyset page', lambda p: DecisionRecord.objects.filter(created_at__lt=p['middle'])
+                .order_by('-created_at', '-id')[:10]),
+            ('reports: decision=BLOCK', lambda p: DecisionRecord.objects.filter(decision='BLOCK')
+                .order_by('-created_at', '-id')[:10]),
+            # Columns of 0005/0006 only; the list orders by priority_key from 0011 on (measured separately)
+            ('hitl: open cases', lambda p: HumanReviewCase.objects.filter(status='OPEN')
+                .only('transaction_id', 'status', 'created_at').order_by('created_at')[:50]),
+            ('hitl: open count', lambda p: HumanReviewCase.objects.filter(status='OPEN').values('id')),
+            # Same shape as VelocityStore._catch_up
+            ('velocity: customer window', lambda p: Transaction.objects.filter(
+                customer_id=p['customer'], timestamp__gte=p['horizon'], timestamp__lt=p['middle'])),
+            ('audit trail of a transaction', lambda p: AuditEvent.objects.filter(
+                transaction_id=p['transaction']).order_by('timestamp')),
+        ]
+
+    def _seed(self, rng, options):
+        started = time.perf_counter()
+        customers = CustomerProfile.objects.bulk_create([
+            CustomerProfile(customer_id=f'IDX-{i:06d}', usual_amount_avg=Decimal(rng.randint(100, 5000)), usual_hours='08-20')
+            for i in range(options['customers'])
+        ], batch_size=2000)
+        span_minutes = 60 * 24 * 365
+        for offset in range(0, options['transactions'], 10_000):
+            size = min(10_000, options['transactions'] - offset)
+            transactions = Transaction.objects.bulk_create([
+                Transaction(
+                    transaction_id=f'IDX-T-{offset + n}', customer=rng.choice(customers),
+                    amount=Decimal(rng.randint(1, 15000)), currency='PEN', country='PE', channel='web',
+                    device_id='D-1', timestamp=START + timedelta(minutes=rng.randint(0, span_minutes)), merchant_id='M-001',
+                ) for n in range(size)
+            ], batch_size=2000)
+            DecisionRecord.objects.bulk_create([
+                DecisionRecord(transaction=tx, decision=rng.choice(DECISIONS), confidence=rng.random(),
+                               explanation_customer='-', explanation_audit='-')
+                for tx in transactions
+            ], batch_size=2000)
+            AuditEvent.objects.bulk_create([
+                AuditEvent(transaction=tx, event_type='MULTI_AGENT_DECISION', description='-')
+                for tx in transactions for _ in range(2)
+            ], batch_size=2000)
+            HumanReviewCase.objects.bulk_create([
+                HumanReviewCase(transaction=tx, status='OPEN' if rng.random() < options['open_ratio'] else 'RESOLVED')
+                for tx in transactions if rng.random() < 0.3
+            ], batch_size=2000)
+
+        # auto_now_add stamped every row with "now"; spread them like real history.
+        tx_time = Subquery(Transaction.objects.filter(pk=OuterRef('transaction_id')).values('timestamp')[:1])
+        DecisionRecord.objects.update(created_at=tx_time)
+        AuditEvent.objects.update(timestamp=tx_time)
+        HumanReviewCase.objects.update(created_at=tx_time)
+        self.stdout.write(f"Seeded {options['transactions']} transactions in {time.perf_counter() - started:.1f}s")
+
+        busiest = Transaction.objects.values_list('customer_id', flat=True).order_by('customer_id').first()
+        return {
+            'middle': START + timedelta(minutes=span_minutes // 2),
+            'horizon': START + timedelta(minutes=span_minutes // 2 - 60),
+            'customer': busiest,
+            'transaction': Transaction.objects.order_by('pk').values_list('pk', flat=True)[options['transactions'] // 2],
+        }
+
+    @staticmethod
+    def _measure(queryset, repeat):
+        plan = queryset.explain()
+        list(queryset)  # warm the page cache
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset._chain())
+        return plan, (time.perf_counter() - started) / repeat * 1000
+
+    def _report(self, results, claim_order):
+        self.stdout.write('')
+        self.stdout.write(f"{'query':<32} | {'before (ms)':>11} | {'after (ms)':>10} | {'speedup':>8}")
+        for name, _ in self._queries():
+            before, after = results['before'][name][1], results['after'][name][1]
+            self.stdout.write(f'{name:<32} | {before:>11.3f} | {after:>10.3f} | {before / after if after else 0:>7.1f}x')
+        self.stdout.write(f"{'hitl: claim order (0011)':<32} | {'':>11} | {claim_order[1]:>10.3f} |")
+        for name, _ in self._queries():
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label in ('before', 'after'):
+                self.stdout.write(f'  {label}:')
+                for line in results[label][name][0].splitlines():
+                    self.stdout.write(f'    {line}')
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('hitl: claim order (0011)'))
+        for line in claim_order[0].splitlines():
+            self.stdout.write(f'    {line}')
@@ -0,0 +1,96 @@
+import re
+import time
+import tracemalloc
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from xml.sax.saxutils import escape
+from django.core.management.base import BaseCommand
+from core.models import CustomerProfile, Transaction, DecisionRecord
+from core.report_service import ReportFactory, markdown_to_reportlab
+
+PARAGRAPH = (
+    "## Hallazgo {n}\n"
+    "El cliente realizó una operación de **monto atípico** desde un dispositivo no registrado "
+    "(<device> & país distinto al habitual). La política **P-{n:03d}** indica revisión manual.\n"
+)
+
+
+def _legacy_markdown(text):
+    """The previous escape + three regex substitutions, kept as the baseline."""
+    text = escape(text)
+    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
+    text = re.sub(r'^#+\s*(.*)$', r'<b>\1</b>', text, flags=re.MULTILINE)
+    return text.replace("\n", "<br/>")
+
+
+def _record(paragraphs):
+    """Unsaved DecisionRecord with its transaction and customer: no database needed."""
+    customer = CustomerProfile(customer_id='BENCH-C', usual_amount_avg=Decimal('500'), usual_hours='08-20')
+    transaction = Transaction(
+        transaction_id='BENCH-T', customer=customer, amount=Decimal('9800.00'), currency='PEN', country='US',
+        channel='web', device_id='D-NEW', timestamp=datetime(2025, 1, 1, 3, 15, tzinfo=dt_timezone.utc), merchant_id='M-001',
+    )
+    explanation = "".join(PARAGRAPH.format(n=n) for n in range(paragraphs))
+    return DecisionRecord(
+        id=1, transaction=transaction, decision='BLOCK', confidence=0.93,
+        signals=['amount_anomaly', 'new_device', 'foreign_country', '**velocity**'],
+        citations_internal=[{'policy_id': f'P-{n:03d}', 'rule': f'Regla **{n}** <interna>', 'version': '1'} for n in range(5)],
+        citations_external=[{'source': 'osint', 'summary': 'Patrón de fraude reportado & confirmado'}],
+        explanation_customer="Su transacción fue bloqueada por seguridad.\nContáctenos para validarla.",
+        explanation_audit=explanation,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Measures report rendering throughput (reports/s) and peak memory for short and very long audit explanations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formats', default='pdf,excel', help='Comma separated ReportFactory formats')
+        parser.add_argument('--small', type=int, default=3, help='Paragraphs in the short explanation')
+        parser.add_argument('--long', type=int, default=1000, help='Paragraphs in the very long explanation')
+        parser.add_argument('--seconds', type=float, default=3.0, help='Minimum measuring time per case')
+
+    def handle(self, *args, **options):
+        profiles = [('small', _record(options['small'])), ('long', _record(options['long']))]
+        self.stdout.write(f"{'format':<7} | {'profile':<7} | {'chars':>9} | {'reports/s':>10} | {'ms/report':>10} | {'output KB':>9} | {'peak MB':>8}")
+        for fmt in [f.strip() for f in options['formats'].split(',') if f.strip()]:
+            service = ReportFactory.get_service(fmt)
+            service.generate(profiles[0][1])  # warm-up: imports, fonts, templates
+            for name, record in profiles:
+                rate, size = self._throughput(lambda: service.generate(record), options['seconds'])
+                peak = self._peak_memory(lambda: service.generate(record))
+                self.stdout.write(
+                    f"{fmt:<7} | {name:<7} | {len(record.explanation_audit):>9} | {rate:>10.2f} | "
+                    f"{1000 / rate:>10.1f} | {size / 1024:>9.1f} | {peak / 2**20:>8.1f}"
+                )
+
+        self.stdout.write('')
+        self.stdout.write(f"{'markdown':<9} | {'profile':<7} | {'legacy (ms)':>11} | {'scanner (ms)':>12} | {'speedup':>7}")
+        for name, record in profiles:
+            text = record.explanation_audit
+            assert _legacy_markdown(text) == markdown_to_reportlab(text)
+            legacy, _ = self._throughput(lambda: _legacy_markdown(text), options['seconds'] / 3)
+            scanner, _ = self._throughput(lambda: markdown_to_reportlab(text), options['seconds'] / 3)
+            self.stdout.write(f"{'':<9} | {name:<7} | {1000 / legacy:>11.3f} | {1000 / scanner:>12.3f} | {scanner / legacy:>6.2f}x")
+
+    @staticmethod
+    def _throughput(render, seconds):
+        """Calls per second over at least `seconds`, and the size of the last output."""
+        count, started = 0, time.perf_counter()
+        while True:
+            result = render()
+            count += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= seconds:
+                size = len(result.getvalue()) if hasattr(result, 'getvalue') else len(result)
+                return count / elapsed, size
+
+    @staticmethod
+    def _peak_memory(render):
+        """Peak Python heap allocated by one call (tracemalloc, measured apart since it slows rendering)."""
+        tracemalloc.start()
+        try:
+            render()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
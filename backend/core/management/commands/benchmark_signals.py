@@ -0,0 +1,128 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection
+from core.models import CustomerProfile, Transaction
+from core.services import SignalAnalysisService
+
+COUNTRIES = ['PE', 'CL', 'CO', 'MX', 'US', 'AR', 'BR', 'ES']
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks SignalAnalysisService.analyze_transaction against analyze_batch on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 1_000_000],
+                            help='Number of transactions for each run')
+        parser.add_argument('--customers', type=int, default=5_000, help='Number of synthetic customer profiles')
+        parser.add_argument('--source', choices=['queryset', 'objects'], default='queryset',
+                            help='queryset: rows are read from a scratch database (the realistic re-scoring path); '
+                                 'objects: unsaved in-memory Transaction instances')
+        parser.add_argument('--chunk-size', type=int, default=100_000,
+                            help='Transactions generated per chunk in objects mode (keeps memory bounded)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"Source: {options['source']}")
+        self.stdout.write(f"{'rows':>10} | {'per-row (s)':>12} | {'batch (s)':>10} | {'speedup':>8}")
+
+        if options['source'] == 'queryset':
+            # Never touch the configured database: run against a throwaway test database.
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                ok = self._bench_queryset(rng, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        else:
+            ok = self._bench_objects(rng, options)
+
+        if ok:
+            self.stdout.write(self.style.SUCCESS('Batch results match the per-row path for every run.'))
+
+    def _bench_objects(self, rng, options):
+        customers = [self._make_customer(rng, i) for i in range(options['customers'])]
+        for size in options['sizes']:
+            per_row_time = batch_time = 0.0
+            remaining = size
+            while remaining > 0:
+                chunk = [self._make_transaction(rng, customers) for _ in range(min(remaining, options['chunk_size']))]
+                remaining -= len(chunk)
+
+                started = time.perf_counter()
+                expected = [SignalAnalysisService.analyze_transaction(tx) for tx in chunk]
+                per_row_time += time.perf_counter() - started
+
+                started = time.perf_counter()
+                actual = SignalAnalysisService.analyze_batch(chunk)
+                batch_time += time.perf_counter() - started
+
+                if actual != expected:
+                    self.stderr.write(self.style.ERROR(f'Batch results differ from per-row results at size {size}'))
+                    return False
+            self._report(size, per_row_time, batch_time)
+        return True
+
+    def _bench_queryset(self, rng, options):
+        customers = CustomerProfile.objects.bulk_create(
+            [self._make_customer(rng, i) for i in range(options['customers'])], batch_size=1000
+        )
+        CustomerProfile.objects.save_usual_links(customers)
+        customers = list(CustomerProfile.objects.with_usual_links())
+        seeded = 0
+        for size in sorted(options['sizes']):
+            # Runs are cumulative: each size only seeds the rows it is missing.
+            while seeded < size:
+                batch = [self._make_transaction(rng, customers, seeded + n) for n in range(min(size - seeded, 10_000))]
+                Transaction.objects.bulk_create(batch, batch_size=1000)
+                seeded += len(batch)
+
+            queryset = Transaction.objects.order_by('pk')[:size]
+
+            started = time.perf_counter()
+            expected = [SignalAnalysisService.analyze_transaction(tx) for tx in queryset.select_related('customer').iterator(chunk_size=10_000)]
+            per_row_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            actual = SignalAnalysisService.analyze_batch(queryset)
+            batch_time = time.perf_counter() - started
+
+            if actual != expected:
+                self.stderr.write(self.style.ERROR(f'Batch results differ from per-row results at size {size}'))
+                return False
+            self._report(size, per_row_time, batch_time)
+        return True
+
+    def _report(self, size, per_row_time, batch_time):
+        self.stdout.write(
+            f'{size:>10} | {per_row_time:>12.3f} | {batch_time:>10.3f} | {per_row_time / batch_time:>7.1f}x'
+        )
+
+    @staticmethod
+    def _make_customer(rng, i):
+        start = rng.randint(0, 12)
+        return CustomerProfile(
+            customer_id=f'BENCH-{i:06d}',
+            usual_amount_avg=Decimal(rng.randint(100, 5000)),
+            usual_hours=f'{start:02d}-{start + rng.randint(6, 11):02d}',
+            usual_countries=','.join(rng.sample(COUNTRIES, rng.randint(1, 3))),
+            usual_devices=','.join(f'D-{i}-{n}' for n in range(rng.randint(1, 3))),
+        )
+
+    @staticmethod
+    def _make_transaction(rng, customers, n=None):
+        customer = rng.choice(customers)
+        ts = datetime(2025, 12, 1, tzinfo=dt_timezone.utc) + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        return Transaction(
+            transaction_id=f'BENCH-T-{n}' if n is not None else '',
+            customer=customer,
+            amount=Decimal(rng.randint(1, 15000)),
+            currency='PEN',
+            country=rng.choice(COUNTRIES),
+            channel='web',
+            device_id=rng.choice(customer.usual_devices.split(',') + ['D-UNKNOWN']),
+            timestamp=ts,
+            merchant_id='M-001',
+        )
@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from core.sqlite import tuning_pragmas
+
+SCHEMA = [
+    "CREATE TABLE decision (id INTEGER PRIMARY KEY, transaction_id TEXT UNIQUE, decision TEXT, confidence REAL, "
+    "explanation_audit TEXT, created_at TEXT)",
+    "CREATE INDEX decision_recent ON decision (created_at DESC, id DESC)",
+    "CREATE TABLE audit_event (id INTEGER PRIMARY KEY, transaction_id TEXT, event_type TEXT, metadata TEXT, timestamp TEXT)",
+]
+
+
+def _connect(path, tuned):
+    # isolation_level=None + explicit BEGIN mirrors Django's atomic() on SQLite;
+    # timeout=5 is the sqlite3 default Django runs with.
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    if tuned:
+        for statement in tuning_pragmas():
+            conn.execute(statement)
+    return conn
+
+
+def _worker(path, tuned, role, seconds, seed, results):
+    rng = random.Random(seed)
+    conn = _connect(path, tuned)
+    ops = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == 'writer':
+                # One decision: DecisionRecord + AuditEvent in a transaction
+                tx_id = f'{seed}-{ops}-{rng.random()}'
+                conn.execute('BEGIN')
+                conn.execute(
+                    'INSERT INTO decision (transaction_id, decision, confidence, explanation_audit, created_at) '
+                    "VALUES (?, 'APPROVE', ?, ?, datetime('now'))", (tx_id, rng.random(), 'x' * 2000),
+                )
+                conn.execute(
+                    "INSERT INTO audit_event (transaction_id, event_type, metadata, timestamp) "
+                    "VALUES (?, 'MULTI_AGENT_DECISION', '{}', datetime('now'))", (tx_id,),
+                )
+                conn.execute('COMMIT')
+            else:
+                # Dashboard / listing reads
+                conn.execute('SELECT id, decision, confidence FROM decision ORDER BY created_at DESC, id DESC LIMIT 20').fetchall()
+                conn.execute("SELECT COUNT(*) FROM decision WHERE decision = 'BLOCK'").fetchone()
+            ops += 1
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+    conn.close()
+    results.put((role, ops, errors, latencies))
+
+
+class Command(BaseCommand):
+    help = 'Compares concurrent read/write throughput of the default and the tuned (SQLITE_TUNING) SQLite profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=3, help='Writer processes (e.g. gunicorn workers)')
+        parser.add_argument('--readers', type=int, default=3, help='Reader processes')
+        parser.add_argument('--seconds', type=float, default=10.0, help='Duration of each run')
+        parser.add_argument('--rows', type=int, default=50_000, help='Rows seeded before each run')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<8} | {'writes/s':>9} | {'reads/s':>9} | {'lock errors':>11} | {'write p99 (ms)':>14} | {'read p99 (ms)':>13}"
+        )
+        for label, tuned in (('default', False), ('tuned', True)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self._seed(path, tuned, options['rows'])
+                self._report(label, self._run(path, tuned, options), options['seconds'])
+
+    @staticmethod
+    def _seed(path, tuned, rows):
+        conn = _connect(path, tuned)
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.execute('BEGIN')
+        conn.executemany(
+            "INSERT INTO decision (transaction_id, decision, confidence, explanation_audit, created_at) "
+            "VALUES (?, ?, 0.5, 'seed', datetime('now', ?))",
+            ((f'seed-{i}', 'BLOCK' if i % 4 == 0 else 'APPROVE', f'-{i} seconds') for i in range(rows)),
+        )
+        conn.execute('COMMIT')
+        conn.close()
+
+    @staticmethod
+    def _run(path, tuned, options):
+        results = multiprocessing.Queue()
+        roles = ['writer'] * options['writers'] + ['reader'] * options['readers']
+        processes = [
+            multiprocessing.Process(target=_worker, args=(path, tuned, role, options['seconds'], seed, results))
+            for seed, role in enumerate(roles)
+        ]
+        for p in processes:
+            p.start()
+        collected = [results.get() for _ in processes]
+        for p in processes:
+            p.join()
+        return collected
+
+    def _report(self, label, collected, seconds):
+        totals = {}
+        for role, ops, errors, latencies in collected:
+            entry = totals.setdefault(role, [0, 0, []])
+            entry[0] += ops
+            entry[1] += errors
+            entry[2].extend(latencies)
+
+        def p99(values):
+            values = sorted(values)
+            return values[int(len(values) * 0.99) - 1] * 1000 if values else 0.0
+
+        writes, write_errors, write_latencies = totals.get('writer', [0, 0, []])
+        reads, read_errors, read_latencies = totals.get('reader', [0, 0, []])
+        self.stdout.write(
+            f'{label:<8} | {writes / seconds:>9.1f} | {reads / seconds:>9.1f} | {write_errors + read_errors:>11} | '
+            f'{p99(write_latencies):>14.2f} | {p99(read_latencies):>13.2f}'
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core import counters
+
+
+class Command(BaseCommand):
+    help = 'Checks the dashboard counters against DecisionRecord / HumanReviewCase and optionally rebuilds them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rebuild the counters from scratch when they drifted')
+        parser.add_argument('--force', action='store_true', help='Rebuild the counters even if no drift is found')
+
+    def handle(self, *args, **options):
+        # A transaction alone does not keep concurrent writers out: lock the
+        # counters row first, so they wait until the check and the rewrite are done.
+        with transaction.atomic():
+            counters.lock()
+            drift = counters.drift()
+            for field, (stored, actual) in drift.items():
+                self.stdout.write(self.style.WARNING(f'{field}: stored={stored} actual={actual}'))
+
+            if options['force'] or (drift and options['fix']):
+                values = counters.rebuild()
+                self.stdout.write(self.style.SUCCESS(
+                    'Counters rebuilt: ' + ', '.join(f'{k}={v}' for k, v in values.items())
+                ))
+                return
+
+        if drift:
+            raise CommandError(f'Dashboard counters drifted on {len(drift)} field(s); run with --fix to rebuild them')
+        self.stdout.write(self.style.SUCCESS('Dashboard counters match the tables.'))
@@ -0,0 +1,76 @@
+import logging
+import multiprocessing
+import signal
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from core.audit import audit_writer
+from core.jobs import QUEUES, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_loop(queue_name, poll_interval, stop_event):
+    queue = QUEUES[queue_name]
+    worker_id = worker_name()
+    # Only the parent reacts to Ctrl+C / SIGTERM; children finish their current job.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    last_reap = 0.0
+    try:
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() - last_reap > 60:
+                    queue.reap_expired()
+                    last_reap = time.monotonic()
+                if not queue.run_one(worker_id):
+                    stop_event.wait(poll_interval)
+            except Exception:
+                # e.g. the database is briefly unavailable; keep the worker alive
+                logger.exception(f"[{worker_id}] Error polling the '{queue_name}' queue")
+                connections.close_all()
+                stop_event.wait(poll_interval)
+    finally:
+        # multiprocessing children skip atexit handlers: flush buffered audit events here
+        audit_writer.close()
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Runs a pool of worker processes that claim and process jobs from a DB-backed queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', choices=sorted(QUEUES), default='analysis')
+        parser.add_argument('--processes', type=int, default=2, help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+
+        # Forked children must not share the parent's DB connection.
+        connections.close_all()
+        stop_event = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(
+                target=_worker_loop,
+                args=(options['queue'], options['poll_interval'], stop_event),
+                name=f"{options['queue']}-worker-{i}",
+            )
+            for i in range(options['processes'])
+        ]
+        for w in workers:
+            w.start()
+        self.stdout.write(self.style.SUCCESS(
+            f"Started {len(workers)} '{options['queue']}' workers (pids: {', '.join(str(w.pid) for w in workers)})"
+        ))
+
+        def _stop(signum, frame):
+            self.stdout.write('Stopping workers after their current job...')
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+        for w in workers:
+            w.join()
+        self.stdout.write(self.style.SUCCESS('All workers stopped.'))
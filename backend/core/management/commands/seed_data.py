@@ -1,17 +1,46 @@
 import csv
 import json
 import os
+import time
+from itertools import islice
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
 from core.models import CustomerProfile, Transaction, PolicyDocument
+from core.services import DecisionService
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
+PLACEHOLDER_CUSTOMER = {
+    'usual_amount_avg': 0,
+    'usual_hours': '',
+    'usual_countries': '',
+    'usual_devices': ''
+}
+
 class Command(BaseCommand):
     help = 'Seeds the database with fraud policies and example data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--stream', action='store_true',
+                            help='Bulk streaming ingest: reads the CSVs in chunks and upserts each chunk in one transaction')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per chunk in --stream mode')
+        parser.add_argument('--data-dir', help='Directory with fraud_policies.json, customer_behavior.csv and transactions.csv')
+        parser.add_argument('--customers-file', help='Customer behavior CSV (overrides --data-dir)')
+        parser.add_argument('--transactions-file', help='Transactions CSV (overrides --data-dir)')
+
     def handle(self, *args, **options):
-        data_dir = os.path.join(settings.BASE_DIR, '..', 'data')
+        data_dir = options['data_dir'] or os.path.join(settings.BASE_DIR, '..', 'data')
+        behavior_path = options['customers_file'] or os.path.join(data_dir, 'customer_behavior.csv')
+        transactions_path = options['transactions_file'] or os.path.join(data_dir, 'transactions.csv')
+
+        if options['stream']:
+            self._ingest_policies(data_dir)
+            if os.path.exists(behavior_path):
+                self._stream_csv(behavior_path, options['chunk_size'], self._upsert_customers, 'customers')
+            if os.path.exists(transactions_path):
+                self._stream_csv(transactions_path, options['chunk_size'], self._upsert_transactions, 'transactions')
+            return
         
         # 1. Ingest Fraud Policies
         policies_path = os.path.join(data_dir, 'fraud_policies.json')
@@ -29,7 +58,6 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.SUCCESS(f'Policy {p["policy_id"]} {"created" if created else "updated"}'))
         
         # 2. Seed Customer Behavior
-        behavior_path = os.path.join(data_dir, 'customer_behavior.csv')
         if os.path.exists(behavior_path):
             with open(behavior_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
@@ -46,22 +74,14 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.SUCCESS(f'Customer {row["customer_id"]} {"created" if created else "updated"}'))
 
         # 3. Seed Example Transactions
-        transactions_path = os.path.join(data_dir, 'transactions.csv')
         if os.path.exists(transactions_path):
             with open(transactions_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     # Ensure customer exists
-                    customer, _ = CustomerProfile.objects.get_or_create(customer_id=row['customer_id'], defaults={
-                        'usual_amount_avg': 0,
-                        'usual_hours': '',
-                        'usual_countries': '',
-                        'usual_devices': ''
-                    })
+                    customer, _ = CustomerProfile.objects.get_or_create(customer_id=row['customer_id'], defaults=PLACEHOLDER_CUSTOMER)
                     
-                    dt = parse_datetime(row['timestamp'])
-                    if dt and timezone.is_naive(dt):
-                        dt = timezone.make_aware(dt)
+                    dt = self._parse_timestamp(row['timestamp'])
 
                     obj, created = Transaction.objects.update_or_create(
                         transaction_id=row['transaction_id'],
@@ -78,3 +98,103 @@ class Command(BaseCommand):
                     )
                     self.stdout.write(self.style.SUCCESS(f'Transaction {row["transaction_id"]} {"created" if created else "updated"}'))
 
+    def _ingest_policies(self, data_dir):
+        policies_path = os.path.join(data_dir, 'fraud_policies.json')
+        if not os.path.exists(policies_path):
+            return
+        with open(policies_path, 'r', encoding='utf-8') as f:
+            policies = json.load(f)
+        PolicyDocument.objects.bulk_create(
+            [PolicyDocument(policy_id=p['policy_id'], rule=p['rule'], version=p['version']) for p in policies],
+            update_conflicts=True,
+            unique_fields=['policy_id'],
+            update_fields=['rule', 'version'],
+        )
+        # bulk_create sends no post_save signals
+        DecisionService.invalidate_policy_stamp()
+        self.stdout.write(self.style.SUCCESS(f'{len(policies)} policies upserted'))
+
+    @staticmethod
+    def _parse_timestamp(value):
+        dt = parse_datetime(value)
+        if dt and timezone.is_naive(dt):
+            dt = timezone.make_aware(dt)
+        return dt
+
+    def _stream_csv(self, path, chunk_size, upsert, label):
+        """Feeds the CSV to `upsert` chunk by chunk; only one chunk is held in memory."""
+        started = time.perf_counter()
+        total = 0
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                with transaction.atomic():
+                    upsert(rows)
+                total += len(rows)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'  {label}: {total} rows ({total / elapsed:,.0f} rows/s)')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} {label} ingested in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)'
+        ))
+
+    def _upsert_customers(self, rows):
+        # Last row wins when a chunk repeats a customer_id.
+        rows = list({row['customer_id']: row for row in rows}.values())
+        profiles = [
+            CustomerProfile(
+                customer_id=row['customer_id'],
+                usual_amount_avg=row['usual_amount_avg'],
+                usual_hours=row['usual_hours'],
+                usual_countries=row['usual_countries'],
+                usual_devices=row['usual_devices'],
+            )
+            for row in rows
+        ]
+        CustomerProfile.objects.bulk_create(
+            profiles,
+            update_conflicts=True,
+            unique_fields=['customer_id'],
+            update_fields=['usual_amount_avg', 'usual_hours', 'updated_at'],
+        )
+        # Upserted rows do not get their pk back on every backend; resolve them in one query.
+        pks = dict(
+            CustomerProfile.objects.filter(customer_id__in=[p.customer_id for p in profiles]).values_list('customer_id', 'pk')
+        )
+        for profile in profiles:
+            profile.pk = pks[profile.customer_id]
+        CustomerProfile.objects.save_usual_links(profiles)
+
+    def _upsert_transactions(self, rows):
+        # 1. Resolve every customer of the chunk with a single query
+        customer_ids = {row['customer_id'] for row in rows}
+        pks = dict(CustomerProfile.objects.filter(customer_id__in=customer_ids).values_list('customer_id', 'pk'))
+        missing = customer_ids - pks.keys()
+        if missing:
+            placeholders = [CustomerProfile(customer_id=cid, **PLACEHOLDER_CUSTOMER) for cid in missing]
+            CustomerProfile.objects.bulk_create(placeholders, ignore_conflicts=True)
+            pks.update(CustomerProfile.objects.filter(customer_id__in=missing).values_list('customer_id', 'pk'))
+
+        # 2. Upsert the transactions
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    transaction_id=row['transaction_id'],
+                    customer_id=pks[row['customer_id']],
+                    amount=row['amount'],
+                    currency=row['currency'],
+                    country=row['country'],
+                    channel=row['channel'],
+                    device_id=row['device_id'],
+                    timestamp=self._parse_timestamp(row['timestamp']),
+                    merchant_id=row['merchant_id'],
+                )
+                for row in {row['transaction_id']: row for row in rows}.values()
+            ],
+            update_conflicts=True,
+            unique_fields=['transaction_id'],
+            update_fields=['customer', 'amount', 'currency', 'country', 'channel', 'device_id', 'timestamp', 'merchant_id'],
+        )
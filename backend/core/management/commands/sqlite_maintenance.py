@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Checkpoints the SQLite WAL and refreshes planner statistics (PRAGMA optimize); run it periodically'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkpoint', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'], default='TRUNCATE',
+                            help='wal_checkpoint mode; TRUNCATE also shrinks the -wal file back to zero bytes')
+        parser.add_argument('--every', type=float, default=0,
+                            help='Repeat every N seconds instead of running once (e.g. as a sidecar process)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'sqlite_maintenance only applies to SQLite (database is {connection.vendor})')
+
+        while True:
+            self._run(options['checkpoint'])
+            if not options['every']:
+                return
+            # Do not pin a connection (and its WAL read snapshot) between runs
+            connection.close()
+            time.sleep(options['every'])
+
+    def _run(self, mode):
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode.lower() == 'wal':
+                cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+                busy, wal_pages, checkpointed = cursor.fetchone()
+                status = 'blocked by a reader/writer, will retry next run' if busy else 'complete'
+                self.stdout.write(f'wal_checkpoint({mode}): {checkpointed}/{wal_pages} pages checkpointed ({status})')
+            else:
+                self.stdout.write(f'journal_mode={journal_mode}: no WAL to checkpoint (set SQLITE_TUNING=1)')
+            cursor.execute('PRAGMA optimize')
+        self.stdout.write(self.style.SUCCESS(f'Maintenance done in {time.perf_counter() - started:.3f}s'))
@@ -0,0 +1,76 @@
+import threading
+
+
+class Timing:
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "mean_seconds": round(self.mean, 6),
+            "max_seconds": round(self.max, 6),
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-local counters, timings and computed gauges.
+
+    Every gunicorn worker keeps its own registry; /api/metrics/ returns the
+    values of the worker that served the request, so scrapers should
+    aggregate across workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+        self._gauges = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = Timing()
+            timing.observe(seconds)
+
+    def counter(self, name):
+        return self._counters.get(name, 0)
+
+    def timing(self, name):
+        return self._timings.get(name) or Timing()
+
+    def register_gauge(self, name, func):
+        """func() is evaluated on every snapshot."""
+        self._gauges[name] = func
+
+    def snapshot(self):
+        with self._lock:
+            data = {
+                "counters": dict(self._counters),
+                "timings": {name: t.as_dict() for name, t in self._timings.items()},
+            }
+        data["gauges"] = {name: func() for name, func in self._gauges.items()}
+        return data
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _split_usual(value):
+    items = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if item and item not in items:
+            items.append(item)
+    return items
+
+
+def copy_usual_values_to_links(apps, schema_editor):
+    CustomerProfile = apps.get_model('core', 'CustomerProfile')
+    CustomerCountry = apps.get_model('core', 'CustomerCountry')
+    CustomerDevice = apps.get_model('core', 'CustomerDevice')
+
+    countries, devices = [], []
+    for profile in CustomerProfile.objects.only('id', 'usual_countries', 'usual_devices').iterator(chunk_size=2000):
+        countries.extend(CustomerCountry(customer_id=profile.id, country=c) for c in _split_usual(profile.usual_countries))
+        devices.extend(CustomerDevice(customer_id=profile.id, device_id=d) for d in _split_usual(profile.usual_devices))
+        if len(countries) + len(devices) >= 2000:
+            CustomerCountry.objects.bulk_create(countries)
+            CustomerDevice.objects.bulk_create(devices)
+            countries, devices = [], []
+    CustomerCountry.objects.bulk_create(countries)
+    CustomerDevice.objects.bulk_create(devices)
+
+
+def copy_links_to_usual_values(apps, schema_editor):
+    CustomerProfile = apps.get_model('core', 'CustomerProfile')
+    CustomerCountry = apps.get_model('core', 'CustomerCountry')
+    CustomerDevice = apps.get_model('core', 'CustomerDevice')
+
+    for profile in CustomerProfile.objects.iterator(chunk_size=2000):
+        profile.usual_countries = ','.join(
+            CustomerCountry.objects.filter(customer_id=profile.id).order_by('id').values_list('country', flat=True)
+        )
+        profile.usual_devices = ','.join(
+            CustomerDevice.objects.filter(customer_id=profile.id).order_by('id').values_list('device_id', flat=True)
+        )
+        profile.save(update_fields=['usual_countries', 'usual_devices'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerCountry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=50)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usual_country_links', to='core.customerprofile')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomerDevice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_id', models.CharField(max_length=100)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usual_device_links', to='core.customerprofile')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['device_id', 'customer'], name='customer_device_lookup_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='customerdevice',
+            constraint=models.UniqueConstraint(fields=('customer', 'device_id'), name='customer_device_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='customercountry',
+            index=models.Index(fields=['country', 'customer'], name='customer_country_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customercountry',
+            constraint=models.UniqueConstraint(fields=('customer', 'country'), name='customer_country_unique'),
+        ),
+        migrations.RunPython(copy_usual_values_to_links, copy_links_to_usual_values),
+        # Defaults only matter when unapplying: the re-added columns need one for existing rows.
+        migrations.AlterField(
+            model_name='customerprofile',
+            name='usual_countries',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='customerprofile',
+            name='usual_devices',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.RemoveField(
+            model_name='customerprofile',
+            name='usual_countries',
+        ),
+        migrations.RemoveField(
+            model_name='customerprofile',
+            name='usual_devices',
+        ),
+    ]
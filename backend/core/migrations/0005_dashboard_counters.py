@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:04
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def build_counters(apps, schema_editor):
+    """Initial counter values computed from the existing rows."""
+    db = schema_editor.connection.alias
+    DecisionRecord = apps.get_model('core', 'DecisionRecord')
+    HumanReviewCase = apps.get_model('core', 'HumanReviewCase')
+    DashboardCounters = apps.get_model('core', 'DashboardCounters')
+    decisions = DecisionRecord.objects.using(db)
+    DashboardCounters.objects.using(db).create(
+        id=1,
+        total_decisions=decisions.count(),
+        approved=decisions.filter(decision='APPROVE').count(),
+        challenged=decisions.filter(decision='CHALLENGE').count(),
+        blocked=decisions.filter(decision='BLOCK').count(),
+        escalated=decisions.filter(decision='ESCALATE_TO_HUMAN').count(),
+        confidence_sum=decisions.aggregate(total=Sum('confidence'))['total'] or 0.0,
+        open_cases=HumanReviewCase.objects.using(db).filter(status='OPEN').count(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_decisions', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('challenged', models.IntegerField(default=0)),
+                ('blocked', models.IntegerField(default=0)),
+                ('escalated', models.IntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0.0)),
+                ('open_cases', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'dashboard counters',
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['transaction', 'timestamp'], name='audit_transaction_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='decisionrecord',
+            index=models.Index(fields=['-created_at', '-id'], name='decision_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='decisionrecord',
+            index=models.Index(fields=['decision', '-created_at', '-id'], name='decision_outcome_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='humanreviewcase',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['created_at'], name='hitl_open_cases_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['customer', 'timestamp'], name='transaction_customer_time_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_auditevent_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDecision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('decision', models.CharField(choices=[('APPROVE', 'APPROVE'), ('CHALLENGE', 'CHALLENGE'), ('BLOCK', 'BLOCK'), ('ESCALATE_TO_HUMAN', 'ESCALATE_TO_HUMAN')], max_length=20)),
+                ('confidence', models.FloatField()),
+                ('created_at', models.DateTimeField()),
+                ('path', models.CharField(max_length=255)),
+                ('offset', models.BigIntegerField()),
+                ('audit_events', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archived_decision', to='core.transaction')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='archived_decision_created_idx')],
+            },
+        ),
+    ]
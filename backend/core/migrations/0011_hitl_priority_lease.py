@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:28
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_priority(apps, schema_editor):
+    """
+    Queue order of the cases still OPEN, with the formula of
+    core.models.review_priority_key as of this migration; the others get
+    theirs on their next save.
+    """
+    db = schema_editor.connection.alias
+    HumanReviewCase = apps.get_model('core', 'HumanReviewCase')
+    amount_weight = getattr(settings, 'HITL_PRIORITY_AMOUNT_WEIGHT', 1.0)
+    confidence_weight = getattr(settings, 'HITL_PRIORITY_CONFIDENCE_WEIGHT', 2.0)
+    age_seconds = getattr(settings, 'HITL_PRIORITY_AGE_SECONDS', 3600.0)
+    cases = HumanReviewCase.objects.using(db).filter(status='OPEN').values_list(
+        'pk', 'created_at', 'transaction__amount', 'transaction__decision__confidence'
+    )
+    for pk, created_at, amount, confidence in cases.iterator(chunk_size=2000):
+        score = (
+            amount_weight * math.log10(1 + max(float(amount or 0), 0.0))
+            + confidence_weight * (1 - (0.5 if confidence is None else float(confidence)))
+        )
+        HumanReviewCase.objects.using(db).filter(pk=pk).update(
+            priority_key=created_at - timedelta(seconds=score * age_seconds)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_report_job'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='humanreviewcase',
+            name='hitl_open_cases_idx',
+        ),
+        migrations.AddField(
+            model_name='humanreviewcase',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='humanreviewcase',
+            name='priority_key',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_priority, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='humanreviewcase',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['priority_key', 'id'], name='hitl_open_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_hitl_priority_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportexportjob',
+            name='format',
+            field=models.CharField(default='pdf', max_length=10),
+        ),
+    ]
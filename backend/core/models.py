@@ -1,18 +1,142 @@
-from django.db import models
+import math
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.utils import timezone
 
+
+def _split_usual(value):
+    """Parses a comma separated usual_* value into an ordered, de-duplicated list."""
+    items = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if item and item not in items:
+            items.append(item)
+    return items
+
+
+class CustomerProfileQuerySet(models.QuerySet):
+    def with_usual_links(self):
+        """Prefetches the normalized countries/devices read by usual_countries and usual_devices."""
+        return self.prefetch_related('usual_country_links', 'usual_device_links')
+
+    def usual_in_country(self, country):
+        """Customers for whom the given country is usual."""
+        return self.filter(usual_country_links__country=country)
+
+    def using_device(self, device_id):
+        """Customers that have the given device among their usual devices."""
+        return self.filter(usual_device_links__device_id=device_id)
+
+    def sharing_devices_with(self, customer):
+        """Other customers that have at least one usual device in common with the given one."""
+        devices = CustomerDevice.objects.filter(customer=customer).values('device_id')
+        return self.filter(usual_device_links__device_id__in=devices).exclude(pk=customer.pk).distinct()
+
+    def save_usual_links(self, profiles):
+        """
+        Writes the pending usual_countries/usual_devices of already saved
+        profiles (e.g. after bulk_create/bulk_update, which bypass save()).
+        """
+        for pending_attr, relation, model, field in (
+            ('_pending_countries', 'usual_country_links', CustomerCountry, 'country'),
+            ('_pending_devices', 'usual_device_links', CustomerDevice, 'device_id'),
+        ):
+            pending = {}
+            for profile in profiles:
+                values = profile.__dict__.pop(pending_attr, None)
+                if values is not None:
+                    pending[profile.pk] = values
+                    getattr(profile, '_prefetched_objects_cache', {}).pop(relation, None)
+            if not pending:
+                continue
+            model.objects.using(self.db).filter(customer_id__in=list(pending)).delete()
+            model.objects.using(self.db).bulk_create(
+                [model(customer_id=pk, **{field: value}) for pk, values in pending.items() for value in values],
+                batch_size=2000,
+            )
+
+
 class CustomerProfile(models.Model):
     customer_id = models.CharField(max_length=50, unique=True)
     usual_amount_avg = models.DecimalField(max_digits=15, decimal_places=2)
     usual_hours = models.CharField(max_length=50)  # e.g., "08-20"
-    usual_countries = models.CharField(max_length=100)  # comma separated or JSON
-    usual_devices = models.CharField(max_length=255)  # comma separated or JSON
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CustomerProfileQuerySet.as_manager()
+
     def __str__(self):
         return self.customer_id
 
+    # usual_countries / usual_devices used to be comma separated columns. They
+    # are now stored in CustomerCountry / CustomerDevice and exposed here with
+    # the same comma separated format, readable and writable.
+
+    @property
+    def usual_countries(self):
+        return ','.join(self._usual_values('_pending_countries', 'usual_country_links', 'country'))
+
+    @usual_countries.setter
+    def usual_countries(self, value):
+        self._pending_countries = _split_usual(value)
+
+    @property
+    def usual_devices(self):
+        return ','.join(self._usual_values('_pending_devices', 'usual_device_links', 'device_id'))
+
+    @usual_devices.setter
+    def usual_devices(self, value):
+        self._pending_devices = _split_usual(value)
+
+    def _usual_values(self, pending_attr, relation, field):
+        pending = self.__dict__.get(pending_attr)
+        if pending is not None:
+            return pending
+        if self.pk is None:
+            return []
+        return [getattr(link, field) for link in getattr(self, relation).all()]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            CustomerProfile.objects.using(self._state.db).save_usual_links([self])
+
+
+class CustomerCountry(models.Model):
+    customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name='usual_country_links')
+    country = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'country'], name='customer_country_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['country', 'customer'], name='customer_country_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id}:{self.country}"
+
+
+class CustomerDevice(models.Model):
+    customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name='usual_device_links')
+    device_id = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'device_id'], name='customer_device_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['device_id', 'customer'], name='customer_device_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id}:{self.device_id}"
+
 class Transaction(models.Model):
     transaction_id = models.CharField(max_length=50, unique=True)
     customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name='transactions')
@@ -25,6 +149,12 @@ class Transaction(models.Model):
     merchant_id = models.CharField(max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-customer time windows (velocity catch-up, customer history)
+            models.Index(fields=['customer', 'timestamp'], name='transaction_customer_time_idx'),
+        ]
+
     def __str__(self):
         return self.transaction_id
 
@@ -37,6 +167,13 @@ class PolicyDocument(models.Model):
     def __str__(self):
         return f"{self.policy_id} (v{self.version})"
 
+class TransactionDetailsQuerySet(models.QuerySet):
+    def with_transaction_details(self):
+        """Loads transaction, customer and its usual links in a constant number of queries."""
+        return self.select_related('transaction__customer').prefetch_related(
+            'transaction__customer__usual_country_links', 'transaction__customer__usual_device_links'
+        )
+
 class DecisionRecord(models.Model):
     DECISION_CHOICES = [
         ('APPROVE', 'APPROVE'),
@@ -54,19 +191,90 @@ class DecisionRecord(models.Model):
     explanation_audit = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TransactionDetailsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Newest-first listings and their (created_at, id) keyset cursor
+            models.Index(fields=['-created_at', '-id'], name='decision_recent_idx'),
+            # Same listing filtered by outcome (?decision=BLOCK)
+            models.Index(fields=['decision', '-created_at', '-id'], name='decision_outcome_recent_idx'),
+        ]
+
     def __str__(self):
         return f"{self.transaction.transaction_id} - {self.decision}"
 
+    # Dashboard counters are adjusted by the core.signals receivers; the save
+    # is atomic so a record and its counter update commit together.
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted = (instance.__dict__.get('decision'), instance.__dict__.get('confidence'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 class AuditEvent(models.Model):
     transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='audit_trail', null=True, blank=True)
     event_type = models.CharField(max_length=100)
     description = models.TextField()
     metadata = models.JSONField(default=dict)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: the buffered audit writer (core.audit) stamps events
+    # when they happen, not when the batch is flushed.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Audit trail of a transaction in chronological order
+            models.Index(fields=['transaction', 'timestamp'], name='audit_transaction_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.event_type} at {self.timestamp}"
 
+class ArchivedDecision(models.Model):
+    """
+    Index row of a DecisionRecord (and its audit trail) moved to the cold tier
+    by the archive_decisions command. The full record is one JSON line in the
+    gzip member starting at `offset` of ARCHIVE_DIR/`path`; see core.archive.
+    """
+    transaction = models.OneToOneField(Transaction, on_delete=models.CASCADE, related_name='archived_decision')
+    decision = models.CharField(max_length=20, choices=DecisionRecord.DECISION_CHOICES)
+    confidence = models.FloatField()
+    created_at = models.DateTimeField()
+    path = models.CharField(max_length=255)
+    offset = models.BigIntegerField()
+    audit_events = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='archived_decision_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction.transaction_id} - {self.decision} (archived)"
+
+def review_priority_key(amount, confidence, created_at):
+    """
+    Sort key of a HITL case: the earlier, the sooner it is handed out.
+
+    The priority of a case is score + waiting time / HITL_PRIORITY_AGE_SECONDS,
+    where the score grows with the amount (log scale) and with how unsure the
+    agents were (1 - confidence). At any instant, ordering by that priority
+    is the same as ordering by created_at - score * HITL_PRIORITY_AGE_SECONDS,
+    which never changes: it is stored once and indexed, and old cases still
+    rise above new ones as they wait.
+    """
+    score = (
+        settings.HITL_PRIORITY_AMOUNT_WEIGHT * math.log10(1 + max(float(amount or 0), 0.0))
+        + settings.HITL_PRIORITY_CONFIDENCE_WEIGHT * (1 - (0.5 if confidence is None else float(confidence)))
+    )
+    return created_at - timedelta(seconds=score * settings.HITL_PRIORITY_AGE_SECONDS)
+
 class HumanReviewCase(models.Model):
     STATUS_CHOICES = [
         ('OPEN', 'OPEN'),
@@ -81,6 +289,153 @@ class HumanReviewCase(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
+    # Queue order (see review_priority_key), filled on first save
+    priority_key = models.DateTimeField(null=True, blank=True)
+    # A claimed case stays OPEN; it is reserved for assigned_to until the lease expires (core.hitl)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TransactionDetailsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The HITL queue only ever lists and claims OPEN cases, a small slice of the table
+            models.Index(fields=['priority_key', 'id'], condition=models.Q(status='OPEN'), name='hitl_open_priority_idx'),
+        ]
 
     def __str__(self):
         return f"Case {self.id} - {self.status}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted = (instance.__dict__.get('status'),)
+        return instance
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using')
+        with transaction.atomic(using=using):
+            # Read the confidence in the same transaction as the write
+            if self.priority_key is None:
+                confidence = DecisionRecord.objects.db_manager(using).filter(
+                    transaction_id=self.transaction_id
+                ).values_list('confidence', flat=True).first()
+                self.priority_key = review_priority_key(self.transaction.amount, confidence, self.created_at or timezone.now())
+            super().save(*args, **kwargs)
+
+class DashboardCounters(models.Model):
+    """
+    Single-row rollup behind the dashboard stats, kept in step with
+    DecisionRecord and HumanReviewCase by core.counters. Rebuild or check it
+    with the reconcile_counters command.
+    """
+    total_decisions = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    challenged = models.IntegerField(default=0)
+    blocked = models.IntegerField(default=0)
+    escalated = models.IntegerField(default=0)
+    confidence_sum = models.FloatField(default=0.0)
+    open_cases = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    SINGLETON_ID = 1
+
+    class Meta:
+        verbose_name_plural = "dashboard counters"
+
+    def __str__(self):
+        return f"Dashboard counters ({self.total_decisions} decisions)"
+
+class LeasedJob(models.Model):
+    """
+    Base for DB-backed work queues. Workers claim a row by moving it to
+    RUNNING with a lease; a job whose lease expires is claimable again.
+    See core.jobs.JobQueue.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'PENDING'),
+        ('RUNNING', 'RUNNING'),
+        ('DONE', 'DONE'),
+        ('FAILED', 'FAILED'),
+    ]
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+class AnalysisJob(LeasedJob):
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='analysis_jobs')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='analysis_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"AnalysisJob {self.id} - {self.status}"
+
+class ReportExportJob(LeasedJob):
+    """
+    Bulk export of audit reports (see core.exports): a ZIP of PDFs, or one
+    Excel workbook when format is 'excel'. `filters` holds the same
+    decision/customer_id/date_from/date_to parameters as /api/reports/;
+    progress fields are updated while the job renders.
+    """
+    format = models.CharField(max_length=10, default='pdf')
+    filters = models.JSONField(default=dict)
+    total = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    pages = models.PositiveIntegerField(default=0)
+    pages_per_second = models.FloatField(null=True, blank=True)
+    file_path = models.CharField(max_length=255, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='export_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"ReportExportJob {self.id} - {self.status}"
+
+class ReportJob(LeasedJob):
+    """Audit report of one transaction rendered in the background (any ReportFactory format)."""
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='report_jobs')
+    format = models.CharField(max_length=10, default='pdf')
+    file_path = models.CharField(max_length=255, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    etag = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='report_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"ReportJob {self.id} - {self.format} - {self.status}"
+
+class IdempotencyKey(models.Model):
+    """Stored response of a POST sent with an Idempotency-Key header, replayed on retries."""
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)  # null while the request is in progress
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'endpoint'], name='idempotency_key_endpoint_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} [{self.key}]"
@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyBudgetExceeded(Exception):
+    """The caller's latency budget ran out before the orchestrator answered."""
+
+
+def _log_transition(breaker, state):
+    metrics.incr(f"{breaker.name}.circuit_{state.lower()}")
+    logger.warning(f"Circuit '{breaker.name}' is now {state}")
+
+
+class OrchestratorClient:
+    """
+    Process-wide keep-alive session for the agents service.
+
+    Connections are pooled per process (pool size ORCHESTRATOR_POOL_SIZE), so
+    consecutive decisions reuse an open TCP connection instead of paying a new
+    handshake each time. A forked child (gunicorn worker, run_workers process)
+    builds its own session on first use instead of sharing the parent's sockets.
+
+    Only failures where the orchestrator cannot have run the graph are retried:
+    connection errors and 502/503/504 from the proxy in front of it. Read
+    timeouts are never retried, since the graph may still be running.
+    Calls with a latency budget go through a second pool without urllib3
+    retries and apply the same policy by hand (see _post_before).
+    """
+
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._adapter = None
+        self._budget_session = None
+        self._budget_adapter = None
+        self._pid = None
+        self.breaker = CircuitBreaker(
+            "orchestrator",
+            window=settings.ORCHESTRATOR_BREAKER_WINDOW,
+            min_calls=settings.ORCHESTRATOR_BREAKER_MIN_CALLS,
+            failure_rate=settings.ORCHESTRATOR_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.ORCHESTRATOR_SLOW_CALL_SECONDS,
+            slow_rate=settings.ORCHESTRATOR_BREAKER_SLOW_RATE,
+            open_seconds=settings.ORCHESTRATOR_BREAKER_OPEN_SECONDS,
+            half_open_probes=settings.ORCHESTRATOR_BREAKER_HALF_OPEN_PROBES,
+            on_transition=_log_transition,
+        )
+
+    def _build(self, retry=True):
+        max_retries = Retry(
+            total=settings.ORCHESTRATOR_RETRIES,
+            connect=settings.ORCHESTRATOR_RETRIES,
+            read=False,  # re-raise read timeouts as-is instead of wrapping them
+            status=settings.ORCHESTRATOR_RETRIES,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=settings.ORCHESTRATOR_RETRY_BACKOFF,
+            backoff_jitter=settings.ORCHESTRATOR_RETRY_BACKOFF,
+            raise_on_status=False,
+        ) if retry else 0
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.ORCHESTRATOR_POOL_SIZE,
+            pool_block=False,
+            max_retries=max_retries,
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session, adapter
+
+    def _ensure_sessions(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._session, self._adapter = self._build()
+                    self._budget_session, self._budget_adapter = self._build(retry=False)
+                    self._pid = pid
+
+    @property
+    def session(self):
+        self._ensure_sessions()
+        return self._session
+
+    @property
+    def budget_session(self):
+        """Session without urllib3 retries, for calls bounded by a latency budget."""
+        self._ensure_sessions()
+        return self._budget_session
+
+    @property
+    def timeout(self):
+        return (settings.ORCHESTRATOR_CONNECT_TIMEOUT, settings.ORCHESTRATOR_READ_TIMEOUT)
+
+    def post(self, url, payload, budget=None):
+        """
+        POSTs `payload` and returns the successful response.
+
+        `budget` (seconds) bounds the whole call, retries and backoff
+        included; the agents service only writes its response once the graph
+        has finished, so the read timeout bounds the wait for it. Raises
+        CircuitOpenError, LatencyBudgetExceeded or the underlying requests
+        exception.
+        """
+        if not self.breaker.allow_request():
+            metrics.incr("orchestrator.short_circuited")
+            raise CircuitOpenError("Orchestrator circuit is open")
+
+        started = time.perf_counter()
+        try:
+            if budget is None:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                retries = len(getattr(getattr(response.raw, "retries", None), "history", ()))
+            else:
+                response, retries = self._post_before(url, payload, started + budget)
+            response.raise_for_status()
+        except LatencyBudgetExceeded:
+            # Cut short by the caller: says nothing about the orchestrator's health
+            self.breaker.release()
+            metrics.incr("orchestrator.budget_exceeded")
+            raise
+        except requests.HTTPError as e:
+            # 4xx means our request was wrong, not that the service is unhealthy
+            self.breaker.record(time.perf_counter() - started, failed=e.response.status_code >= 500)
+            raise
+        except requests.RequestException:
+            self.breaker.record(time.perf_counter() - started, failed=True)
+            raise
+
+        self.breaker.record(time.perf_counter() - started)
+        if retries:
+            metrics.incr("orchestrator.retries", retries)
+        return response
+
+    def _post_before(self, url, payload, deadline):
+        """
+        POSTs with the session's retry policy applied by hand, so that every
+        attempt and every backoff pause ends by `deadline` (perf_counter
+        seconds); urllib3 would restart the full timeouts on each retry.
+        Returns (response, retries). Raises LatencyBudgetExceeded when a
+        timeout shortened by the deadline expires.
+        """
+        connect_timeout, read_timeout = self.timeout
+        retries = 0
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise LatencyBudgetExceeded("Latency budget exhausted before calling the orchestrator")
+            timeout = (min(connect_timeout, remaining), min(read_timeout, remaining))
+            try:
+                outcome = self.budget_session.post(url, json=payload, timeout=timeout)
+            except requests.ReadTimeout as e:
+                if timeout[1] < read_timeout:
+                    raise LatencyBudgetExceeded(f"No orchestrator response within {timeout[1]:.2f}s") from e
+                raise
+            except requests.ConnectionError as e:
+                if isinstance(e, requests.ConnectTimeout) and timeout[0] < connect_timeout:
+                    raise LatencyBudgetExceeded(f"No orchestrator connection within {timeout[0]:.2f}s") from e
+                outcome = e
+            else:
+                if outcome.status_code not in self.RETRY_STATUSES:
+                    return outcome, retries
+
+            pause = self._backoff(retries + 1)
+            if retries >= settings.ORCHESTRATOR_RETRIES or time.perf_counter() + pause >= deadline:
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome, retries
+            if not isinstance(outcome, Exception):
+                outcome.close()
+            time.sleep(pause)
+            retries += 1
+
+    @staticmethod
+    def _backoff(retry_number):
+        """Pause before the n-th retry, as urllib3's Retry computes it for the main session."""
+        if retry_number <= 1:
+            return 0.0
+        pause = settings.ORCHESTRATOR_RETRY_BACKOFF * 2 ** (retry_number - 1)
+        return min(pause + random.uniform(0, settings.ORCHESTRATOR_RETRY_BACKOFF), Retry.DEFAULT_BACKOFF_MAX)
+
+    def stream_batch(self, url, items):
+        """
+        POSTs several payloads to the batch endpoint and yields each NDJSON
+        result as soon as the agents service writes it. The read timeout
+        applies between lines, i.e. to the slowest single item. The breaker
+        records one call per batch, timed to the first result.
+        """
+        if not self.breaker.allow_request():
+            metrics.incr("orchestrator.short_circuited")
+            raise CircuitOpenError("Orchestrator circuit is open")
+
+        started = time.perf_counter()
+        first_result_at = None
+        recorded = False
+        try:
+            response = self.session.post(url, json={"items": items}, timeout=self.timeout, stream=True)
+            with response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    if first_result_at is None:
+                        first_result_at = time.perf_counter()
+                    yield json.loads(line)
+        except requests.HTTPError as e:
+            self.breaker.record(time.perf_counter() - started, failed=e.response.status_code >= 500)
+            recorded = True
+            raise
+        except requests.RequestException:
+            self.breaker.record(time.perf_counter() - started, failed=True)
+            recorded = True
+            raise
+        else:
+            self.breaker.record((first_result_at or time.perf_counter()) - started)
+            recorded = True
+        finally:
+            if not recorded:
+                # The consumer stopped early; the outcome says nothing either way
+                self.breaker.release()
+
+    def pool_stats(self):
+        """Aggregated urllib3 pool counters for this process."""
+        stats = {"pools": 0, "requests": 0, "connections_opened": 0, "connections_reused": 0, "idle_connections": 0}
+        if self._adapter is None or self._pid != os.getpid():
+            return stats
+        for adapter in (self._adapter, self._budget_adapter):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats["pools"] += 1
+                stats["requests"] += pool.num_requests
+                stats["connections_opened"] += pool.num_connections
+                # The LIFO queue is pre-filled with None placeholders for unopened slots
+                stats["idle_connections"] += sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+        stats["connections_reused"] = max(0, stats["requests"] - stats["connections_opened"])
+        return stats
+
+    def reuse_ratio(self):
+        stats = self.pool_stats()
+        return stats["connections_reused"] / stats["requests"] if stats["requests"] else 0.0
+
+    def close(self):
+        with self._lock:
+            for session in (self._session, self._budget_session):
+                if session is not None:
+                    session.close()
+            self._session = self._adapter = self._budget_session = self._budget_adapter = self._pid = None
+
+
+orchestrator_client = OrchestratorClient()
+
+metrics.register_gauge("orchestrator.pool", orchestrator_client.pool_stats)
+metrics.register_gauge("orchestrator.connection_reuse_ratio", orchestrator_client.reuse_ratio)
+metrics.register_gauge("orchestrator.circuit_state", lambda: orchestrator_client.breaker.state)
@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime, time, timedelta
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.response import Response
+
+MAX_PAGE_SIZE = 200
+
+
+class QueryParamError(ValueError):
+    """Invalid list query parameter; views answer 400 with its message."""
+
+
+def encode_cursor(created_at, pk):
+    raw = json.dumps([created_at.isoformat(), pk]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at = parse_datetime(created_at)
+        if created_at is None or not isinstance(pk, int):
+            raise ValueError
+        return created_at, pk
+    except (ValueError, TypeError):
+        raise QueryParamError("Invalid cursor")
+
+
+def page_size(request, default):
+    value = request.query_params.get("limit")
+    if value in (None, ""):
+        return default
+    try:
+        size = int(value)
+    except ValueError:
+        raise QueryParamError("limit must be an integer")
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise QueryParamError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return size
+
+
+def keyset_page(queryset, request, default_limit):
+    """
+    Newest-first page of `queryset` ordered by (created_at, id).
+
+    The cursor carries the (created_at, id) of the last row returned, and the
+    next page is "rows strictly before it" in that order, so any page is one
+    index range scan, however deep. Returns (rows, next_cursor or None).
+    """
+    limit = page_size(request, default_limit)
+    queryset = queryset.order_by("-created_at", "-id")
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].pk)
+
+
+def paginated_response(request, data, next_cursor):
+    """
+    The body stays a plain list; the next page travels in headers
+    (X-Next-Cursor and an RFC 8288 Link) so existing clients keep working.
+    """
+    headers = {}
+    if next_cursor:
+        params = request.query_params.copy()
+        params["cursor"] = next_cursor
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.build_absolute_uri(request.path)}?{params.urlencode()}>; rel="next"'
+    return Response(data, headers=headers)
+
+
+def requested_fields(request, allowed):
+    """Field names from ?fields=a,b (all `allowed` when absent), validated."""
+    value = request.query_params.get("fields")
+    if not value:
+        return list(allowed)
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise QueryParamError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return fields
+
+
+def _parse_bound(value, name, end_of_day):
+    try:
+        # Well-formed but impossible values (2025-02-30) raise ValueError
+        dt = parse_datetime(value)
+        day = parse_date(value) if dt is None else None
+    except ValueError:
+        dt = day = None
+    if dt is None:
+        if day is None:
+            raise QueryParamError(f"{name} must be an ISO date or datetime")
+        # A bare date_to includes the whole day
+        dt = datetime.combine(day + timedelta(days=1) if end_of_day else day, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def filter_decisions(queryset, params):
+    """
+    Applies decision=A,B, customer_id=, date_from= and date_to= from `params`
+    (request.query_params or a stored dict) to a DecisionRecord queryset.
+    """
+    decisions = [d.strip().upper() for d in params.get("decision", "").split(",") if d.strip()]
+    if decisions:
+        queryset = queryset.filter(decision__in=decisions)
+    if params.get("customer_id"):
+        queryset = queryset.filter(transaction__customer__customer_id=params["customer_id"])
+    if params.get("date_from"):
+        queryset = queryset.filter(created_at__gte=_parse_bound(params["date_from"], "date_from", end_of_day=False))
+    if params.get("date_to"):
+        date_to = params["date_to"]
+        bound = _parse_bound(date_to, "date_to", end_of_day=True)
+        # Dates are exclusive upper bounds (start of the next day); datetimes are inclusive
+        queryset = queryset.filter(created_at__lt=bound) if parse_datetime(date_to) is None else queryset.filter(created_at__lte=bound)
+    return queryset
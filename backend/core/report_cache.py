@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from core.metrics import metrics
+
+# Bump when the layout of any generated report changes, so cached files are not reused.
+RENDERER_VERSION = 2
+
+REPORT_DECISION_FIELDS = (
+    'decision', 'confidence', 'signals', 'citations_internal', 'citations_external',
+    'explanation_customer', 'explanation_audit',
+)
+REPORT_TRANSACTION_FIELDS = ('transaction_id', 'amount', 'currency', 'country', 'device_id', 'timestamp')
+
+
+class ReportCache:
+    """
+    Rendered report bytes on local disk, at REPORT_CACHE_DIR/<format>/<decision id>/<content hash>.
+
+    The content hash covers every value a report prints plus RENDERER_VERSION,
+    so an edited decision simply misses the cache; it doubles as the ETag.
+    Only the newest version of a decision's report is kept, and invalidate()
+    drops them all when a decision is known to have changed.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def root(self):
+        return Path(settings.REPORT_CACHE_DIR)
+
+    @staticmethod
+    def content_hash(record, fmt):
+        tx = record.transaction
+        content = {
+            'renderer': RENDERER_VERSION,
+            'format': fmt,
+            'decision': {field: getattr(record, field) for field in REPORT_DECISION_FIELDS},
+            'transaction': {field: getattr(tx, field) for field in REPORT_TRANSACTION_FIELDS},
+            'customer_id': tx.customer.customer_id,
+        }
+        raw = json.dumps(content, cls=DjangoJSONEncoder, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _directory(self, fmt, decision_id):
+        return self.root / fmt / str(decision_id)
+
+    def get_or_render(self, record, fmt, digest, render):
+        """
+        Open file (or buffer) with the report of `record` whose content hash is
+        `digest`; on a miss `render(record)` builds it and its bytes are stored.
+        """
+        path = self._directory(fmt, record.pk) / digest
+        if settings.REPORT_CACHE_ENABLED:
+            try:
+                stream = open(path, "rb")
+            except FileNotFoundError:
+                pass
+            else:
+                self.hits += 1
+                metrics.incr("report_cache.hits")
+                return stream
+
+        self.misses += 1
+        metrics.incr("report_cache.misses")
+        started = time.perf_counter()
+        buffer = render(record)
+        metrics.observe(f"report.render.{fmt}", time.perf_counter() - started)
+        if settings.REPORT_CACHE_ENABLED:
+            self._store(path, buffer.getvalue())
+        return buffer
+
+    @staticmethod
+    def _store(path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        for stale in path.parent.iterdir():
+            if stale != path and not stale.name.startswith(".tmp-"):
+                stale.unlink(missing_ok=True)
+
+    def invalidate(self, decision_id):
+        """Drops every cached report of the decision, in all formats."""
+        if not self.root.exists():
+            return
+        for fmt_dir in self.root.iterdir():
+            shutil.rmtree(fmt_dir / str(decision_id), ignore_errors=True)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else None
+
+
+report_cache = ReportCache()
+metrics.register_gauge("report_cache.hit_rate", report_cache.hit_rate)
@@ -1,14 +1,140 @@
 from io import BytesIO
 import abc
+import functools
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 from reportlab.lib.pagesizes import LETTER
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-import re
 from xml.sax.saxutils import escape
+from django.utils import timezone
 from core.models import DecisionRecord
 
+# Markdown -> ReportLab markup in one left-to-right scan. The scanner jumps
+# between the only sequences that matter (str.find on "**", "\n" and "\n#"),
+# emits each text run escaped with its new lines as <br/>, wraps **bold**
+# pairs in <b> and lines starting with "#" in a bold header. The output is
+# identical to the former escape + bold + header + newline substitutions,
+# which rewrote the whole text four times.
+LINE_BREAK = "<br/>"
+_MARKUP = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ("\n", LINE_BREAK))
+
+
+def _markup(run):
+    # Most runs hold none of these, and the `in` checks cost far less than
+    # str.translate with a dict, which looks up every character.
+    for char, replacement in _MARKUP:
+        if char in run:
+            run = run.replace(char, replacement)
+    return run
+
+
+def _emit_inline(text, start, end, out):
+    """Appends text[start:end] as markup; a **bold** pair never spans a new line."""
+    while True:
+        opening = text.find("**", start, end)
+        closing = text.find("**", opening + 2, end) if opening >= 0 else -1
+        if closing < 0:
+            out.append(_markup(text[start:end]))
+            return
+        newline = text.find("\n", opening + 2, closing)
+        if newline >= 0:
+            # Unpaired on its own line: plain text, look again from the next line
+            out.append(_markup(text[start:newline]))
+            start = newline
+            continue
+        out.append(_markup(text[start:opening]))
+        out.append("<b>")
+        out.append(_markup(text[opening + 2:closing]))
+        out.append("</b>")
+        start = closing + 2
+
+
+def markdown_to_reportlab(text: str) -> str:
+    """Escapes XML and converts basic markdown (bold, headers, new lines) to ReportLab tags."""
+    if not text:
+        return ""
+    out = []
+    size = len(text)
+    position = 0
+    while position < size:
+        if text[position] == "#":
+            # Header: skip the "#"s and any whitespace after them, new lines
+            # included (as `^#+\s*` did), and bold the rest of the line.
+            while position < size and text[position] == "#":
+                position += 1
+            while position < size and text[position].isspace():
+                position += 1
+            line_end = text.find("\n", position)
+            if line_end < 0:
+                line_end = size
+            out.append("<b>")
+            _emit_inline(text, position, line_end, out)
+            out.append("</b>")
+            position = line_end
+            continue
+        # Everything up to the next line that starts with "#"
+        chunk_end = text.find("\n#", position)
+        chunk_end = size if chunk_end < 0 else chunk_end + 1
+        _emit_inline(text, position, chunk_end, out)
+        position = chunk_end
+    return "".join(out)
+
+
+class PDFTemplates:
+    """
+    Styles and table styles of the PDF report. They are read-only once
+    built, so one instance per process (pdf_templates()) is shared by every
+    report instead of rebuilding the stylesheet each time.
+    """
+
+    DECISION_COLORS = {'APPROVE': colors.green, 'BLOCK': colors.red}
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.title = styles['Title']
+        self.heading = styles['Heading2']
+        self.normal = styles['Normal']
+        self.italic = styles['Italic']
+        self.decision_styles = {
+            decision: ParagraphStyle(f'decision-{decision}', textColor=self.DECISION_COLORS.get(decision, colors.orange))
+            for decision, _ in DecisionRecord.DECISION_CHOICES
+        }
+        self.default_decision_style = ParagraphStyle('decision', textColor=colors.orange)
+        self.summary_table = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('PADDING', (0, 0), (-1, -1), 6),
+        ])
+        self.decision_table = TableStyle([
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('PADDING', (0, 0), (-1, -1), 6),
+        ])
+
+    def text_block(self, markup, style=None):
+        """
+        Flowables for converted markup, one Paragraph per line. Line breaks
+        never split a tag, and a long explanation laid out as many short
+        paragraphs avoids ReportLab re-splitting one huge paragraph on every
+        page; blank lines become a line-high spacer.
+        """
+        style = style or self.normal
+        return [
+            Paragraph(line, style) if line.strip() else Spacer(1, style.leading)
+            for line in markup.split(LINE_BREAK)
+        ]
+
+
+@functools.cache
+def pdf_templates():
+    return PDFTemplates()
+
+
 class BaseReportService(abc.ABC):
+    # False while generate() only raises NotImplementedError
+    implemented = True
+
     @abc.abstractmethod
     def generate(self, decision_record: DecisionRecord) -> BytesIO:
         pass
@@ -16,35 +142,18 @@ class BaseReportService(abc.ABC):
     @staticmethod
     def _clean_markdown(text: str) -> str:
         """Escapes XML and converts basic markdown to ReportLab tags."""
-        if not text:
-            return ""
-        
-        # 1. Escape all XML specials first
-        text = escape(text)
-        
-        # 2. Convert bold: **text** -> <b>text</b>
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        
-        # 3. Convert headers: # text -> <b>text</b>
-        text = re.sub(r'^#+\s*(.*)$', r'<b>\1</b>', text, flags=re.MULTILINE)
-        
-        # 4. New lines to br
-        text = text.replace("\n", "<br/>")
-        
-        return text
+        return markdown_to_reportlab(text)
 
 class PDFReportService(BaseReportService):
     def generate(self, decision_record: DecisionRecord) -> BytesIO:
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=LETTER)
-        styles = getSampleStyleSheet()
-        
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
+        templates = pdf_templates()
+        heading_style = templates.heading
+        normal_style = templates.normal
         
         content = []
-        content.append(Paragraph(f"Informe de Auditoría de Fraude - BCP", title_style))
+        content.append(Paragraph(f"Informe de Auditoría de Fraude - BCP", templates.title))
         content.append(Spacer(1, 12))
         
         # Transaction Summary
@@ -59,28 +168,21 @@ class PDFReportService(BaseReportService):
             ["Fecha/Hora:", tx.timestamp.strftime("%Y-%m-%d %H:%M:%S")],
         ]
         t1 = Table(tx_data, colWidths=[150, 300])
-        t1.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('PADDING', (0, 0), (-1, -1), 6),
-        ]))
+        t1.setStyle(templates.summary_table)
         content.append(t1)
         content.append(Spacer(1, 12))
         
         # Decision Info
         content.append(Paragraph("Evaluación del Sistema Multi-Agente", heading_style))
-        decision_color = colors.green if decision_record.decision == 'APPROVE' else colors.red if decision_record.decision == 'BLOCK' else colors.orange
+        decision_style = templates.decision_styles.get(decision_record.decision, templates.default_decision_style)
         
         decision_label = escape(decision_record.decision)
         decision_data = [
-            ["Decisión:", Paragraph(f"<b>{decision_label}</b>", ParagraphStyle('res', textColor=decision_color))],
+            ["Decisión:", Paragraph(f"<b>{decision_label}</b>", decision_style)],
             ["Confianza:", f"{decision_record.confidence * 100:.2f}%"],
         ]
         t2 = Table(decision_data, colWidths=[150, 300])
-        t2.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('PADDING', (0, 0), (-1, -1), 6),
-        ]))
+        t2.setStyle(templates.decision_table)
         content.append(t2)
         content.append(Spacer(1, 12))
         
@@ -108,30 +210,141 @@ class PDFReportService(BaseReportService):
         
         # Explanations
         content.append(Paragraph("Explicación para Auditoría", heading_style))
-        content.append(Paragraph(self._clean_markdown(decision_record.explanation_audit), normal_style))
+        content.extend(templates.text_block(self._clean_markdown(decision_record.explanation_audit)))
         content.append(Spacer(1, 12))
         
         content.append(Paragraph("Comunicación al Cliente", heading_style))
-        content.append(Paragraph(self._clean_markdown(decision_record.explanation_customer), normal_style))
+        content.extend(templates.text_block(self._clean_markdown(decision_record.explanation_customer)))
         
         content.append(Spacer(1, 24))
-        content.append(Paragraph(f"Documento generado automáticamente por el Sistema de Detección de Fraude BCP.", styles['Italic']))
+        content.append(Paragraph(f"Documento generado automáticamente por el Sistema de Detección de Fraude BCP.", templates.italic))
         
         doc.build(content)
         buffer.seek(0)
         return buffer
 
 class ExcelReportService(BaseReportService):
+    """
+    Workbook with one sheet per kind of row: decisions (with their
+    transaction), signals and citations. Uses openpyxl's write-only mode,
+    where appended rows go straight to temporary files instead of living in
+    memory as cells, so memory stays flat however many records are written.
+    """
+
+    # Excel limits: rows per sheet and characters per cell
+    MAX_ROWS = 1_048_576
+    MAX_CELL_CHARS = 32_767
+
+    DECISION_HEADER = [
+        "ID Transacción", "ID Cliente", "Monto", "Moneda", "País", "Canal", "Dispositivo",
+        "Comercio", "Fecha/Hora", "Decisión", "Confianza", "Explicación Cliente",
+        "Explicación Auditoría", "Fecha Decisión",
+    ]
+    SIGNAL_HEADER = ["ID Transacción", "Señal"]
+    CITATION_HEADER = ["ID Transacción", "Tipo", "Fuente", "Versión", "Texto"]
+
     def generate(self, decision_record: DecisionRecord) -> BytesIO:
-        # Placeholder para futura implementación con pandas/openpyxl
-        raise NotImplementedError("Exportación a Excel no implementada aún.")
+        buffer = BytesIO()
+        self.write([decision_record], buffer)
+        buffer.seek(0)
+        return buffer
+
+    def write(self, decision_records, output):
+        """
+        Writes the workbook for `decision_records` (any iterable: pass a
+        queryset's .iterator() with select_related('transaction__customer')
+        for large sets) to `output`, a path or binary file object.
+        Returns the number of records written.
+        """
+        workbook = Workbook(write_only=True)
+        sheets = {
+            name: _RollingSheet(workbook, title, header, self.MAX_ROWS)
+            for name, title, header in [
+                ("decisions", "Decisiones", self.DECISION_HEADER),
+                ("signals", "Señales", self.SIGNAL_HEADER),
+                ("citations", "Citas", self.CITATION_HEADER),
+            ]
+        }
+        count = 0
+        for record in decision_records:
+            tx = record.transaction
+            sheets["decisions"].append([
+                tx.transaction_id, tx.customer.customer_id, tx.amount, tx.currency, tx.country, tx.channel,
+                tx.device_id, tx.merchant_id, self._excel_datetime(tx.timestamp), record.decision,
+                record.confidence, self._cell(record.explanation_customer), self._cell(record.explanation_audit),
+                self._excel_datetime(record.created_at),
+            ])
+            for signal in record.signals or []:
+                sheets["signals"].append([tx.transaction_id, self._cell(signal)])
+            for kind, citations in (("interna", record.citations_internal), ("externa", record.citations_external)):
+                for cit in citations or []:
+                    if not isinstance(cit, dict):
+                        cit = {"text": cit}
+                    sheets["citations"].append([
+                        tx.transaction_id, kind, self._cell(cit.get('policy_id') or cit.get('source') or cit.get('url')),
+                        self._cell(cit.get('version')),
+                        self._cell(cit.get('rule') or cit.get('text') or cit.get('summary')),
+                    ])
+            count += 1
+        workbook.save(output)
+        return count
+
+    @classmethod
+    def _cell(cls, value):
+        if value is None:
+            return None
+        return ILLEGAL_CHARACTERS_RE.sub("", str(value))[:cls.MAX_CELL_CHARS]
+
+    @staticmethod
+    def _excel_datetime(value):
+        # Excel has no time zones: write local time as a naive datetime
+        return timezone.localtime(value).replace(tzinfo=None) if value else None
+
+
+class _RollingSheet:
+    """Write-only sheet that continues on "<title> (2)", "<title> (3)"... when one is full."""
+
+    def __init__(self, workbook, title, header, max_rows):
+        self.workbook = workbook
+        self.title = title
+        self.header = header
+        self.max_rows = max_rows
+        self.part = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self.part += 1
+        title = self.title if self.part == 1 else f"{self.title} ({self.part})"
+        self.sheet = self.workbook.create_sheet(title)
+        self.sheet.append(self.header)
+        self.rows = 1
+
+    def append(self, row):
+        if self.rows >= self.max_rows:
+            self._new_sheet()
+        self.sheet.append(row)
+        self.rows += 1
 
 class WordReportService(BaseReportService):
+    implemented = False
+
     def generate(self, decision_record: DecisionRecord) -> BytesIO:
         # Placeholder para futura implementación con python-docx
         raise NotImplementedError("Exportación a Word no implementada aún.")
 
 class ReportFactory:
+    # format -> (file extension, content type)
+    FORMATS = {
+        'pdf': ('pdf', 'application/pdf'),
+        'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+        'word': ('docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    }
+
+    @classmethod
+    def file_info(cls, format: str):
+        """(extension, content type) of a format; unknown formats fall back to PDF like get_service."""
+        return cls.FORMATS.get(format.lower(), cls.FORMATS['pdf'])
+
     @staticmethod
     def get_service(format: str) -> BaseReportService:
         services = {
@@ -1,7 +1,20 @@
 from rest_framework import serializers
 from core.models import Transaction, CustomerProfile, DecisionRecord, HumanReviewCase
 
+class DynamicFieldsMixin:
+    """Accepts fields=[...] to serialize only a subset of the declared fields."""
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 class CustomerProfileSerializer(serializers.ModelSerializer):
+    # Stored in CustomerCountry / CustomerDevice, exposed as comma separated strings
+    usual_countries = serializers.CharField(required=False, allow_blank=True)
+    usual_devices = serializers.CharField(required=False, allow_blank=True)
+
     class Meta:
         model = CustomerProfile
         fields = '__all__'
@@ -12,7 +25,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         model = Transaction
         fields = '__all__'
 
-class DecisionRecordSerializer(serializers.ModelSerializer):
+class DecisionRecordSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     transaction = TransactionSerializer(read_only=True)
     transaction_id = serializers.ReadOnlyField(source='transaction.transaction_id')
     customer_id = serializers.ReadOnlyField(source='transaction.customer.customer_id')
@@ -47,5 +60,7 @@ class HumanReviewCaseSerializer(serializers.ModelSerializer):
             'human_decision',
             'notes',
             'created_at',
-            'resolved_at'
+            'resolved_at',
+            'priority_key',
+            'lease_expires_at'
         ]
@@ -1,52 +1,443 @@
-import requests
 import logging
+import hashlib
 import json
+import time
 from datetime import datetime
+from operator import attrgetter
+import numpy as np
 from django.conf import settings
-from core.models import CustomerProfile, Transaction, DecisionRecord, AuditEvent, HumanReviewCase
+from django.core.cache import cache
+from django.db.models import QuerySet
+from core.baselines import baseline_cache
+from core.audit import audit_writer
+from core.metrics import metrics
+from core.circuit_breaker import CircuitOpenError
+from core.orchestrator_client import orchestrator_client, LatencyBudgetExceeded
+from core.singleflight import SingleFlight
+from core.velocity import VelocityService
+from core.models import CustomerProfile, Transaction, PolicyDocument, DecisionRecord, HumanReviewCase
 
 logger = logging.getLogger(__name__)
 
 class SignalAnalysisService:
     @staticmethod
     def analyze_transaction(transaction: Transaction):
-        signals = []
+        baseline = baseline_cache.get(transaction.customer)
+        return baseline.signals(
+            transaction.amount,
+            transaction.timestamp.hour,
+            transaction.country,
+            transaction.device_id,
+        )
+
+    # Rows are pulled from the database in chunks of this size when a
+    # QuerySet is given to analyze_batch.
+    BATCH_CHUNK_SIZE = 10000
+
+    @classmethod
+    def analyze_batch(cls, transactions):
+        """
+        Vectorized equivalent of analyze_transaction for many transactions.
+
+        Accepts a Transaction QuerySet (read as columns, without building model
+        instances) or any iterable of Transaction objects with their customer
+        loaded. Returns one signal list per transaction, in input order, equal
+        to what analyze_transaction returns for that transaction.
+        """
+        if isinstance(transactions, QuerySet):
+            columns = cls._columns_from_queryset(transactions)
+        else:
+            columns = cls._columns_from_objects(transactions)
+        return cls._evaluate_columns(*columns)
+
+    @classmethod
+    def _columns_from_queryset(cls, queryset):
+        rows = queryset.values_list('amount', 'timestamp', 'country', 'device_id', 'customer_id')
+        amounts, hours, countries, devices, customer_pks = [], [], [], [], []
+        for amount, timestamp, country, device_id, customer_pk in rows.iterator(chunk_size=cls.BATCH_CHUNK_SIZE):
+            amounts.append(amount)
+            hours.append(timestamp.hour)
+            countries.append(country)
+            devices.append(device_id)
+            customer_pks.append(customer_pk)
+
+        profiles = {}
+        unique_pks = list(set(customer_pks))
+        for start in range(0, len(unique_pks), cls.BATCH_CHUNK_SIZE):
+            chunk = unique_pks[start:start + cls.BATCH_CHUNK_SIZE]
+            for profile in CustomerProfile.objects.filter(pk__in=chunk).with_usual_links():
+                profiles[profile.pk] = profile
+        return amounts, hours, countries, devices, customer_pks, profiles
+
+    @staticmethod
+    def _columns_from_objects(transactions):
+        transactions = list(transactions)
+        customers = list(map(attrgetter('customer'), transactions))
+        # Unsaved customers have no primary key; fall back to object identity.
+        customer_keys = [tx.customer_id if tx.customer_id is not None else id(c) for tx, c in zip(transactions, customers)]
+        profiles = dict(zip(customer_keys, customers))
+        return (
+            list(map(attrgetter('amount'), transactions)),
+            [tx.timestamp.hour for tx in transactions],
+            list(map(attrgetter('country'), transactions)),
+            list(map(attrgetter('device_id'), transactions)),
+            customer_keys,
+            profiles,
+        )
+
+    @staticmethod
+    def _baseline_arrays(profiles):
+        """Expands the cached baseline of each distinct profile into per-customer columns."""
+        n = len(profiles)
+        amount_limit = np.empty(n, dtype=np.float64)
+        has_hours = np.zeros(n, dtype=bool)
+        start_h = np.zeros(n, dtype=np.int64)
+        end_h = np.zeros(n, dtype=np.int64)
+        has_countries = np.zeros(n, dtype=bool)
+        has_devices = np.zeros(n, dtype=bool)
+        usual_countries, usual_devices = [], []
+        for idx, profile in enumerate(profiles):
+            baseline = baseline_cache.get(profile)
+            amount_limit[idx] = baseline.amount_limit
+            if baseline.hour_range is not None:
+                has_hours[idx] = True
+                start_h[idx], end_h[idx] = baseline.hour_range
+            if baseline.countries is not None:
+                has_countries[idx] = True
+                usual_countries.append((idx, baseline.countries))
+            if baseline.devices is not None:
+                has_devices[idx] = True
+                usual_devices.append((idx, baseline.devices))
+        return amount_limit, (has_hours, start_h, end_h), (has_countries, usual_countries), (has_devices, usual_devices)
+
+    @staticmethod
+    def _membership(values, customer_idx, usual_by_customer):
+        """
+        Vectorized "value in the customer's usual list" test. Values are
+        factorized to integer codes so each (customer, value) pair becomes a
+        single int64 key checked with np.isin.
+        """
+        vocabulary, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        width = len(vocabulary)
+        usual_idx, usual_values = [], []
+        for idx, entries in usual_by_customer:
+            usual_idx.extend([idx] * len(entries))
+            usual_values.extend(entries)
+        if not usual_values:
+            return np.zeros(len(values), dtype=bool)
+        usual_values = np.asarray(usual_values, dtype=str)
+        positions = np.minimum(np.searchsorted(vocabulary, usual_values), width - 1)
+        # Usual entries never seen in this batch cannot match any row.
+        known = vocabulary[positions] == usual_values
+        usual_keys = np.asarray(usual_idx, dtype=np.int64)[known] * width + positions[known]
+        return np.isin(customer_idx * width + codes, usual_keys)
+
+    @classmethod
+    def _evaluate_columns(cls, amounts, hours, countries, devices, customer_keys, profiles):
+        if not amounts:
+            return []
+        position = {key: idx for idx, key in enumerate(profiles)}
+        customer_idx = np.fromiter(map(position.__getitem__, customer_keys), dtype=np.int64, count=len(customer_keys))
+        amount_limit, hour_cols, country_cols, device_cols = cls._baseline_arrays(profiles.values())
+        has_hours, start_h, end_h = hour_cols
+        has_countries, usual_countries = country_cols
+        has_devices, usual_devices = device_cols
+
+        amount = np.array(amounts, dtype=np.float64)
+        hour = np.array(hours, dtype=np.int64)
+
+        # 1. Amount
+        amount_flag = amount > amount_limit[customer_idx]
+        # 2. Hours
+        hour_flag = has_hours[customer_idx] & ~((start_h[customer_idx] <= hour) & (hour <= end_h[customer_idx]))
+        # 3. Country
+        country_flag = has_countries[customer_idx] & ~cls._membership(countries, customer_idx, usual_countries)
+        # 4. Device
+        device_flag = has_devices[customer_idx] & ~cls._membership(devices, customer_idx, usual_devices)
+
+        # Each row's flags are packed into a 4-bit code; every distinct code
+        # maps to one signal list template that is copied per row.
+        codes = (amount_flag.astype(np.uint8)
+                 | hour_flag.astype(np.uint8) << 1
+                 | country_flag.astype(np.uint8) << 2
+                 | device_flag.astype(np.uint8) << 3)
+        labels = ("Monto fuera de rango", "Horario no habitual", "País inusual", "Dispositivo desconocido")
+        templates = [[label for bit, label in enumerate(labels) if code >> bit & 1] for code in range(16)]
+        return list(map(list.copy, map(templates.__getitem__, codes.tolist())))
+
+class TriageService:
+    """
+    Deterministic pre-screen run before the multi-agent orchestrator.
+
+    Clear-cut transactions are decided locally with templated explanations;
+    anything else returns None and goes through the full agent graph.
+    """
+
+    @staticmethod
+    def pre_screen(transaction: Transaction, velocity):
+        if not settings.TRIAGE_ENABLED:
+            return None
+
         customer = transaction.customer
-        
-        # 1. Amount Analysis
-        if float(transaction.amount) > float(customer.usual_amount_avg) * 2:
-            signals.append("Monto fuera de rango")
-            
-        # 2. Hours Analysis
-        if customer.usual_hours:
-            try:
-                start_h, end_h = map(int, customer.usual_hours.split('-'))
-                tx_hour = transaction.timestamp.hour
-                if not (start_h <= tx_hour <= end_h):
-                    signals.append("Horario no habitual")
-            except ValueError:
-                pass
-        
-        # 3. Country Analysis
-        if customer.usual_countries:
-            usual_countries = [c.strip() for c in customer.usual_countries.split(',')]
-            if transaction.country not in usual_countries:
-                signals.append("País inusual")
-                
-        # 4. Device Analysis
-        if customer.usual_devices:
-            usual_devices = [d.strip() for d in customer.usual_devices.split(',')]
-            if transaction.device_id not in usual_devices:
-                signals.append("Dispositivo desconocido")
-                
-        return signals
+        signals = SignalAnalysisService.analyze_transaction(transaction) + velocity["signals"]
+        amount = float(transaction.amount)
+        usual_avg = float(customer.usual_amount_avg)
+
+        # 1. No signals and an amount within the customer's usual average
+        if not signals and amount <= usual_avg * settings.TRIAGE_APPROVE_MAX_AMOUNT_RATIO:
+            return {
+                "decision": "APPROVE",
+                "confidence": settings.TRIAGE_APPROVE_CONFIDENCE,
+                "signals": [],
+                "explanation_customer": "Su transacción fue aprobada. Coincide con sus hábitos de uso habituales.",
+                "explanation_audit": (
+                    "**Decisión por triaje determinístico (fast-path)**\n"
+                    f"Sin señales de riesgo. Monto {transaction.amount} {transaction.currency} "
+                    f"<= {settings.TRIAGE_APPROVE_MAX_AMOUNT_RATIO} x promedio habitual ({customer.usual_amount_avg}). "
+                    "No se invocó el orquestador multi-agente."
+                ),
+            }
+
+        # 2. Optional: enough signals to block without deliberation (disabled when 0)
+        if settings.TRIAGE_BLOCK_MIN_SIGNALS and len(signals) >= settings.TRIAGE_BLOCK_MIN_SIGNALS:
+            return {
+                "decision": "BLOCK",
+                "confidence": settings.TRIAGE_BLOCK_CONFIDENCE,
+                "signals": signals,
+                "explanation_customer": "Su transacción fue bloqueada de forma preventiva. Comuníquese con el banco para validarla.",
+                "explanation_audit": (
+                    "**Decisión por triaje determinístico (fast-path)**\n"
+                    f"{len(signals)} señales de riesgo (umbral {settings.TRIAGE_BLOCK_MIN_SIGNALS}): {', '.join(signals)}. "
+                    "No se invocó el orquestador multi-agente."
+                ),
+            }
+
+        return None
+
+    @staticmethod
+    def record_local(elapsed):
+        # Saved latency is estimated from the observed orchestrator latency, or
+        # from TRIAGE_ORCHESTRATOR_LATENCY_ESTIMATE until one has been observed.
+        orchestrator = metrics.timing("orchestrator.latency")
+        expected = orchestrator.mean if orchestrator.count else settings.TRIAGE_ORCHESTRATOR_LATENCY_ESTIMATE
+        metrics.incr("triage.local")
+        metrics.incr("triage.latency_saved_seconds", max(0.0, expected - elapsed))
+        metrics.observe("triage.local_latency", elapsed)
+
+    @staticmethod
+    def record_orchestrated():
+        metrics.incr("triage.orchestrator")
+
+    @staticmethod
+    def local_ratio():
+        local, orchestrated = metrics.counter("triage.local"), metrics.counter("triage.orchestrator")
+        return round(local / (local + orchestrated), 4) if local + orchestrated else 0.0
+
+
+metrics.register_gauge("triage.local_ratio", TriageService.local_ratio)
+
 
 class DecisionService:
+    AGENT_PATH = "Context -> Behavior -> RAG -> Web -> Aggregation -> Debate -> Arbiter -> Explainability"
+    _in_flight = SingleFlight()
+
+    @classmethod
+    def decide(cls, transaction: Transaction, latency_budget=None):
+        """
+        Entry point for API requests and queue jobs. Concurrent calls for the
+        same transaction in this process share one apply_decision run, and a
+        decision stays cached for DECISION_CACHE_SECONDS as long as neither the
+        transaction, its customer baseline nor the policy set changes.
+        Fallback decisions are never cached.
+        """
+        cache_key = cls._result_cache_key(transaction)
+        record_id = cache.get(cache_key)
+        if record_id is not None:
+            record = DecisionRecord.objects.filter(pk=record_id, transaction=transaction).first()
+            if record is not None:
+                metrics.incr("decision.cache_hits")
+                return record
+        metrics.incr("decision.cache_misses")
+
+        def run():
+            record = cls.apply_decision(transaction, latency_budget=latency_budget)
+            if not getattr(record, "fallback_reason", None):
+                cache.set(cache_key, record.pk, settings.DECISION_CACHE_SECONDS)
+            return record
+
+        try:
+            record, shared = cls._in_flight.do(transaction.transaction_id, run, timeout=latency_budget)
+        except TimeoutError:
+            # The leader is still deciding and will save its own result, so
+            # this answer must not overwrite it: the fallback is not persisted.
+            metrics.incr("orchestrator.budget_exceeded")
+            reason = "latency budget exceeded"
+            record = DecisionRecord(transaction=transaction, **cls._fallback_fields(transaction, reason=reason))
+            record.fallback_reason = reason
+            return record
+        if shared:
+            metrics.incr("decision.coalesced")
+        return record
+
+    POLICY_STAMP_KEY = "decision:policy_stamp"
+
+    @classmethod
+    def _policy_stamp(cls):
+        """
+        Digest of the policy versions, kept in the cache for
+        DECISION_POLICY_STAMP_SECONDS; PolicyDocument saves and deletes drop it.
+        """
+        stamp = cache.get(cls.POLICY_STAMP_KEY)
+        if stamp is None:
+            policies = list(PolicyDocument.objects.order_by("policy_id").values_list("policy_id", "version"))
+            stamp = hashlib.sha256(json.dumps(policies).encode("utf-8")).hexdigest()
+            cache.set(cls.POLICY_STAMP_KEY, stamp, settings.DECISION_POLICY_STAMP_SECONDS)
+        return stamp
+
     @classmethod
-    def apply_decision(cls, transaction: Transaction):
+    def invalidate_policy_stamp(cls):
+        cache.delete(cls.POLICY_STAMP_KEY)
+
+    @classmethod
+    def _result_cache_key(cls, transaction: Transaction):
+        parts = [
+            transaction.pk, transaction.amount, transaction.currency, transaction.country, transaction.channel,
+            transaction.device_id, transaction.timestamp.isoformat(), transaction.merchant_id,
+            transaction.customer.updated_at.isoformat(), cls._policy_stamp(),
+        ]
+        digest = hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+        return f"decision:{transaction.pk}:{digest}"
+
+    @classmethod
+    def apply_decision(cls, transaction: Transaction, latency_budget=None):
+        """
+        Decides on the transaction. With a latency_budget (seconds), the
+        fallback decision is returned once the budget runs out instead of
+        waiting for the orchestrator.
+        """
+        started = time.perf_counter()
+        velocity = VelocityService.snapshot(transaction)
+
+        # 0. Deterministic pre-screen: clear-cut cases never reach the orchestrator
+        record = cls._fast_path(transaction, velocity, started)
+        if record is not None:
+            return record
+
         # 1. Prepare data for the multi-agent orchestrator
+        TriageService.record_orchestrated()
+        payload = cls._build_payload(transaction, velocity)
+
+        # 2. Call the Flask Orchestrator
+        # Use the orchestrator URL from settings (which defaults to agents.local in production)
+        orchestrator_url = settings.ORCHESTRATOR_URL
+        
+        try:
+            logger.info(f"Calling orchestrator for transaction {transaction.transaction_id}")
+            call_started = time.perf_counter()
+            budget = None if latency_budget is None else latency_budget - (call_started - started)
+            response = orchestrator_client.post(orchestrator_url, payload, budget=budget)
+            agent_result = response.json()
+            metrics.observe("orchestrator.latency", time.perf_counter() - call_started)
+            # Log the received JSON result from agents-flask
+            logger.info(f"Received result from orchestrator for TX {transaction.transaction_id}:\n{json.dumps(agent_result, indent=2, ensure_ascii=False)}")
+        except (CircuitOpenError, LatencyBudgetExceeded) as e:
+            logger.warning(f"Skipping orchestrator for TX {transaction.transaction_id}: {e}")
+            reason = "circuit breaker open" if isinstance(e, CircuitOpenError) else "latency budget exceeded"
+            return cls._apply_fallback_decision(transaction, velocity_signals=velocity["signals"], reason=reason)
+        except Exception as e:
+            logger.exception(f"Error calling multi-agent orchestrator: {str(e)}")
+            # Fallback to local deterministic logic if agents-flask is down
+            return cls._apply_fallback_decision(transaction, velocity_signals=velocity["signals"])
+
+        return cls._save_decision(transaction, agent_result)
+
+    @classmethod
+    def apply_decision_batch(cls, transactions, batch_size=None):
+        """
+        Decides many transactions, yielding (transaction, DecisionRecord) as
+        each decision is saved. Fast-path cases are decided locally; the rest
+        go to the orchestrator's batch endpoint in groups of batch_size and are
+        saved in the order the agents service finishes them. Items the
+        orchestrator could not decide get the fallback decision.
+        """
+        batch_size = batch_size or settings.ORCHESTRATOR_BATCH_SIZE
+        pending = []
+        for transaction in transactions:
+            started = time.perf_counter()
+            velocity = VelocityService.snapshot(transaction)
+            record = cls._fast_path(transaction, velocity, started)
+            if record is not None:
+                yield transaction, record
+                continue
+            TriageService.record_orchestrated()
+            pending.append((transaction, velocity))
+            if len(pending) >= batch_size:
+                yield from cls._orchestrate_batch(pending)
+                pending = []
+        if pending:
+            yield from cls._orchestrate_batch(pending)
+
+    @classmethod
+    def _orchestrate_batch(cls, pending):
+        remaining = dict(enumerate(pending))
+        reason = "missing orchestrator result"
+        started = time.perf_counter()
+        try:
+            logger.info(f"Calling batch orchestrator for {len(pending)} transactions")
+            results = orchestrator_client.stream_batch(
+                settings.ORCHESTRATOR_BATCH_URL,
+                [cls._build_payload(transaction, velocity) for transaction, velocity in pending],
+            )
+            waiting_since = started
+            for result in results:
+                # Time spent waiting on the agents service for this result, not
+                # counting our own work on the previous ones: per item, it sums
+                # to the batch's time on the orchestrator side.
+                item_latency = time.perf_counter() - waiting_since
+                entry = remaining.pop(result.get("index"), None)
+                if entry is not None:
+                    transaction, velocity = entry
+                    if "error" in result:
+                        logger.error(f"Orchestrator failed on TX {transaction.transaction_id}: {result['error']}")
+                        yield transaction, cls._apply_fallback_decision(
+                            transaction, velocity_signals=velocity["signals"], reason="orchestrator error"
+                        )
+                    else:
+                        metrics.observe("orchestrator.latency", item_latency)
+                        yield transaction, cls._save_decision(transaction, result)
+                waiting_since = time.perf_counter()
+            metrics.observe("orchestrator.batch_latency", time.perf_counter() - started)
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping batch orchestrator: {e}")
+            reason = "circuit breaker open"
+        except Exception as e:
+            logger.exception(f"Error calling batch orchestrator: {str(e)}")
+            reason = "orchestrator timeout"
+
+        for transaction, velocity in remaining.values():
+            yield transaction, cls._apply_fallback_decision(
+                transaction, velocity_signals=velocity["signals"], reason=reason
+            )
+
+    @classmethod
+    def _fast_path(cls, transaction: Transaction, velocity, started):
+        """Saves and returns the triage decision, or None when the orchestrator is needed."""
+        local_result = TriageService.pre_screen(transaction, velocity)
+        if local_result is None:
+            return None
+        record = cls._save_decision(
+            transaction, local_result,
+            event_type="FAST_PATH_DECISION",
+            agent_path="Signal Engine -> Fast-path Triage",
+            label="Fast-path",
+        )
+        TriageService.record_local(time.perf_counter() - started)
+        return record
+
+    @staticmethod
+    def _build_payload(transaction: Transaction, velocity):
         customer = transaction.customer
-        payload = {
+        return {
             "transaction": {
                 "id": transaction.transaction_id,
                 "amount": str(transaction.amount),
@@ -62,33 +453,22 @@ class DecisionService:
                 "usual_hours": customer.usual_hours,
                 "usual_countries": customer.usual_countries,
                 "usual_devices": customer.usual_devices
-            }
+            },
+            "velocity": velocity
         }
 
-        # 2. Call the Flask Orchestrator
-        # Use the orchestrator URL from settings (which defaults to agents.local in production)
-        orchestrator_url = settings.ORCHESTRATOR_URL
-        
-        try:
-            logger.info(f"Calling orchestrator for transaction {transaction.transaction_id}")
-            response = requests.post(orchestrator_url, json=payload, timeout=300)
-            response.raise_for_status()
-            agent_result = response.json()
-            # Log the received JSON result from agents-flask
-            logger.info(f"Received result from orchestrator for TX {transaction.transaction_id}:\n{json.dumps(agent_result, indent=2, ensure_ascii=False)}")
-        except Exception as e:
-            logger.exception(f"Error calling multi-agent orchestrator: {str(e)}")
-            # Fallback to local deterministic logic if agents-flask is down
-            return cls._apply_fallback_decision(transaction)
-
+    @classmethod
+    def _save_decision(cls, transaction: Transaction, result, event_type="MULTI_AGENT_DECISION",
+                       agent_path=AGENT_PATH, label="Multi-agent"):
+        """Persists an orchestrator (or fast-path) result: DecisionRecord, AuditEvent and HITL case."""
         # 3. Parse Agent Results
-        decision = agent_result.get("decision", "ESCALATE_TO_HUMAN")
-        confidence = agent_result.get("confidence", 0.0)
-        signals = agent_result.get("signals", [])
-        citations_internal = agent_result.get("citations_internal", [])
-        citations_external = agent_result.get("citations_external", [])
-        exp_customer = agent_result.get("explanation_customer", "Revisando transacción...")
-        exp_audit = agent_result.get("explanation_audit", "Esperando respuesta de agentes.")
+        decision = result.get("decision", "ESCALATE_TO_HUMAN")
+        confidence = result.get("confidence", 0.0)
+        signals = result.get("signals", [])
+        citations_internal = result.get("citations_internal", [])
+        citations_external = result.get("citations_external", [])
+        exp_customer = result.get("explanation_customer", "Revisando transacción...")
+        exp_audit = result.get("explanation_audit", "Esperando respuesta de agentes.")
 
         # 4. Create DecisionRecord
         record, _ = DecisionRecord.objects.update_or_create(
@@ -105,14 +485,14 @@ class DecisionService:
         )
         
         # 5. Create Audit Event
-        AuditEvent.objects.create(
+        audit_writer.write(
             transaction=transaction,
-            event_type="MULTI_AGENT_DECISION",
-            description=f"Multi-agent decision: {decision} with confidence {confidence}",
+            event_type=event_type,
+            description=f"{label} decision: {decision} with confidence {confidence}",
             metadata={
-                "trace_id": agent_result.get("trace_id"),
+                "trace_id": result.get("trace_id"),
                 "signals": signals,
-                "agent_path": "Context -> Behavior -> RAG -> Web -> Aggregation -> Debate -> Arbiter -> Explainability"
+                "agent_path": agent_path
             }
         )
         
@@ -126,10 +506,23 @@ class DecisionService:
         return record
 
     @classmethod
-    def _apply_fallback_decision(cls, transaction: Transaction):
+    def _apply_fallback_decision(cls, transaction: Transaction, velocity_signals=None, reason="orchestrator timeout"):
         """Fallback logic if the multi-agent system is unavailable."""
-        from core.services import SignalAnalysisService
+        record, _ = DecisionRecord.objects.update_or_create(
+            transaction=transaction,
+            defaults=cls._fallback_fields(transaction, velocity_signals, reason),
+        )
+        # Degraded result: decide() does not cache it
+        record.fallback_reason = reason
+        return record
+
+    @staticmethod
+    def _fallback_fields(transaction: Transaction, velocity_signals=None, reason="orchestrator timeout"):
+        """DecisionRecord fields of the local heuristic decision."""
         signals = SignalAnalysisService.analyze_transaction(transaction)
+        if velocity_signals is None:
+            velocity_signals = VelocityService.analyze_transaction(transaction)
+        signals += velocity_signals
         
         # Basic heuristic
         if len(signals) >= 3:
@@ -139,14 +532,10 @@ class DecisionService:
         else:
             decision, confidence = "APPROVE", 0.9
 
-        record, _ = DecisionRecord.objects.update_or_create(
-            transaction=transaction,
-            defaults={
-                'decision': decision,
-                'confidence': confidence,
-                'signals': signals,
-                'explanation_customer': "Su transacción está siendo procesada.",
-                'explanation_audit': f"Fallback decision due to orchestrator timeout. Signals: {signals}"
-            }
-        )
-        return record
+        return {
+            'decision': decision,
+            'confidence': confidence,
+            'signals': signals,
+            'explanation_customer': "Su transacción está siendo procesada.",
+            'explanation_audit': f"Fallback decision due to {reason}. Signals: {signals}"
+        }
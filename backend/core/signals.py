@@ -0,0 +1,80 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from core import counters
+from core.baselines import baseline_cache
+from core.models import ArchivedDecision, CustomerProfile, DecisionRecord, HumanReviewCase, PolicyDocument
+from core.services import DecisionService
+
+
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_delete, sender=CustomerProfile)
+def invalidate_customer_baseline(sender, instance, **kwargs):
+    baseline_cache.invalidate(instance.customer_id)
+
+
+@receiver(post_save, sender=PolicyDocument)
+@receiver(post_delete, sender=PolicyDocument)
+def invalidate_policy_stamp(sender, **kwargs):
+    DecisionService.invalidate_policy_stamp()
+
+
+# Dashboard counters. Instances loaded from the DB carry a `_counted`
+# snapshot (see from_db); pre_save only queries the previous values when
+# that snapshot is missing, e.g. for an instance built by hand with a pk.
+
+def _previous_state(sender, instance, using, fields):
+    # A hand-built instance is still `adding` even when its pk is an existing row
+    if instance.pk is None:
+        return None
+    counted = instance.__dict__.get('_counted')
+    if counted is not None and None not in counted:
+        return counted
+    return sender.objects.using(using).filter(pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(pre_save, sender=DecisionRecord)
+def remember_previous_decision(sender, instance, using, **kwargs):
+    if not counters.counters_suspended():
+        instance._counter_previous = _previous_state(sender, instance, using, ('decision', 'confidence'))
+
+
+@receiver(post_save, sender=DecisionRecord)
+def count_decision(sender, instance, using, created, **kwargs):
+    current = (instance.decision, instance.confidence)
+    if not counters.counters_suspended():
+        previous = instance.__dict__.pop('_counter_previous', None)
+        if created:
+            # A transaction decided again after archiving: the new record replaces the archived one
+            previous = ArchivedDecision.objects.using(using).filter(
+                transaction_id=instance.transaction_id
+            ).values_list('decision', 'confidence').first()
+        counters.apply_delta(using, **counters.decision_delta(previous, current))
+    instance._counted = current
+
+
+@receiver(pre_save, sender=HumanReviewCase)
+def remember_previous_case_status(sender, instance, using, **kwargs):
+    if not counters.counters_suspended():
+        instance._counter_previous = _previous_state(sender, instance, using, ('status',))
+
+
+@receiver(post_save, sender=HumanReviewCase)
+def count_case(sender, instance, using, **kwargs):
+    if not counters.counters_suspended():
+        previous = instance.__dict__.pop('_counter_previous', None)
+        counters.apply_delta(using, **counters.case_delta(previous and previous[0], instance.status))
+    instance._counted = (instance.status,)
+
+
+@receiver(post_delete, sender=DecisionRecord)
+def uncount_decision(sender, instance, using, **kwargs):
+    if not counters.counters_suspended():
+        counted = instance.__dict__.get('_counted') or (instance.decision, instance.confidence)
+        counters.apply_delta(using, **counters.decision_delta(counted, None))
+
+
+@receiver(post_delete, sender=HumanReviewCase)
+def uncount_case(sender, instance, using, **kwargs):
+    if not counters.counters_suspended():
+        counted = instance.__dict__.get('_counted') or (instance.status,)
+        counters.apply_delta(using, **counters.case_delta(counted[0], None))
@@ -0,0 +1,34 @@
+from django.conf import settings
+
+
+def tuning_pragmas():
+    """
+    PRAGMA statements of the tuned SQLite profile (SQLITE_TUNING=1).
+
+    WAL lets readers run while a writer commits and turns most commits into
+    appends to the -wal file; with WAL, synchronous=NORMAL only fsyncs at
+    checkpoints and stays crash-safe (a power loss can drop the last
+    commits, never corrupt the file). busy_timeout makes a connection wait
+    for the write lock instead of failing with "database is locked".
+    """
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def apply_tuning(cursor):
+    for statement in tuning_pragmas():
+        cursor.execute(statement)
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created receiver: applies the tuned profile to every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_tuning(cursor)
@@ -1,3 +1,1189 @@
-from django.test import TestCase
+import json
+import random
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from io import BytesIO, StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from openpyxl import load_workbook
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from core import archive, counters
+from core.admin import HumanReviewCaseAdmin
+from core.audit import audit_writer
+from core.circuit_breaker import CircuitBreaker
+from core.management.commands.analyze_transactions import _analyze_batch
+from core.management.commands.benchmark_reports import _legacy_markdown, _record
+from core.jobs import PermanentJobError, analysis_queue, export_queue, report_queue
+from core.metrics import metrics
+from core.orchestrator_client import LatencyBudgetExceeded, OrchestratorClient
+from core.baselines import baseline_cache
+from core.services import DecisionService, SignalAnalysisService, TriageService
+from core.singleflight import SingleFlight
+from core.velocity import VelocityStore, VelocityWindow
+from core.report_service import ExcelReportService, PDFReportService, ReportFactory, markdown_to_reportlab
+from core.sqlite import apply_tuning, configure_connection
+from core.report_cache import report_cache
+from core.models import AnalysisJob, CustomerProfile, CustomerCountry, CustomerDevice, Transaction, DecisionRecord, ArchivedDecision, AuditEvent, HumanReviewCase, PolicyDocument, ReportJob, ReportExportJob
 
-# Create your tests here.
+
+class QueryBudgetTests(TestCase):
+    """
+    Read endpoints must run a fixed number of queries whatever the number of
+    rows they return. Each budget is far below the row count, so a per-row
+    query (N+1) fails the test. Raise a budget only for a new constant query.
+    """
+
+    ROWS = 25
+
+    # url -> maximum number of queries
+    BUDGETS = {
+        '/api/hitl/cases/': 3,            # cases+transaction+customer, countries, devices
+        '/api/reports/?limit=50': 3,      # same joins for the nested transaction
+        '/api/reports/?fields=id,transaction_id,customer_id,decision': 1,
+        '/api/transactions/?limit=50': 1,
+        '/api/transactions/?fields=decision,confidence,timestamp': 1,
+        '/api/transactions/T-0/': 3,
+        '/api/dashboard/stats/': 1,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(cls.ROWS):
+            customer = CustomerProfile.objects.create(
+                customer_id=f'CU-{i}', usual_amount_avg=500, usual_hours='08-20',
+                usual_countries='PE,CL', usual_devices=f'D-{i}',
+            )
+            transaction = Transaction.objects.create(
+                transaction_id=f'T-{i}', customer=customer, amount=100 + i, currency='PEN', country='PE',
+                channel='web', device_id=f'D-{i}', timestamp=now, merchant_id='M-001',
+            )
+            DecisionRecord.objects.create(
+                transaction=transaction, decision='ESCALATE_TO_HUMAN', confidence=0.5,
+                explanation_customer='-', explanation_audit='-',
+            )
+            HumanReviewCase.objects.create(transaction=transaction)
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        executed = [q['sql'] for q in queries.captured_queries]
+        self.assertLessEqual(
+            len(executed), budget,
+            f'{url} ran {len(executed)} queries (budget {budget}):\n' + '\n'.join(executed),
+        )
+        return response
+
+    def test_endpoints_stay_within_query_budget(self):
+        for url, budget in self.BUDGETS.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(url, budget)
+
+    def test_invalid_date_bounds_are_rejected(self):
+        for url in ('/api/reports/?date_to=2025-02-30', '/api/transactions/?date_from=2025-13-45T00:00:00',
+                    '/api/reports/?export=excel&date_from=yesterday'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('must be an ISO date or datetime', response.json()['error'])
+
+    def test_cursor_pages_cover_every_row_once(self):
+        # Half the rows share a created_at: the id breaks the tie
+        DecisionRecord.objects.filter(transaction__transaction_id__in=[f'T-{i}' for i in range(0, self.ROWS, 2)]).update(
+            created_at=timezone.now() - timedelta(minutes=5))
+        ids, url = [], '/api/transactions/?limit=7&fields=id'
+        while url:
+            response = self.assertQueryBudget(url, 1)
+            ids += [row['id'] for row in response.json()]
+            cursor = response.get('X-Next-Cursor')
+            url = cursor and f'/api/transactions/?limit=7&fields=id&cursor={cursor}'
+        self.assertEqual(len(set(ids)), self.ROWS)
+        self.assertEqual(ids, [row['id'] for row in self.client.get('/api/transactions/?limit=200&fields=id').json()])
+        self.assertEqual(self.client.get('/api/transactions/?cursor=not-a-cursor').status_code, 400)
+
+    def test_hitl_cases_serialize_customer_links(self):
+        response = self.assertQueryBudget('/api/hitl/cases/', self.BUDGETS['/api/hitl/cases/'])
+        self.assertEqual(len(response.json()), self.ROWS)
+        self.assertEqual(response.json()[0]['transaction']['customer']['usual_countries'], 'PE,CL')
+
+
+class QueryPlanTests(TestCase):
+    """The hot queries must be answered from their index, without a temp B-tree sort."""
+
+    def test_hot_queries_use_their_index(self):
+        since = timezone.now() - timedelta(hours=1)
+        plans = {
+            'decision_recent_idx': DecisionRecord.objects.order_by('-created_at', '-id')[:20],
+            'decision_outcome_recent_idx': DecisionRecord.objects.filter(decision='BLOCK').order_by('-created_at', '-id')[:20],
+            'transaction_customer_time_idx': Transaction.objects.filter(customer_id=1, timestamp__gte=since).order_by('timestamp'),
+            'audit_transaction_time_idx': AuditEvent.objects.filter(transaction_id=1).order_by('timestamp'),
+        }
+        for index, queryset in plans.items():
+            with self.subTest(index=index):
+                plan = queryset.explain()
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
+@override_settings(SQLITE_BUSY_TIMEOUT_MS=1234, SQLITE_MMAP_SIZE=1 << 20, SQLITE_CACHE_SIZE=-2048)
+class SqliteTuningTests(SimpleTestCase):
+
+    def test_tuned_profile_is_applied_to_new_connections(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = sqlite3.connect(f'{directory.name}/tuned.sqlite3')
+        self.addCleanup(database.close)
+        apply_tuning(database.cursor())
+        pragmas = {
+            name: database.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store')
+        }
+        # synchronous 1 = NORMAL, temp_store 2 = MEMORY
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 1234,
+                                   'mmap_size': 1 << 20, 'cache_size': -2048, 'temp_store': 2})
+
+    def test_other_backends_are_left_alone(self):
+        class Connection:
+            vendor = 'postgresql'
+
+            def cursor(self):
+                raise AssertionError('no PRAGMA must be sent')
+
+        configure_connection(sender=None, connection=Connection())
+
+
+@override_settings(AUDIT_BATCH_SIZE=3, AUDIT_FLUSH_SECONDS=3600)
+class AuditWriterTests(TestCase):
+
+    def tearDown(self):
+        audit_writer.flush()
+
+    def write(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                audit_writer.write(event_type='TEST', description=f'event {i}')
+
+    @override_settings(AUDIT_WRITER_MODE='buffered')
+    def test_buffered_events_are_written_in_one_batch(self):
+        self.write(2)
+        self.assertEqual(AuditEvent.objects.count(), 0)
+        self.assertEqual(audit_writer.pending(), 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(audit_writer.flush(), 2)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertEqual(list(AuditEvent.objects.order_by('timestamp', 'id').values_list('description', flat=True)),
+                         ['event 0', 'event 1'])
+
+    @override_settings(AUDIT_WRITER_MODE='buffered')
+    def test_buffer_flushes_at_batch_size(self):
+        self.write(4)
+        self.assertEqual(AuditEvent.objects.count(), 3)
+        self.assertEqual(audit_writer.pending(), 1)
+
+    @override_settings(AUDIT_WRITER_MODE='buffered')
+    def test_request_end_flushes_buffer(self):
+        self.write(1)
+        self.client.get('/api/dashboard/stats/')
+        self.assertEqual(AuditEvent.objects.count(), 1)
+
+    @override_settings(AUDIT_WRITER_MODE='sync')
+    def test_sync_mode_writes_immediately(self):
+        audit_writer.write(event_type='TEST', description='now')
+        self.assertEqual(AuditEvent.objects.count(), 1)
+        self.assertEqual(audit_writer.pending(), 0)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(ARCHIVE_DIR=directory.name))
+        customer = CustomerProfile.objects.create(customer_id='CU-A', usual_amount_avg=500, usual_hours='08-20')
+        for i, status in enumerate([None, 'OPEN', 'RESOLVED']):
+            transaction = Transaction.objects.create(
+                transaction_id=f'A-{i}', customer=customer, amount=100, currency='PEN', country='PE',
+                channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+            )
+            DecisionRecord.objects.create(
+                transaction=transaction, decision='ESCALATE_TO_HUMAN' if status else 'BLOCK', confidence=0.7,
+                signals=['amount'], explanation_customer='-', explanation_audit='audit text',
+            )
+            AuditEvent.objects.create(transaction=transaction, event_type='MULTI_AGENT_DECISION', description='-')
+            if status:
+                HumanReviewCase.objects.create(transaction=transaction, status=status)
+        DecisionRecord.objects.update(created_at=timezone.now() - timedelta(days=400))
+        self.cutoff = timezone.now() - timedelta(days=365)
+
+    def test_archive_moves_rows_and_rehydrates_them(self):
+        before = counters.compute()
+        archive.archive_batch(list(archive.archivable(self.cutoff)))
+
+        # The case still OPEN keeps its decision in the database
+        self.assertEqual(list(DecisionRecord.objects.values_list('transaction__transaction_id', flat=True)), ['A-1'])
+        self.assertEqual(ArchivedDecision.objects.count(), 2)
+        self.assertEqual(AuditEvent.objects.count(), 1)
+        self.assertEqual(counters.compute(), before)
+
+        response = self.client.get('/api/transactions/A-0/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['archived'])
+        self.assertEqual(response.json()['explanation_audit'], 'audit text')
+        self.assertEqual(response.json()['signals'], ['amount'])
+        record = archive.rehydrate(Transaction.objects.get(transaction_id='A-2'))
+        self.assertEqual([e.event_type for e in record.archived_audit_trail], ['MULTI_AGENT_DECISION'])
+
+
+    @override_settings(AUDIT_WRITER_MODE='sync')
+    def test_transaction_decided_again_after_archiving(self):
+        archive.archive_batch(list(archive.archivable(self.cutoff)))
+        transaction = Transaction.objects.get(transaction_id='A-0')
+        DecisionService._save_decision(transaction, {'decision': 'APPROVE', 'confidence': 0.9})
+        self.assertEqual(counters.compute()['total_decisions'], 3)
+        self.assertEqual(counters.drift(), {})
+
+        # Archiving the new decision replaces the index entry and keeps the whole trail
+        DecisionRecord.objects.filter(transaction=transaction).update(created_at=timezone.now() - timedelta(days=400))
+        archive.archive_batch(list(archive.archivable(self.cutoff)))
+        self.assertEqual(ArchivedDecision.objects.get(transaction=transaction).decision, 'APPROVE')
+        self.assertEqual(counters.compute()['total_decisions'], 3)
+        self.assertEqual(counters.drift(), {})
+        record = archive.rehydrate(transaction)
+        self.assertEqual(record.decision, 'APPROVE')
+        self.assertEqual(len(record.archived_audit_trail), 2)
+
+
+class DashboardCounterTests(TestCase):
+
+    def setUp(self):
+        customer = CustomerProfile.objects.create(customer_id='CU-D', usual_amount_avg=500, usual_hours='08-20')
+        self.transactions = [
+            Transaction.objects.create(
+                transaction_id=f'D-{i}', customer=customer, amount=100, currency='PEN', country='PE',
+                channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+            )
+            for i in range(3)
+        ]
+
+    def decide(self, transaction, decision, confidence):
+        record, _ = DecisionRecord.objects.update_or_create(
+            transaction=transaction,
+            defaults={'decision': decision, 'confidence': confidence, 'explanation_customer': '-', 'explanation_audit': '-'},
+        )
+        return record
+
+    def test_counters_follow_every_write_without_drift(self):
+        self.decide(self.transactions[0], 'BLOCK', 0.8)
+        record = self.decide(self.transactions[1], 'ESCALATE_TO_HUMAN', 0.5)
+        case = HumanReviewCase.objects.create(transaction=self.transactions[1], status='OPEN')
+        self.assertEqual(counters.drift(), {})
+
+        self.decide(self.transactions[1], 'APPROVE', 0.9)
+        case.status = 'RESOLVED'
+        case.save()
+        # An instance built by hand has no snapshot: pre_save reads the row
+        DecisionRecord(pk=record.pk, transaction=self.transactions[1], decision='CHALLENGE', confidence=0.6,
+                       explanation_customer='-', explanation_audit='-', created_at=record.created_at).save()
+        DecisionRecord.objects.get(transaction=self.transactions[0]).delete()
+        self.assertEqual(counters.drift(), {})
+        self.assertEqual(
+            self.client.get('/api/dashboard/stats/').json(),
+            {'total_analyzed': 1, 'blocked': 0, 'pending_hitl': 0, 'accuracy': 60.0},
+        )
+
+    def test_suspended_updates_are_fixed_by_a_rebuild(self):
+        counters.load()
+        with counters.suspend_counter_updates():
+            self.decide(self.transactions[2], 'BLOCK', 0.7)
+        self.assertEqual(counters.drift(), {'total_decisions': (0, 1), 'blocked': (0, 1), 'confidence_sum': (0.0, 0.7)})
+        counters.rebuild()
+        self.assertEqual(counters.drift(), {})
+
+    def test_reconcile_locks_the_counters_before_reading_the_tables(self):
+        counters.load()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('reconcile_counters', stdout=StringIO())
+        statements = [query['sql'] for query in ctx.captured_queries]
+        lock = next(i for i, sql in enumerate(statements) if sql.startswith('UPDATE "core_dashboardcounters"'))
+        count = next(i for i, sql in enumerate(statements) if 'COUNT(' in sql)
+        self.assertLess(lock, count)
+
+    def test_admin_resolve_counts_only_the_cases_it_opened(self):
+        for transaction, status in zip(self.transactions, ('OPEN', 'RESOLVED', 'IN_PROGRESS')):
+            HumanReviewCase.objects.create(transaction=transaction, status=status)
+        HumanReviewCaseAdmin(HumanReviewCase, admin.site).mark_as_resolved(None, HumanReviewCase.objects.all())
+        self.assertEqual(set(HumanReviewCase.objects.values_list('status', flat=True)), {'RESOLVED'})
+        self.assertEqual(counters.drift(), {})
+
+
+class HitlQueueTests(TestCase):
+
+    def setUp(self):
+        customer = CustomerProfile.objects.create(customer_id='CU-H', usual_amount_avg=500, usual_hours='08-20')
+        # (amount, confidence, hours waiting)
+        for i, (amount, confidence, age) in enumerate([(100, 0.9, 0), (50000, 0.4, 0), (100, 0.9, 48)]):
+            transaction = Transaction.objects.create(
+                transaction_id=f'H-{i}', customer=customer, amount=amount, currency='PEN', country='PE',
+                channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+            )
+            DecisionRecord.objects.create(
+                transaction=transaction, decision='ESCALATE_TO_HUMAN', confidence=confidence,
+                explanation_customer='-', explanation_audit='-',
+            )
+            case = HumanReviewCase.objects.create(transaction=transaction)
+            HumanReviewCase.objects.filter(pk=case.pk).update(
+                priority_key=case.priority_key - timedelta(hours=age)
+            )
+
+    def claim(self, reviewer):
+        return self.client.post('/api/hitl/cases/claim/', {'reviewer': reviewer}, content_type='application/json')
+
+    def test_claims_follow_priority_and_never_overlap(self):
+        claimed = [self.claim(reviewer).json()['transaction']['transaction_id'] for reviewer in ('ana', 'luis', 'eva')]
+        # Two days of waiting outrank a large, uncertain case that just arrived
+        self.assertEqual(claimed, ['H-2', 'H-1', 'H-0'])
+        self.assertEqual(self.claim('ana').status_code, 204)
+        self.assertEqual(counters.compute()['open_cases'], 3)
+
+    def test_lease_guards_the_case_until_it_expires(self):
+        case_id = self.claim('ana').json()['id']
+        resolve = f'/api/hitl/cases/{case_id}/resolve/'
+        response = self.client.post(resolve, {'decision': 'BLOCK', 'reviewer': 'luis'}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+
+        HumanReviewCase.objects.filter(pk=case_id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.claim('luis').json()['id'], case_id)
+        response = self.client.post(f'/api/hitl/cases/{case_id}/renew/', {'reviewer': 'ana'}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(resolve, {'decision': 'BLOCK', 'reviewer': 'luis'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        case = HumanReviewCase.objects.get(pk=case_id)
+        self.assertEqual((case.status, case.assigned_to, case.lease_expires_at), ('RESOLVED', 'luis', None))
+
+    def test_resolved_case_cannot_be_resolved_again(self):
+        case_id = self.claim('ana').json()['id']
+        resolve = f'/api/hitl/cases/{case_id}/resolve/'
+        response = self.client.post(resolve, {'decision': 'BLOCK', 'reviewer': 'ana'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(resolve, {'decision': 'APPROVE', 'reviewer': 'ana'}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(resolve, {'decision': 'APPROVE'}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+
+        record = DecisionRecord.objects.get(transaction__review_cases__id=case_id)
+        self.assertEqual(record.decision, 'BLOCK')
+        self.assertEqual(record.explanation_audit.count('[HITL]'), 1)
+        self.assertEqual(counters.drift(), {})
+        self.assertEqual(self.client.post('/api/hitl/cases/999/resolve/', {'decision': 'BLOCK'},
+                                          content_type='application/json').status_code, 404)
+
+
+class SignalAnalysisTests(TestCase):
+
+    def setUp(self):
+        baseline_cache.clear()
+        profiles = [
+            ('CU-1', 500, '08-20', 'PE,CL', 'D-1,D-2'),
+            ('CU-2', 2000, '00-23', '', ''),  # no usual countries/devices: those rules are skipped
+            ('CU-3', 100, 'not-a-range', 'US', 'D-9'),
+        ]
+        self.customers = [
+            CustomerProfile.objects.create(
+                customer_id=customer_id, usual_amount_avg=amount, usual_hours=hours,
+                usual_countries=countries, usual_devices=devices,
+            )
+            for customer_id, amount, hours, countries, devices in profiles
+        ]
+        start = datetime(2026, 1, 5, tzinfo=dt_timezone.utc)
+        for i in range(24):
+            Transaction.objects.create(
+                transaction_id=f'SA-{i}', customer=self.customers[i % 3], amount=150 * i, currency='PEN',
+                country=['PE', 'CL', 'US', 'BR'][i % 4], channel='web', device_id=f'D-{i % 10}',
+                timestamp=start + timedelta(hours=i), merchant_id='M-001',
+            )
+
+    def test_batch_matches_row_by_row(self):
+        transactions = Transaction.objects.order_by('pk')
+        expected = [SignalAnalysisService.analyze_transaction(tx) for tx in transactions.select_related('customer')]
+        self.assertIn([], expected)
+        self.assertIn(['Monto fuera de rango', 'País inusual', 'Dispositivo desconocido'], expected)
+        self.assertEqual(SignalAnalysisService.analyze_batch(transactions), expected)
+        self.assertEqual(SignalAnalysisService.analyze_batch(list(transactions.select_related('customer'))), expected)
+        self.assertEqual(SignalAnalysisService.analyze_batch(Transaction.objects.none()), [])
+
+
+    def test_baselines_are_cached_until_the_profile_changes(self):
+        customer = self.customers[0]
+        tx = Transaction.objects.select_related('customer').get(transaction_id='SA-3')
+        hits, misses = baseline_cache.hits, baseline_cache.misses
+        SignalAnalysisService.analyze_transaction(tx)
+        SignalAnalysisService.analyze_transaction(Transaction.objects.select_related('customer').get(pk=tx.pk))
+        self.assertEqual((baseline_cache.hits - hits, baseline_cache.misses - misses), (1, 1))
+
+        # A save in this process drops the entry through the post_save receiver.
+        customer.usual_amount_avg = 100
+        customer.save()
+        self.assertIn('Monto fuera de rango', SignalAnalysisService.analyze_transaction(
+            Transaction.objects.select_related('customer').get(pk=tx.pk)))
+
+        # A save made by another process is only visible through updated_at.
+        CustomerProfile.objects.filter(pk=customer.pk).update(
+            usual_amount_avg=5000, updated_at=customer.updated_at + timedelta(seconds=1))
+        self.assertEqual(len(baseline_cache), 1)
+        self.assertNotIn('Monto fuera de rango', SignalAnalysisService.analyze_transaction(
+            Transaction.objects.select_related('customer').get(pk=tx.pk)))
+
+    def test_usual_values_round_trip_through_link_tables(self):
+        cu1, cu2, cu3 = self.customers
+        self.assertEqual(CustomerProfile.objects.get(pk=cu1.pk).usual_countries, 'PE,CL')
+        self.assertEqual(cu2.usual_devices, '')
+        self.assertEqual(CustomerCountry.objects.filter(customer=cu1).count(), 2)
+
+        cu3.usual_devices = ' D-2, D-9 ,D-2,'
+        cu3.save()
+        self.assertEqual(list(CustomerDevice.objects.filter(customer=cu3).values_list('device_id', flat=True)), ['D-2', 'D-9'])
+
+        self.assertEqual([c.customer_id for c in CustomerProfile.objects.usual_in_country('PE')], ['CU-1'])
+        self.assertEqual([c.customer_id for c in CustomerProfile.objects.using_device('D-9')], ['CU-3'])
+        self.assertEqual([c.customer_id for c in CustomerProfile.objects.sharing_devices_with(cu1)], ['CU-3'])
+
+        with self.assertNumQueries(3):
+            values = [(c.usual_countries, c.usual_devices) for c in CustomerProfile.objects.with_usual_links().order_by('pk')]
+        self.assertEqual(values, [('PE,CL', 'D-1,D-2'), ('', ''), ('US', 'D-2,D-9')])
+
+@override_settings(AUDIT_WRITER_MODE='sync', TRIAGE_BLOCK_MIN_SIGNALS=3)
+class TriageTests(TestCase):
+
+    def setUp(self):
+        baseline_cache.clear()
+        self.customer = CustomerProfile.objects.create(
+            customer_id='CU-T', usual_amount_avg=500, usual_hours='08-20', usual_countries='PE', usual_devices='D-1',
+        )
+
+    def _transaction(self, transaction_id, amount, country, device_id, hour=10):
+        return Transaction.objects.create(
+            transaction_id=transaction_id, customer=self.customer, amount=amount, currency='PEN', country=country,
+            channel='web', device_id=device_id, timestamp=datetime(2026, 1, 5, hour, tzinfo=dt_timezone.utc),
+            merchant_id='M-001',
+        )
+
+    def test_clear_cut_transactions_are_decided_locally(self):
+        local = metrics.counter('triage.local')
+        approved = DecisionService.apply_decision(self._transaction('TR-1', 300, 'PE', 'D-1'))
+        blocked = DecisionService.apply_decision(self._transaction('TR-2', 5000, 'BR', 'D-7', hour=3))
+
+        self.assertEqual((approved.decision, approved.confidence), ('APPROVE', 0.95))
+        self.assertEqual(blocked.decision, 'BLOCK')
+        self.assertTrue({'Monto fuera de rango', 'Horario no habitual', 'País inusual', 'Dispositivo desconocido'} <= set(blocked.signals))
+        self.assertEqual(metrics.counter('triage.local') - local, 2)
+        self.assertEqual(
+            list(AuditEvent.objects.order_by('pk').values_list('event_type', flat=True)),
+            ['FAST_PATH_DECISION', 'FAST_PATH_DECISION'],
+        )
+
+    def test_ambiguous_transactions_go_to_the_orchestrator(self):
+        no_signals = {'signals': []}
+        above_average = Transaction.objects.select_related('customer').get(pk=self._transaction('TR-3', 800, 'PE', 'D-1').pk)
+        one_signal = Transaction.objects.select_related('customer').get(pk=self._transaction('TR-4', 300, 'CL', 'D-1').pk)
+        self.assertIsNone(TriageService.pre_screen(above_average, no_signals))
+        self.assertIsNone(TriageService.pre_screen(one_signal, no_signals))
+        with override_settings(TRIAGE_ENABLED=False):
+            clear_cut = Transaction.objects.select_related('customer').get(pk=self._transaction('TR-5', 300, 'PE', 'D-1').pk)
+            self.assertIsNone(TriageService.pre_screen(clear_cut, no_signals))
+
+
+class VelocityTests(TestCase):
+
+    START = datetime(2026, 1, 5, 12, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.customer = CustomerProfile.objects.create(customer_id='CU-V', usual_amount_avg=500, usual_hours='08-20')
+        # Six transactions in six minutes, then one exactly a ring span after the first
+        self.burst = [self.transaction(minutes=i) for i in range(6)]
+        self.later = self.transaction(minutes=60)
+
+    def transaction(self, minutes, amount=100):
+        return Transaction.objects.create(
+            transaction_id=f'V-{Transaction.objects.count()}', customer=self.customer, amount=amount, currency='PEN',
+            country='PE', channel='web', device_id='D-1', timestamp=self.START + timedelta(minutes=minutes),
+            merchant_id='M-001',
+        )
+
+    def store(self, buckets=60):
+        return VelocityStore(bucket_seconds=60, buckets=buckets, max_customers=10)
+
+    def test_ring_buckets_expire_by_slot(self):
+        window = VelocityWindow(4)
+        for bucket_id, amount in ((10, 1.0), (10, 2.0), (12, 5.0)):
+            window.add(bucket_id, amount, bucket_id * 60.0)
+        self.assertEqual(window.totals(12, 3), (3, 8.0))
+        window.add(14, 1.0, 14 * 60.0)  # reuses the slot of bucket 10
+        self.assertEqual(window.totals(12, 3), (1, 5.0))
+        self.assertEqual(window.totals(14, 4), (2, 6.0))
+
+    def test_later_transactions_never_leak_into_earlier_windows(self):
+        in_order = self.store()
+        self.assertEqual(in_order.totals(self.burst[-1], 10, 60), [(6, 600.0), (6, 600.0)])
+        self.assertEqual(in_order.totals(self.later, 10, 60), [(1, 100.0), (6, 600.0)])
+
+        out_of_order = self.store()
+        self.assertEqual(out_of_order.totals(self.later, 10), [(1, 100.0)])
+        self.assertEqual(out_of_order.totals(self.burst[-1], 10), [(6, 600.0)])
+        self.assertEqual(out_of_order.totals(self.burst[2], 10), [(3, 300.0)])
+
+    def test_backfilled_transactions_are_counted(self):
+        store = self.store()
+        store.totals(self.later, 60)
+        # Inserted after the ring moved on: a late row inside it and one far behind it
+        self.transaction(minutes=30, amount=50)
+        old = self.transaction(minutes=-120)
+        self.assertEqual(store.totals(self.later, 60), [(7, 650.0)])
+        self.assertEqual(store.totals(old, 10), [(1, 100.0)])
+        self.assertEqual(store.totals(self.burst[-1], 10), [(6, 600.0)])
+
+    def test_rescored_transaction_ignores_later_ones_in_its_bucket(self):
+        # Same minute bucket as burst[5], 30 seconds later
+        later = Transaction.objects.create(
+            transaction_id='V-late', customer=self.customer, amount=40, currency='PEN', country='PE', channel='web',
+            device_id='D-1', timestamp=self.burst[5].timestamp + timedelta(seconds=30), merchant_id='M-001',
+        )
+        store = self.store()
+        self.assertEqual(store.totals(later, 10), [(7, 640.0)])
+        self.assertEqual(store.totals(self.burst[5], 10, 60), [(6, 600.0), (6, 600.0)])
+        self.assertEqual(store.totals(later, 10), [(7, 640.0)])
+
+    def test_window_longer_than_ring(self):
+        self.assertEqual(self.store(buckets=3).totals(self.burst[-1], 10), [(6, 600.0)])
+
+
+class SingleFlightTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        customer = CustomerProfile.objects.create(customer_id='CU-S', usual_amount_avg=500, usual_hours='00-23')
+        self.transaction = Transaction.objects.create(
+            transaction_id='S-1', customer=customer, amount=100, currency='PEN', country='PE',
+            channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+        )
+
+    def lead(self, flight, key, release, result='leader'):
+        """Starts a leader that holds the key until `release` is set."""
+        started = threading.Event()
+
+        def run():
+            started.set()
+            release.wait(5)
+            return result
+
+        thread = threading.Thread(target=flight.do, args=(key, run))
+        thread.start()
+        started.wait(5)
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        return thread
+
+    def test_concurrent_callers_share_one_run(self):
+        flight, release, results = SingleFlight(), threading.Event(), []
+        self.lead(flight, 'k', release)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('k', lambda: 'own run'))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.1)  # let the followers reach the wait
+        release.set()
+        for follower in followers:
+            follower.join(5)
+        self.assertEqual(results, [('leader', True)] * 3)
+        self.assertEqual(flight.in_flight(), 0)
+        self.assertEqual(flight.do('k', lambda: 'next'), ('next', False))
+
+    def test_follower_timeout_does_not_persist_a_decision(self):
+        self.lead(DecisionService._in_flight, 'S-1', threading.Event())
+        record = DecisionService.decide(self.transaction, latency_budget=0.05)
+        self.assertIsNone(record.pk)
+        self.assertEqual(record.fallback_reason, 'latency budget exceeded')
+        self.assertFalse(DecisionRecord.objects.exists())
+
+    def test_policy_versions_are_read_once(self):
+        key = DecisionService._result_cache_key(self.transaction)
+        with self.assertNumQueries(0):
+            self.assertEqual(DecisionService._result_cache_key(self.transaction), key)
+        PolicyDocument.objects.create(policy_id='P-1', rule='-', version='2')
+        self.assertNotEqual(DecisionService._result_cache_key(self.transaction), key)
+
+
+class _StreamingOrchestrator(BaseHTTPRequestHandler):
+    """Batch endpoint that answers one NDJSON line every DELAY seconds, chunked like the Flask app."""
+    protocol_version = 'HTTP/1.1'
+    DELAY = 0.1
+
+    def do_POST(self):
+        items = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['items']
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for index, _ in enumerate(items):
+            time.sleep(self.DELAY)
+            line = json.dumps({'index': index, 'decision': 'APPROVE', 'confidence': 0.9}).encode() + b'\n'
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+            self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(TRIAGE_ENABLED=False, AUDIT_WRITER_MODE='sync')
+class OrchestratorBatchTests(TestCase):
+
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StreamingOrchestrator)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.enterContext(override_settings(ORCHESTRATOR_BATCH_URL=f'http://127.0.0.1:{server.server_port}/orchestrate/batch'))
+        customer = CustomerProfile.objects.create(customer_id='CU-B', usual_amount_avg=500, usual_hours='00-23')
+        self.transactions = [
+            Transaction.objects.create(
+                transaction_id=f'B-{i}', customer=customer, amount=100, currency='PEN', country='PE',
+                channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+            )
+            for i in range(3)
+        ]
+
+    def test_latency_is_recorded_per_item(self):
+        latency = metrics.timing('orchestrator.latency')
+        count, total = latency.count, latency.total
+        batches = metrics.timing('orchestrator.batch_latency').count
+        decided = list(DecisionService.apply_decision_batch(self.transactions, batch_size=3))
+        self.assertEqual([record.decision for _, record in decided], ['APPROVE'] * 3)
+        latency = metrics.timing('orchestrator.latency')
+        self.assertEqual(latency.count - count, 3)
+        # About one DELAY each, not the time since the batch started (0.1, 0.2, 0.3)
+        self.assertLess((latency.total - total) / 3, _StreamingOrchestrator.DELAY * 1.5)
+        self.assertEqual(metrics.timing('orchestrator.batch_latency').count, batches + 1)
+
+    def test_analyze_command_reports_per_item_latency(self):
+        results = list(_analyze_batch([tx.pk for tx in self.transactions], batch_size=3))
+        self.assertEqual([result['decision'] for result in results], ['APPROVE'] * 3)
+        # Not cumulative: the third result waited about one DELAY, not three
+        self.assertLess(max(result['latency'] for result in results), _StreamingOrchestrator.DELAY * 1.5)
+
+
+class _KeepAliveOrchestrator(BaseHTTPRequestHandler):
+    """Single-item endpoint over HTTP/1.1; the first N requests get a 503."""
+    protocol_version = 'HTTP/1.1'
+    unavailable = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        status, body = 200, b'{"decision": "APPROVE"}'
+        if type(self).unavailable:
+            type(self).unavailable -= 1
+            status, body = 503, b'{}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(ORCHESTRATOR_RETRY_BACKOFF=0.01)
+class OrchestratorClientTests(SimpleTestCase):
+
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveOrchestrator)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f'http://127.0.0.1:{server.server_port}/orchestrate'
+        self.client = OrchestratorClient()
+        self.addCleanup(self.client.close)
+
+    def test_connections_are_reused(self):
+        for budget in (None, None, None, 5, 5):
+            self.assertEqual(self.client.post(self.url, {}, budget=budget).json(), {'decision': 'APPROVE'})
+        stats = self.client.pool_stats()
+        # One connection per session (retrying and budget-bound), reused afterwards
+        self.assertEqual(
+            {key: stats[key] for key in ('requests', 'connections_opened', 'connections_reused', 'idle_connections')},
+            {'requests': 5, 'connections_opened': 2, 'connections_reused': 3, 'idle_connections': 2},
+        )
+        self.assertEqual(self.client.reuse_ratio(), 0.6)
+
+    def test_gateway_errors_are_retried(self):
+        _KeepAliveOrchestrator.unavailable = 2
+        self.addCleanup(setattr, _KeepAliveOrchestrator, 'unavailable', 0)
+        self.assertEqual(self.client.post(self.url, {}).status_code, 200)
+        _KeepAliveOrchestrator.unavailable = 1
+        self.assertEqual(self.client.post(self.url, {}, budget=5).status_code, 200)
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def breaker(self, **options):
+        self.transitions = []
+        options = {
+            'window': 4, 'min_calls': 4, 'failure_rate': 0.5, 'slow_call_seconds': 1.0, 'slow_rate': 0.75,
+            'open_seconds': 60, 'half_open_probes': 1, **options,
+        }
+        return CircuitBreaker('test', on_transition=lambda b, state: self.transitions.append(state), **options)
+
+    def test_opens_on_failure_rate_and_short_circuits(self):
+        breaker = self.breaker()
+        for failed in (False, False, True):
+            breaker.record(0.1, failed=failed)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)  # below min_calls
+        breaker.record(0.1, failed=True)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_opens_on_slow_calls(self):
+        breaker = self.breaker()
+        for elapsed in (2.0, 2.0, 0.1, 2.0):
+            breaker.record(elapsed)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_probe_decides_the_next_state(self):
+        breaker = self.breaker(min_calls=1, open_seconds=0)
+        breaker.record(0.1, failed=True)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())  # one probe at a time
+        breaker.release()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        breaker.record(0.1, failed=True)
+        self.assertTrue(breaker.allow_request())
+        breaker.record(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.transitions, ['OPEN', 'HALF_OPEN', 'OPEN', 'HALF_OPEN', 'CLOSED'])
+
+    def test_probe_cut_short_by_budget_leaves_circuit_half_open(self):
+        client = OrchestratorClient()
+        self.addCleanup(client.close)
+        client.breaker = self.breaker(min_calls=1, open_seconds=0)
+        client.breaker.record(0.1, failed=True)
+        # Accepts connections (kernel backlog) and never answers
+        server = socket.create_server(('127.0.0.1', 0))
+        self.addCleanup(server.close)
+        with self.assertRaises(LatencyBudgetExceeded):
+            client.post(f'http://127.0.0.1:{server.getsockname()[1]}/orchestrate', {}, budget=0.2)
+        self.assertEqual(client.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(client.breaker.allow_request())
+
+    @override_settings(ORCHESTRATOR_RETRIES=3, ORCHESTRATOR_RETRY_BACKOFF=1.0)
+    def test_retries_stop_at_the_budget(self):
+        client = OrchestratorClient()
+        self.addCleanup(client.close)
+        client.breaker = self.breaker(min_calls=1)
+        with socket.create_server(('127.0.0.1', 0)) as closed:
+            url = f'http://127.0.0.1:{closed.getsockname()[1]}/orchestrate'
+        started = time.perf_counter()
+        # Refused connections; the second backoff (2s + jitter) would overrun the budget
+        with self.assertRaises(requests.ConnectionError):
+            client.post(url, {}, budget=0.5)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+
+class AnalysisJobTests(TestCase):
+
+    def setUp(self):
+        baseline_cache.clear()
+        customer = CustomerProfile.objects.create(customer_id='CU-J', usual_amount_avg=500, usual_hours='00-23')
+        self.transaction = Transaction.objects.create(
+            transaction_id='J-1', customer=customer, amount=100, currency='PEN', country='PE',
+            channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+        )
+
+    @staticmethod
+    def expire_lease(job):
+        AnalysisJob.objects.filter(id=job.id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_async_analysis_is_queued_and_decided_by_a_worker(self):
+        response = self.client.post('/api/transactions/analyze/?async=1',
+                                    {'transaction_id': 'J-1', 'customer_id': 'CU-J'}, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'PENDING')
+        self.assertFalse(DecisionRecord.objects.exists())
+
+        self.assertTrue(analysis_queue.run_one('test-worker'))
+        self.assertFalse(analysis_queue.run_one('test-worker'))
+        job = self.client.get(status_url).json()
+        self.assertEqual((job['status'], job['attempts']), ('DONE', 1))
+        self.assertEqual(job['decision']['decision'], 'APPROVE')
+
+    def test_claims_are_exclusive_and_failures_back_off(self):
+        job = analysis_queue.enqueue(transaction=self.transaction, max_attempts=3)
+        claimed = analysis_queue.claim('worker-a')
+        self.assertEqual(claimed.id, job.id)
+        self.assertIsNone(analysis_queue.claim('worker-b'))
+
+        analysis_queue.fail(claimed, RuntimeError('orchestrator down'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.last_error), ('PENDING', None, 'orchestrator down'))
+        self.assertGreaterEqual(job.available_at, claimed.updated_at)
+
+        # An expired lease makes the job claimable by another worker, and the
+        # old owner can no longer complete it.
+        AnalysisJob.objects.filter(id=job.id).update(available_at=timezone.now())
+        stale = analysis_queue.claim('worker-a')
+        self.expire_lease(job)
+        self.assertEqual(analysis_queue.claim('worker-b').attempts, 3)
+        self.assertEqual(analysis_queue.complete(stale), 0)
+
+        # Once the last attempt's lease expires, the reaper fails the job.
+        self.expire_lease(job)
+        self.assertIsNone(analysis_queue.claim('worker-c'))
+        self.assertEqual(analysis_queue.reap_expired(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 3))
+
+    def test_permanent_errors_are_not_retried(self):
+        analysis_queue.enqueue(transaction=self.transaction)
+        job = analysis_queue.claim('worker-a')
+        analysis_queue.fail(job, PermanentJobError('bad input'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 1))
+
+
+class AnalyzeCommandTests(TestCase):
+
+    def setUp(self):
+        baseline_cache.clear()
+        customer = CustomerProfile.objects.create(customer_id='CU-C', usual_amount_avg=500, usual_hours='00-23')
+        self.pks = [
+            Transaction.objects.create(
+                transaction_id=f'C-{i}', customer=customer, amount=100, currency='PEN', country='PE',
+                channel='web', device_id='D-1', timestamp=timezone.now() - timedelta(days=i), merchant_id='M-001',
+            ).pk
+            for i in range(6)
+        ]
+        DecisionRecord.objects.create(
+            transaction_id=self.pks[0], decision='BLOCK', confidence=0.8, explanation_customer='-', explanation_audit='-',
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = f'{directory.name}/checkpoint.json'
+
+    def analyze(self, *args):
+        call_command('analyze_transactions', '--chunk-size', '2', '--checkpoint', self.checkpoint, *args, stdout=StringIO())
+        with open(self.checkpoint, encoding='utf-8') as f:
+            return json.load(f)
+
+    def decided(self):
+        return set(DecisionRecord.objects.values_list('transaction_id', flat=True))
+
+    def test_resumes_from_checkpoint_and_retries_failures(self):
+        with open(self.checkpoint, 'w', encoding='utf-8') as f:
+            json.dump({'last_pk': self.pks[3], 'failed_pks': [self.pks[2]]}, f)
+        self.assertEqual(self.analyze(), {'last_pk': self.pks[5], 'failed_pks': []})
+        self.assertEqual(self.decided(), {self.pks[0], self.pks[2], self.pks[4], self.pks[5]})
+        self.assertEqual(DecisionRecord.objects.get(transaction_id=self.pks[0]).decision, 'BLOCK')
+
+        # Decided transactions are skipped unless --reanalyze is given.
+        self.analyze('--reset-checkpoint')
+        self.assertEqual(len(self.decided()), 6)
+        self.assertEqual(DecisionRecord.objects.get(transaction_id=self.pks[0]).decision, 'BLOCK')
+        self.analyze('--reset-checkpoint', '--reanalyze')
+        self.assertEqual(DecisionRecord.objects.get(transaction_id=self.pks[0]).decision, 'APPROVE')
+
+
+class SeedDataTests(TestCase):
+
+    CUSTOMERS = [
+        'customer_id,usual_amount_avg,usual_hours,usual_countries,usual_devices',
+        'CU-1,500.00,08-20,PE,D-1',
+        'CU-2,900.00,00-23,"PE,CL","D-2,D-3"',
+        'CU-1,700.00,08-22,"PE,US",D-4',  # repeated: the last row wins
+    ]
+    TRANSACTIONS = [
+        'transaction_id,customer_id,amount,currency,country,channel,device_id,timestamp,merchant_id',
+        'T-1,CU-1,100.00,PEN,PE,web,D-1,2025-12-17T03:15:00,M-001',
+        'T-2,CU-2,200.00,PEN,CL,mobile,D-2,2025-12-17T10:00:00,M-002',
+        'T-3,CU-9,300.00,PEN,PE,web,D-9,2025-12-18T10:00:00,M-001',  # unknown customer
+        'T-1,CU-1,150.00,PEN,PE,web,D-1,2025-12-17T03:15:00,M-001',
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.data_dir = directory.name
+        for name, lines in (('customer_behavior.csv', self.CUSTOMERS), ('transactions.csv', self.TRANSACTIONS)):
+            with open(f'{self.data_dir}/{name}', 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        with open(f'{self.data_dir}/fraud_policies.json', 'w', encoding='utf-8') as f:
+            json.dump([{'policy_id': 'FP-01', 'rule': 'r', 'version': '2025.1'}], f)
+
+    def seed(self, *args):
+        call_command('seed_data', '--data-dir', self.data_dir, *args, stdout=StringIO())
+        customers = [
+            (c.customer_id, str(c.usual_amount_avg), c.usual_hours, c.usual_countries, c.usual_devices)
+            for c in CustomerProfile.objects.with_usual_links().order_by('customer_id')
+        ]
+        transactions = list(Transaction.objects.order_by('transaction_id').values_list(
+            'transaction_id', 'customer__customer_id', 'amount', 'timestamp'))
+        policies = list(PolicyDocument.objects.values_list('policy_id', 'version'))
+        return customers, transactions, policies
+
+    def test_stream_mode_matches_row_by_row_ingest(self):
+        expected = self.seed()
+        self.assertEqual(expected[0][0], ('CU-1', '700.00', '08-22', 'PE,US', 'D-4'))
+        self.assertEqual(len(expected[1]), 3)
+        CustomerProfile.objects.all().delete()
+        PolicyDocument.objects.all().delete()
+
+        self.assertEqual(self.seed('--stream', '--chunk-size', '2'), expected)
+        # Running it again upserts in place
+        self.assertEqual(self.seed('--stream', '--chunk-size', '2'), expected)
+
+
+class ReportJobTests(TestCase):
+
+    def setUp(self):
+        for setting in ('EXPORT_DIR', 'REPORT_CACHE_DIR'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.enterContext(override_settings(**{setting: directory.name}))
+        customer = CustomerProfile.objects.create(customer_id='CU-R', usual_amount_avg=500, usual_hours='08-20')
+        transaction = Transaction.objects.create(
+            transaction_id='R-1', customer=customer, amount=100, currency='PEN', country='PE',
+            channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+        )
+        DecisionRecord.objects.create(
+            transaction=transaction, decision='BLOCK', confidence=0.8, signals=['amount'],
+            explanation_customer='-', explanation_audit='**Resumen**\nTexto',
+        )
+
+    def create(self, format):
+        return self.client.post('/api/reports/jobs/', {'transaction_id': 'R-1', 'format': format},
+                                content_type='application/json')
+
+    def test_unimplemented_format_is_rejected_up_front(self):
+        self.assertEqual(self.create('word').status_code, 501)
+        self.assertFalse(ReportJob.objects.exists())
+
+    def test_job_output_supports_range_requests(self):
+        response = self.create('pdf')
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(report_queue.run_one('test-worker'))
+        job = ReportJob.objects.get()
+        self.assertEqual(job.status, 'DONE')
+
+        url = f'/api/reports/jobs/{job.id}/download/'
+        full = b''.join(self.client.get(url).streaming_content)
+        self.assertTrue(full.startswith(b'%PDF'))
+        self.assertEqual(len(full), job.file_size)
+        partial = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 100-199/{job.file_size}')
+        self.assertEqual(b''.join(partial.streaming_content), full[100:200])
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f'bytes={job.file_size}-').status_code, 416)
+        # A stale validator gets the whole file again
+        stale = self.client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other"')
+        self.assertEqual(stale.status_code, 200)
+
+
+class ReportRenderingTests(TestCase):
+
+    def test_markdown_conversion(self):
+        cases = {
+            '': '',
+            'a & b < c': 'a &amp; b &lt; c',
+            '**bold** text': '<b>bold</b> text',
+            '## Title **x**\nline': '<b>Title <b>x</b></b><br/>line',
+            '**# not a header**': '<b># not a header</b>',
+            'a\n\nb': 'a<br/><br/>b',
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(markdown_to_reportlab(text), expected)
+
+    def test_markdown_scanner_matches_legacy_substitutions(self):
+        samples = [_record(3).explanation_audit, '#\n# x', '# \n\n  **a** & b', '***x**', 'a **b\nc** d', '##\t', '****']
+        alphabet = ['*', '*', '#', ' ', '\t', '\n', 'a', 'ó', '&', '<', '>']
+        rng = random.Random(23)
+        samples += [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30))) for _ in range(5000)]
+        for text in samples:
+            self.assertEqual(markdown_to_reportlab(text), _legacy_markdown(text), repr(text))
+
+    def test_long_explanation_renders_across_pages(self):
+        customer = CustomerProfile(customer_id='CU-R', usual_amount_avg=500, usual_hours='08-20')
+        transaction = Transaction(transaction_id='T-R', customer=customer, amount=100, currency='PEN', country='PE',
+                                  channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001')
+        record = DecisionRecord(transaction=transaction, decision='BLOCK', confidence=0.9, signals=['a'],
+                                explanation_customer='-', explanation_audit='## Hallazgo\n**monto** <alto>\n\n' * 300)
+        pdf = PDFReportService().generate(record).getvalue()
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertGreater(pdf.count(b'/Type /Page\n'), 3)
+
+
+class ReportCacheTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(REPORT_CACHE_DIR=directory.name))
+        customer = CustomerProfile.objects.create(customer_id='CU-R', usual_amount_avg=500, usual_hours='08-20')
+        transaction = Transaction.objects.create(
+            transaction_id='R-1', customer=customer, amount=100, currency='PEN', country='PE',
+            channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+        )
+        self.record = DecisionRecord.objects.create(
+            transaction=transaction, decision='BLOCK', confidence=0.8, signals=['amount'],
+            explanation_customer='-', explanation_audit='**Resumen**\nTexto',
+        )
+
+    def test_reports_are_cached_and_revalidated_by_etag(self):
+        url = '/api/reports/R-1/pdf/'
+        hits, misses = report_cache.hits, report_cache.misses
+        first = self.client.get(url)
+        body = b''.join(first.streaming_content)
+        second = self.client.get(url)
+        self.assertEqual(b''.join(second.streaming_content), body)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual((report_cache.hits - hits, report_cache.misses - misses), (1, 1))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        # Any printed value changes the hash: stale validators get the new report
+        DecisionRecord.objects.filter(pk=self.record.pk).update(decision='APPROVE')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        b''.join(changed.streaming_content)
+        self.assertEqual(report_cache.misses - misses, 2)
+        directory = report_cache.root / 'pdf' / str(self.record.pk)
+        self.assertEqual(len(list(directory.iterdir())), 1)  # only the newest version is kept
+        report_cache.invalidate(self.record.pk)
+        self.assertFalse(directory.exists())
+
+
+@override_settings(EXPORT_PROCESSES=2, EXPORT_PROGRESS_SECONDS=0)
+class ReportExportTests(TestCase):
+
+    def setUp(self):
+        for setting in ('EXPORT_DIR', 'REPORT_CACHE_DIR'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.enterContext(override_settings(**{setting: directory.name}))
+        customer = CustomerProfile.objects.create(customer_id='CU-E', usual_amount_avg=500, usual_hours='08-20')
+        for i, decision in enumerate(['BLOCK', 'APPROVE', 'BLOCK', 'ESCALATE_TO_HUMAN', 'BLOCK']):
+            transaction = Transaction.objects.create(
+                transaction_id=f'E-{i}', customer=customer, amount=100, currency='PEN', country='PE',
+                channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+            )
+            DecisionRecord.objects.create(
+                transaction=transaction, decision=decision, confidence=0.8, signals=['amount'],
+                explanation_customer='-', explanation_audit='**Resumen**\nTexto',
+            )
+
+    def test_export_zips_every_matching_report(self):
+        response = self.client.post('/api/reports/exports/', {'decision': ['BLOCK', 'ESCALATE_TO_HUMAN']},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['total'], 4)
+        self.assertTrue(export_queue.run_one('test-worker'))
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual((status['status'], status['rendered'], status['failed'], status['progress']), ('DONE', 4, 0, 1.0))
+        self.assertGreaterEqual(status['pages'], 4)
+        download = self.client.get(status['download_url'])
+        with zipfile.ZipFile(BytesIO(b''.join(download.streaming_content))) as archive:
+            self.assertEqual(sorted(archive.namelist()), [f'Reporte_Fraude_E-{i}.pdf' for i in (0, 2, 3, 4)])
+            self.assertTrue(archive.read('Reporte_Fraude_E-0.pdf').startswith(b'%PDF'))
+
+    def test_filtered_excel_export_runs_in_the_background(self):
+        response = self.client.get('/api/reports/?export=excel&decision=BLOCK')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.json()['format'], response.json()['total']), ('excel', 3))
+        self.assertTrue(export_queue.run_one('test-worker'))
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual((status['status'], status['rendered']), ('DONE', 3))
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download['Content-Type'], ReportFactory.file_info('excel')[1])
+        workbook = load_workbook(BytesIO(b''.join(download.streaming_content)), read_only=True)
+        self.addCleanup(workbook.close)
+        self.assertEqual([row[0] for row in workbook['Decisiones'].iter_rows(min_row=2, values_only=True)],
+                         ['E-4', 'E-2', 'E-0'])
+
+        # A single matching transaction is still answered inline
+        response = self.client.get('/api/reports/?export=excel&decision=APPROVE')
+        self.assertEqual((response.status_code, response['X-Report-Count']), (200, '1'))
+
+    def test_empty_selection_is_rejected(self):
+        response = self.client.post('/api/reports/exports/', {'decision': 'CHALLENGE'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ReportExportJob.objects.exists())
+
+
+class ExcelReportTests(TestCase):
+
+    def test_export_param_selects_the_workbook(self):
+        customer = CustomerProfile.objects.create(customer_id='CU-X', usual_amount_avg=500, usual_hours='08-20')
+        transaction = Transaction.objects.create(
+            transaction_id='T-X', customer=customer, amount=100, currency='PEN', country='PE',
+            channel='web', device_id='D-1', timestamp=timezone.now(), merchant_id='M-001',
+        )
+        DecisionRecord.objects.create(transaction=transaction, decision='BLOCK', confidence=0.9,
+                                      explanation_customer='-', explanation_audit='-')
+        response = self.client.get('/api/reports/?export=excel')
+        self.assertEqual(response['Content-Type'], ReportFactory.file_info('excel')[1])
+        self.assertEqual(response['X-Report-Count'], '1')
+        # ?format= is DRF's renderer override again
+        self.assertEqual(self.client.get('/api/reports/?format=json').status_code, 200)
+        self.assertEqual(self.client.get('/api/reports/?format=excel').status_code, 404)
+
+    def test_workbook_rolls_over_full_sheets(self):
+        class SmallSheets(ExcelReportService):
+            MAX_ROWS = 3
+            MAX_CELL_CHARS = 50
+
+        customer = CustomerProfile(customer_id='CU-X', usual_amount_avg=500, usual_hours='08-20')
+        records = [
+            DecisionRecord(
+                transaction=Transaction(transaction_id=f'T-X{i}', customer=customer, amount=100, currency='PEN',
+                                        country='PE', channel='web', device_id='D-1', timestamp=timezone.now(),
+                                        merchant_id='M-001'),
+                decision='BLOCK', confidence=0.9, signals=['a', 'b'], created_at=timezone.now(),
+                citations_internal=[{'policy_id': 'FP-01', 'version': '2025.1', 'rule': 'regla'}],
+                citations_external=['https://example.com'],
+                explanation_customer='ok\x07', explanation_audit='x' * 100,
+            )
+            for i in range(3)
+        ]
+        buffer = BytesIO()
+        self.assertEqual(SmallSheets().write(iter(records), buffer), 3)
+        workbook = load_workbook(buffer, read_only=True)
+        self.addCleanup(workbook.close)
+        # Continuation sheets are created when needed, so their order follows the writes
+        self.assertCountEqual(workbook.sheetnames, [
+            'Decisiones', 'Decisiones (2)', 'Señales', 'Señales (2)', 'Señales (3)', 'Citas', 'Citas (2)', 'Citas (3)',
+        ])
+        # Every sheet repeats the header; 3 decisions, 6 signals and 6 citations in total
+        rows = {name: list(workbook[name].values) for name in workbook.sheetnames}
+        self.assertEqual(rows['Decisiones (2)'][0], tuple(ExcelReportService.DECISION_HEADER))
+        self.assertEqual(sum(len(r) - 1 for name, r in rows.items() if name.startswith('Decisiones')), 3)
+        self.assertEqual(sum(len(r) - 1 for name, r in rows.items() if name.startswith('Citas')), 6)
+        decision = rows['Decisiones'][1]
+        self.assertEqual((decision[11], len(decision[12])), ('ok', 50))
+        self.assertEqual(rows['Citas'][1][1:], ('interna', 'FP-01', '2025.1', 'regla'))
+        self.assertEqual(rows['Citas'][2][1:], ('externa', None, None, 'https://example.com'))
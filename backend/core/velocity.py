@@ -0,0 +1,188 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from core.models import Transaction
+
+
+class VelocityWindow:
+    """
+    Ring buffer of fixed-width time buckets for one customer.
+
+    Slot i holds the bucket whose number (timestamp // bucket width) is
+    congruent to i modulo the ring size, so adding a transaction and dropping
+    expired buckets are both O(1) and memory never grows past the ring size.
+    The ring covers the `size` buckets ending at `head`.
+    """
+    __slots__ = ('bucket_ids', 'counts', 'sums', 'latest', 'head', 'watermark')
+
+    def __init__(self, size):
+        self.bucket_ids = [-1] * size
+        self.counts = [0] * size
+        self.sums = [0.0] * size
+        # Newest timestamp (epoch seconds) folded into each bucket
+        self.latest = [0.0] * size
+        # Newest bucket covered; nothing after it has been folded in.
+        self.head = -1
+        # Highest Transaction pk folded into the ring.
+        self.watermark = 0
+
+    def add(self, bucket_id, amount, timestamp):
+        slot = bucket_id % len(self.bucket_ids)
+        current = self.bucket_ids[slot]
+        if current == bucket_id:
+            self.counts[slot] += 1
+            self.sums[slot] += amount
+            self.latest[slot] = max(self.latest[slot], timestamp)
+        elif current < bucket_id:
+            self.bucket_ids[slot] = bucket_id
+            self.counts[slot] = 1
+            self.sums[slot] = amount
+            self.latest[slot] = timestamp
+        # else: older than anything the ring can still hold, ignore it.
+
+    def covers(self, bucket_id, span):
+        """Whether all `span` buckets ending at bucket_id are inside the ring."""
+        return bucket_id <= self.head and bucket_id - span >= self.head - len(self.bucket_ids)
+
+    def holds_after(self, bucket_id, timestamp):
+        """Whether bucket_id holds a transaction newer than `timestamp` (epoch seconds)."""
+        slot = bucket_id % len(self.bucket_ids)
+        return self.bucket_ids[slot] == bucket_id and self.latest[slot] > timestamp
+
+    def totals(self, bucket_id, span):
+        """Count and amount sum of the `span` buckets ending at bucket_id (inclusive)."""
+        count, total = 0, 0.0
+        size = len(self.bucket_ids)
+        for offset in range(min(span, size)):
+            slot = (bucket_id - offset) % size
+            if self.bucket_ids[slot] == bucket_id - offset:
+                count += self.counts[slot]
+                total += self.sums[slot]
+        return count, total
+
+
+class VelocityStore:
+    """
+    Per-customer sliding-window aggregates (transaction count and amount sum).
+
+    Windows live in a bounded LRU keyed by the customer pk. The ring of a
+    customer holds every transaction of theirs up to its head bucket; reading
+    a newer bucket moves the head forward and fetches only the buckets it
+    gained plus rows above the pk watermark (late inserts into buckets
+    already covered), so the customer's history is never re-scanned and
+    windows in different worker processes agree. A window the ring no longer
+    holds (an old transaction scored after newer ones, or a window longer
+    than the ring) is answered by an aggregate over the customer/timestamp
+    index.
+
+    A window starts at a bucket boundary (so it spans up to one bucket more
+    than its nominal length) and ends at the transaction itself: when the
+    transaction's bucket already holds later transactions, as when it is
+    re-scored, the window is answered by the aggregate, capped at its
+    timestamp.
+    """
+
+    def __init__(self, bucket_seconds, buckets, max_customers):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.max_customers = max_customers
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket_id(self, timestamp):
+        return int(timestamp.timestamp()) // self.bucket_seconds
+
+    def _bucket_start(self, bucket_id):
+        return datetime.fromtimestamp(bucket_id * self.bucket_seconds, tz=dt_timezone.utc)
+
+    def _window(self, customer_pk):
+        window = self._windows.get(customer_pk)
+        if window is None:
+            window = self._windows[customer_pk] = VelocityWindow(self.buckets)
+            while len(self._windows) > self.max_customers:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(customer_pk)
+        return window
+
+    def _catch_up(self, window, customer_pk, bucket_id):
+        head = max(window.head, bucket_id)
+        first = head - self.buckets + 1
+        rows = Transaction.objects.filter(
+            customer_id=customer_pk,
+            timestamp__gte=self._bucket_start(first),
+            timestamp__lt=self._bucket_start(head + 1),
+        )
+        if window.head >= first:
+            # Buckets already covered only need the rows inserted since
+            rows = rows.filter(Q(timestamp__gte=self._bucket_start(window.head + 1)) | Q(pk__gt=window.watermark))
+        for pk, ts, amount in rows.values_list('pk', 'timestamp', 'amount'):
+            window.add(self._bucket_id(ts), float(amount), ts.timestamp())
+            window.watermark = max(window.watermark, pk)
+        window.head = head
+
+    def _aggregate(self, customer_pk, bucket_id, span, until):
+        totals = Transaction.objects.filter(
+            customer_id=customer_pk,
+            timestamp__gte=self._bucket_start(bucket_id - span + 1),
+            timestamp__lte=until,
+        ).aggregate(count=Count('id'), total=Sum('amount'))
+        return totals['count'], float(totals['total'] or 0)
+
+    def totals(self, transaction, *window_minutes):
+        """
+        One (count, amount_sum) pair per requested window length, covering the
+        customer's transactions in the window that ends at this transaction.
+        """
+        bucket_id = self._bucket_id(transaction.timestamp)
+        spans = [max(1, (minutes * 60) // self.bucket_seconds) for minutes in window_minutes]
+        with self._lock:
+            window = self._window(transaction.customer_id)
+            self._catch_up(window, transaction.customer_id, bucket_id)
+            if window.holds_after(bucket_id, transaction.timestamp.timestamp()):
+                results = [None] * len(spans)
+            else:
+                results = [window.totals(bucket_id, span) if window.covers(bucket_id, span) else None for span in spans]
+        return [
+            result if result is not None else self._aggregate(transaction.customer_id, bucket_id, span, transaction.timestamp)
+            for result, span in zip(results, spans)
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+
+velocity_store = VelocityStore(
+    bucket_seconds=settings.VELOCITY_BUCKET_SECONDS,
+    buckets=settings.VELOCITY_BUCKETS,
+    max_customers=settings.VELOCITY_MAX_CUSTOMERS,
+)
+
+
+class VelocityService:
+    @staticmethod
+    def snapshot(transaction: Transaction):
+        (tx_count, _), (_, amount_sum) = velocity_store.totals(
+            transaction, settings.VELOCITY_COUNT_WINDOW_MINUTES, settings.VELOCITY_AMOUNT_WINDOW_MINUTES
+        )
+
+        signals = []
+        if tx_count >= settings.VELOCITY_COUNT_THRESHOLD:
+            signals.append("Alta frecuencia de transacciones")
+        if amount_sum > float(transaction.customer.usual_amount_avg) * settings.VELOCITY_AMOUNT_FACTOR:
+            signals.append("Monto acumulado elevado")
+
+        return {
+            "tx_count_window": tx_count,
+            "tx_count_window_minutes": settings.VELOCITY_COUNT_WINDOW_MINUTES,
+            "amount_sum_window": round(amount_sum, 2),
+            "amount_sum_window_minutes": settings.VELOCITY_AMOUNT_WINDOW_MINUTES,
+            "signals": signals,
+        }
+
+    @staticmethod
+    def analyze_transaction(transaction: Transaction):
+        return VelocityService.snapshot(transaction)["signals"]
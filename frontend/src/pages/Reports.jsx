@@ -7,7 +7,9 @@ function Reports() {
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
-        api.get('/reports/').then(res => {
+        api.get('/reports/', {
+            params: { fields: 'id,transaction_id,customer_id,decision,confidence,explanation_audit,created_at' }
+        }).then(res => {
             setReports(res.data);
             setLoading(false);
         }).catch(err => {